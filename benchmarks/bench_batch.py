@@ -0,0 +1,48 @@
+'''
+Benchmarks looking up the filing info of a watchlist of companies in a
+quarter's master.idx one at a time (edgar.edgar._parse_filing_info, as
+get_filing_info does per call) against all at once
+(edgar.edgar._parse_filing_info_batch, as get_filing_info_batch does)
+
+Usage (from the repo root):
+    python -m benchmarks.bench_batch [ciks] [rows]
+
+ciks defaults to 3000 and rows to 300000 (about a quarter of filings). The
+one at a time lookups also download the master.idx each time, which isn't
+counted here, so the real difference is much larger.
+'''
+import random
+import sys
+import time
+from benchmarks.bench_filing_info import make_master_idx
+from edgar.edgar import _parse_filing_info, _parse_filing_info_batch
+
+
+DEFAULT_CIKS = 3000
+DEFAULT_ROWS = 300000
+FORMS = ['10-K', '10-Q']
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else DEFAULT_CIKS
+    rows = int(argv[2]) if len(argv) > 2 else DEFAULT_ROWS
+    text = make_master_idx(rows)
+    ciks = [str(1000000 + i) for i in random.sample(range(rows // 4), min(count, rows // 4))]
+
+    start = time.perf_counter()
+    one_at_a_time = {cik: _parse_filing_info(text, cik=cik, forms=FORMS) for cik in ciks}
+    seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = _parse_filing_info_batch(text, ciks, forms=FORMS)
+    batch_seconds = time.perf_counter() - start
+
+    same = all([f.file for f in one_at_a_time[cik]] == [f.file for f in batch[cik]] for cik in ciks)
+    found = sum(len(filing_infos) for filing_infos in batch.values())
+    print('one at a time {:8.3f}s'.format(seconds))
+    print('batch         {:8.3f}s  ({:.0f}x, {} ciks, {} filings, same results: {})'.format(
+        batch_seconds, seconds / batch_seconds, len(ciks), found, same))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,134 @@
+'''
+Benchmarks the memory of a full-quarter index scan, i.e. a FilingInfo for
+every row of master.idx, comparing the __slots__ edgar.edgar.FilingInfo
+against the previous __dict__ based one that stored the full url, and
+against streaming the index with edgar.edgar.iter_filing_info (all forms,
+and only 10-K and 10-Q)
+
+Usage (from the repo root):
+    python -m benchmarks.bench_filing_info [rows] [path to master.idx]
+
+rows defaults to 300000 (about a quarter of filings) and is used to generate
+a synthetic master.idx when no file is given. A real one can be saved from
+https://www.sec.gov/Archives/edgar/full-index/<year>/QTR<n>/master.idx
+'''
+import sys
+import time
+import tracemalloc
+import edgar.edgar
+from edgar.edgar import ARCHIVES_URL, FilingInfo, _get_filing_info, iter_filing_info
+
+
+DEFAULT_ROWS = 300000
+FORMS = ['10-K', '10-Q', '8-K', '4', '3', 'SC 13G/A', '424B2', 'D']
+
+
+class DictFilingInfo:
+    '''
+    FilingInfo as it was before __slots__, for comparison
+    '''
+    def __init__(self, company, form, cik, date_filed, file):
+        self.company = company
+        self.form = form
+        self.cik = cik
+        self.date_filed = date_filed
+        self.url = ARCHIVES_URL+file
+
+
+class TextResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, text, content):
+        self.text = text
+        self.content = content
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i+chunk_size]
+
+    def close(self):
+        pass
+
+
+class TextRequest:
+    '''
+    Stands in for edgar.edgar.GetRequest, serving the same master.idx for any url
+    '''
+    text = ''
+    content = b''
+
+    def __init__(self, url, stream=False):
+        self.response = TextResponse(TextRequest.text, TextRequest.content)
+
+
+def make_master_idx(rows):
+    '''
+    Returns the text of a synthetic master.idx with rows filings, sorted by cik
+    '''
+    lines = ['header'] * 9 + ['CIK|Company Name|Form Type|Date Filed|Filename', '-' * 80]
+    for i in range(rows):
+        cik = str(1000000 + i // 4)
+        lines.append('{0}|COMPANY {0} INC|{1}|2019-0{2}-{3:02d}|edgar/data/{0}/0001193125-19-{4:06d}.txt'.format(
+            cik, FORMS[i % len(FORMS)], 1 + i % 3, 1 + i % 28, i))
+    return '\n'.join(lines)
+
+
+def measure(filing_info_class):
+    '''
+    Returns (seconds, bytes retained, peak bytes, count) of a full index scan
+    creating filing_info_class objects
+    '''
+    edgar.edgar.FilingInfo = filing_info_class
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        filing_infos = _get_filing_info()
+        seconds = time.perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        edgar.edgar.FilingInfo = FilingInfo
+    return seconds, retained, peak, len(filing_infos)
+
+
+def measure_iter(forms):
+    '''
+    Returns (seconds, bytes retained, peak bytes, count) of a full index scan
+    with iter_filing_info, holding one FilingInfo at a time
+    '''
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    for filing_info in iter_filing_info(2019, 1, forms=forms):
+        count += 1
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, retained, peak, count
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else DEFAULT_ROWS
+    if len(argv) > 2:
+        with open(argv[2], mode='r', encoding='latin-1') as f:
+            TextRequest.text = f.read()
+    else:
+        TextRequest.text = make_master_idx(rows)
+    TextRequest.content = TextRequest.text.encode('utf-8')
+
+    get_request = edgar.edgar.GetRequest
+    edgar.edgar.GetRequest = TextRequest
+    try:
+        results = [(name, measure(filing_info_class)) for name, filing_info_class in [('__dict__', DictFilingInfo), ('__slots__', FilingInfo)]]
+        results.append(('streamed', measure_iter([])))
+        results.append(('streamed 10-K/10-Q', measure_iter(['10-K', '10-Q'])))
+        for name, (seconds, retained, peak, count) in results:
+            print('{:<18} {:>8} filings  {:7.3f}s  retained {:7.1f} MB ({:5.0f} B/filing)  peak {:7.1f} MB'.format(
+                name, count, seconds, retained / 1e6, retained / max(count, 1), peak / 1e6))
+    finally:
+        edgar.edgar.GetRequest = get_request
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,70 @@
+'''
+Benchmarks parsing the financial data of R pages with the event-based
+edgar.financials.ReportTableParser against BeautifulSoup, checking that both
+give the same FinancialInfo
+
+Usage (from the repo root):
+    python -m benchmarks.bench_financials [directory of saved R pages]
+
+The directory defaults to tests/data. R pages can be saved from a Filing, e.g.
+    for document in filing.iter_documents():
+        if document.filename.startswith('R') and document.filename.endswith('.htm'):
+            ...write document.doc_text.data to <directory>/<document.filename>
+'''
+import os
+import sys
+import time
+from edgar.financials import FinancialReportEncoder, _get_report_rows, _get_report_rows_soup, _process_report_rows
+
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'tests', 'data')
+
+
+def read_corpus(directory):
+    '''
+    Returns {filename:html} of the R pages in directory that have a report table
+    '''
+    corpus = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.lower().endswith('.htm'):
+            with open(os.path.join(directory, filename), mode='r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            if 'class="report"' in text:
+                corpus[filename] = text
+    return corpus
+
+
+def time_parse(get_rows, corpus, repeat):
+    '''
+    Returns the best time, in seconds, of parsing the whole corpus repeat times
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus.values():
+            _process_report_rows(get_rows(text))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(directory, repeat=5):
+    corpus = read_corpus(directory)
+    megabytes = sum(len(text) for text in corpus.values()) / 1e6
+    print('{} R pages ({:.2f} MB) in {}'.format(len(corpus), megabytes, directory))
+
+    encoder = FinancialReportEncoder()
+    for filename, text in corpus.items():
+        fast = encoder.encode(_process_report_rows(_get_report_rows(text)))
+        soup = encoder.encode(_process_report_rows(_get_report_rows_soup(text)))
+        if fast != soup:
+            print('MISMATCH in {}'.format(filename))
+
+    soup_seconds = time_parse(_get_report_rows_soup, corpus, repeat)
+    fast_seconds = time_parse(_get_report_rows, corpus, repeat)
+    print('{:>15} {:>10.4f} s'.format('BeautifulSoup', soup_seconds))
+    print('{:>15} {:>10.4f} s ({:.1f}x)'.format('event-based', fast_seconds, soup_seconds / fast_seconds))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR)
@@ -0,0 +1,84 @@
+'''
+Benchmarks looking up a company's filing info for a quarter from the
+master.idx (as edgar.edgar.get_filing_info does without a store) against
+looking it up from an edgar.index_store.FilingIndexStore, after the quarter
+has been ingested
+
+Usage (from the repo root):
+    python -m benchmarks.bench_index_store [rows] [lookups]
+
+rows defaults to 300000 (about a quarter of filings) and lookups to 1000.
+No time is spent downloading, the master.idx is generated and served from
+memory, so the difference is only parsing and searching.
+'''
+import os
+import random
+import sys
+import tempfile
+import time
+import edgar.edgar
+import edgar.index_store
+from benchmarks.bench_filing_info import TextRequest, TextResponse, make_master_idx
+from edgar.edgar import get_filing_info, set_index_provider
+from edgar.index_store import FilingIndexStore
+
+
+DEFAULT_ROWS = 300000
+DEFAULT_LOOKUPS = 1000
+
+
+class TextClient:
+    '''
+    Stands in for the shared Client the store downloads the master.idx with
+    '''
+    def get(self, url, stream=False, headers=None):
+        return TextResponse(TextRequest.text, TextRequest.content)
+
+
+def measure(ciks):
+    '''
+    Returns the seconds per lookup of the filing info of ciks
+    '''
+    start = time.perf_counter()
+    for cik in ciks:
+        get_filing_info(cik=cik, forms=['10-K', '10-Q'], year=2019, quarter=1)
+    return (time.perf_counter() - start) / len(ciks)
+
+
+def main(argv):
+    rows = int(argv[1]) if len(argv) > 1 else DEFAULT_ROWS
+    lookups = int(argv[2]) if len(argv) > 2 else DEFAULT_LOOKUPS
+    TextRequest.text = make_master_idx(rows)
+    TextRequest.content = TextRequest.text.encode('utf-8')
+    ciks = [str(1000000 + random.randrange(rows // 4)) for _ in range(lookups)]
+
+    get_request = edgar.edgar.GetRequest
+    get_client = edgar.index_store.get_client
+    edgar.edgar.GetRequest = TextRequest
+    edgar.index_store.get_client = TextClient
+    try:
+        # the download isn't counted, so a few lookups are enough
+        master_idx = measure(ciks[:10])
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FilingIndexStore(os.path.join(directory, 'index.sqlite'))
+            start = time.perf_counter()
+            store.update(2019, 1)
+            ingest = time.perf_counter() - start
+            set_index_provider(store)
+            try:
+                stored = measure(ciks)
+            finally:
+                set_index_provider(None)
+                store.close()
+            size = os.path.getsize(os.path.join(directory, 'index.sqlite'))
+    finally:
+        edgar.edgar.GetRequest = get_request
+        edgar.index_store.get_client = get_client
+
+    print('master.idx  {:10.1f} us/lookup'.format(master_idx * 1e6))
+    print('store       {:10.1f} us/lookup  (ingest {:.2f}s, {:.1f} MB)'.format(stored * 1e6, ingest, size / 1e6))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
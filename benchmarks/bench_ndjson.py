@@ -0,0 +1,70 @@
+'''
+Benchmarks serializing many FinancialReports with FinancialReportEncoder
+(one JSON document per report) against edgar.ndjson with each available
+backend, and loading them back
+
+Usage (from the repo root):
+    python -m benchmarks.bench_ndjson [number of reports]
+
+The reports are copies of those parsed from the R pages in tests/data.
+'''
+import io
+import os
+import sys
+import time
+from datetime import datetime
+from edgar.financials import FinancialReportEncoder, get_financial_report
+from edgar.ndjson import BACKENDS, dump_reports, load_reports, orjson
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'tests', 'data')
+DEFAULT_REPORTS = 20000
+
+
+def get_reports(count):
+    '''
+    Returns count FinancialReports, cycling through the R pages in tests/data
+    '''
+    templates = []
+    for filename in ['R2.htm', 'R4.htm']:
+        with open(os.path.join(DATA_DIR, filename), mode='r', encoding='utf-8') as f:
+            templates.append(get_financial_report('AAPL', datetime(2016, 1, 27), f.read()))
+    return [templates[i % len(templates)] for i in range(count)]
+
+
+def time_call(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main(count):
+    financial_reports = get_reports(count)
+    print('{} reports'.format(count))
+
+    def encode():
+        encoder = FinancialReportEncoder()
+        f = io.StringIO()
+        for financial_report in financial_reports:
+            f.write(encoder.encode(financial_report))
+            f.write('\n')
+        return f.getvalue()
+
+    encoder_seconds, text = time_call(encode)
+    print('{:>22} {:>8.3f} s  {:>6.1f} MB'.format('FinancialReportEncoder', encoder_seconds, len(text) / 1e6))
+
+    for backend in BACKENDS:
+        if backend == 'orjson' and orjson is None:
+            print('{:>22} not installed'.format(backend))
+            continue
+        f = io.BytesIO()
+        seconds, _ = time_call(lambda: dump_reports(financial_reports, f, backend=backend))
+        print('{:>22} {:>8.3f} s  {:>6.1f} MB ({:.1f}x)'.format(
+            'ndjson ' + backend, seconds, len(f.getvalue()) / 1e6, encoder_seconds / seconds))
+
+    seconds, loaded = time_call(lambda: sum(1 for _ in load_reports(io.BytesIO(f.getvalue()))))
+    print('{:>22} {:>8.3f} s  {} reports'.format('load_reports', seconds, loaded))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REPORTS)
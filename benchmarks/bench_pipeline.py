@@ -0,0 +1,98 @@
+'''
+Load tests the whole pipeline (Stock -> Filing -> FinancialReport) without
+the network, against a mirror of EDGAR, either served by a local
+edgar.fake_edgar.FakeEdgarServer or replayed from disk by
+edgar.requests_wrapper.ReplayAdapter
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pipeline [runs] [threads] [mirror directory]
+
+runs defaults to 50 and threads to 4. Without a mirror directory, one is
+made with an AAPL 10-Q built from the fixtures in tests/data. A real one can
+be recorded with configure(transport=RecordingAdapter(directory)), e.g.
+while running Stock('AAPL').get_filing('quarterly', 2016, 1), and then
+passed here (the runs are of that same call).
+'''
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.bench_xbrl import make_filing_text
+from edgar.fake_edgar import FakeEdgarServer
+from edgar.requests_wrapper import ReplayAdapter, RewriteHostAdapter, configure
+from edgar.stock import Stock
+
+
+DEFAULT_RUNS = 50
+DEFAULT_THREADS = 4
+
+MASTER_IDX = '''Description:           Master Index of EDGAR Dissemination Feed
+Last Data Received:    March 31, 2016
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+Cloud HTTP:            https://www.sec.gov/Archives/
+
+
+
+
+CIK|Company Name|Form Type|Date Filed|Filename
+--------------------------------------------------------------------------------
+1000209|MEDALLION FINANCIAL CORP|10-K|2016-03-15|edgar/data/1000209/0001193125-16-504815.txt
+320193|APPLE INC|10-Q|2016-01-27|edgar/data/320193/0001193125-16-439878.txt
+320193|APPLE INC|8-K|2016-01-26|edgar/data/320193/0001193125-16-439150.txt
+'''
+
+
+def write_mirror(directory):
+    '''
+    Writes a mirror of EDGAR with the 2016 QTR1 index and one AAPL 10-Q
+    '''
+    archives = os.path.join(directory, 'Archives', 'edgar')
+    for path, text in [(os.path.join(archives, 'full-index', '2016', 'QTR1', 'master.idx'), MASTER_IDX),
+            (os.path.join(archives, 'data', '320193', '0001193125-16-439878.txt'), make_filing_text())]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode='w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def run_pipeline(i):
+    statements = Stock('AAPL').get_filing(period='quarterly', year=2016, quarter=1).get_statements()
+    return statements.income_statements is not None
+
+
+def measure(runs, threads):
+    '''
+    Returns (seconds, runs that found an income statement)
+    '''
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        found = sum(executor.map(run_pipeline, range(runs)))
+    return time.perf_counter() - start, found
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else DEFAULT_RUNS
+    threads = int(argv[2]) if len(argv) > 2 else DEFAULT_THREADS
+    with tempfile.TemporaryDirectory() as temp_directory:
+        directory = argv[3] if len(argv) > 3 else temp_directory
+        if len(argv) <= 3:
+            write_mirror(directory)
+
+        results = []
+        try:
+            with FakeEdgarServer(directory) as server:
+                configure(transport=RewriteHostAdapter(server.url), max_requests_per_second=1000)
+                results.append(('fake server', measure(runs, threads)))
+            configure(transport=ReplayAdapter(directory), max_requests_per_second=1000)
+            results.append(('replay', measure(runs, threads)))
+        finally:
+            configure()
+
+    for name, (seconds, found) in results:
+        print('{:<12} {:>5} runs ({} threads)  {:7.3f}s  {:7.1f} runs/s  {} with statements'.format(
+            name, runs, threads, seconds, runs / seconds, found))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,59 @@
+'''
+Benchmarks edgar.sgml.Sgml on filings of increasing size to show that parsing
+cost grows linearly with the size of the filing
+
+Usage (from the repo root):
+    python -m benchmarks.bench_sgml [path/to/filing.txt ...]
+
+Without paths, synthetic filings are generated (the document bodies are
+html-like text of roughly the size of a 10-K's exhibits).
+'''
+import sys
+import time
+from edgar.sgml import Sgml
+from edgar.dtd import DTD
+
+
+HEADER = '<SEC-DOCUMENT>0001104659-18-050552.txt : 20180808\n<SEC-HEADER>0001104659-18-050552.hdr.sgml : 20180808\n<ACCEPTANCE-DATETIME>20180808170227\n</SEC-HEADER>\n'
+DOCUMENT = '<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>{0}\n<FILENAME>ex-{0}.htm\n<DESCRIPTION>EX-99\n<TEXT>\n{1}\n</TEXT>\n</DOCUMENT>\n'
+BODY = '<html><body><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></body></html>\n' * 200
+
+
+def synthetic_filing(document_count):
+    documents = ''.join(DOCUMENT.format(i, BODY) for i in range(document_count))
+    return HEADER + documents + '</SEC-DOCUMENT>'
+
+
+def time_parse(text, repeat=3):
+    '''
+    Returns the best time, in seconds, of parsing text repeat times
+    '''
+    dtd = DTD()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Sgml(text, dtd)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name, text):
+    megabytes = len(text) / 1e6
+    seconds = time_parse(text)
+    print('{:>30} {:>10.2f} MB {:>10.4f} s {:>10.4f} s/MB'.format(name, megabytes, seconds, seconds / megabytes))
+
+
+def main(paths):
+    print('{:>30} {:>13} {:>12} {:>15}'.format('filing', 'size', 'time', 'time/size'))
+    if paths:
+        for path in paths:
+            with open(path, mode='r', encoding='utf-8', errors='replace') as f:
+                report(path, f.read())
+    else:
+        for document_count in [10, 50, 100, 500, 1000, 2000]:
+            report('{} documents'.format(document_count), synthetic_filing(document_count))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
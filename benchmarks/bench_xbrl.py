@@ -0,0 +1,129 @@
+'''
+Benchmarks reading the financial statements of filings from their R pages
+(Filing.get_statements(source='html')) against reading them from their XBRL
+(source='xbrl'), on the same filings, and reports how many values differ
+
+Usage (from the repo root):
+    python -m benchmarks.bench_xbrl [saved filing .txt ...]
+
+Filings can be saved from https://www.sec.gov/Archives/edgar/data/... (the
+url of a FilingInfo). Without any, a filing is made from the R pages and XBRL
+fixtures in tests/data.
+'''
+import os
+import sys
+import time
+import edgar.filing
+from edgar.filing import Filing
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'tests', 'data')
+STATEMENTS = ['income_statements', 'balance_sheets', 'cash_flows']
+
+FILING_SUMMARY = '<FilingSummary><MyReports>' \
+    '<Report><HtmlFileName>R2.htm</HtmlFileName><Role>http://www.apple.com/role/CONDENSEDCONSOLIDATEDSTATEMENTSOFOPERATIONS</Role><ShortName>CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS</ShortName></Report>' \
+    '<Report><HtmlFileName>R4.htm</HtmlFileName><Role>http://www.sunpower.com/role/CONSOLIDATEDBALANCESHEETS</Role><ShortName>CONSOLIDATED BALANCE SHEETS</ShortName></Report>' \
+    '</MyReports></FilingSummary>'
+
+
+def read(path):
+    with open(path, mode='r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def make_filing_text():
+    '''
+    Returns the sgml of a filing made from the fixtures in tests/data
+    '''
+    document = '<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n<FILENAME>{2}\n<TEXT>\n{3}\n</TEXT>\n</DOCUMENT>\n'
+    documents = [('XML', 'R2.htm', read(os.path.join(DATA_DIR, 'R2.htm'))),
+        ('XML', 'R4.htm', read(os.path.join(DATA_DIR, 'R4.htm'))),
+        ('XML', 'FilingSummary.xml', '<XML>\n' + FILING_SUMMARY + '\n</XML>')]
+    for doc_type, filename in [('EX-101.INS', 'xbrl_instance.xml'), ('EX-101.PRE', 'xbrl_pre.xml'), ('EX-101.LAB', 'xbrl_lab.xml')]:
+        documents.append((doc_type, filename, '<XBRL>\n' + read(os.path.join(DATA_DIR, filename)) + '\n</XBRL>'))
+    return '<SEC-DOCUMENT>\n<SEC-HEADER>\n<ACCEPTANCE-DATETIME>20160127163541\n</SEC-HEADER>\n' \
+        + ''.join(document.format(doc_type, i + 1, filename, text) for i, (doc_type, filename, text) in enumerate(documents)) \
+        + '</SEC-DOCUMENT>'
+
+
+class TextResponse:
+
+    def __init__(self, text):
+        self.text = text
+
+
+class TextRequest:
+    '''
+    Stands in for edgar.filing.GetRequest, serving the same filing for any url
+    '''
+    text = ''
+
+    def __init__(self, url, stream=False):
+        self.response = TextResponse(TextRequest.text)
+
+
+def count_differences(statements, other_statements):
+    '''
+    Returns (values compared, values that differ) of the statements found in both
+    '''
+    compared = 0
+    different = 0
+    for attribute in STATEMENTS:
+        financial_report = getattr(statements, attribute)
+        other_report = getattr(other_statements, attribute)
+        if financial_report is None or other_report is None:
+            continue
+        other_values = {(info.date, info.months, xbrl_element): element.value
+            for info in other_report.reports for xbrl_element, element in info.map.items()}
+        for info in financial_report.reports:
+            for xbrl_element, element in info.map.items():
+                key = (info.date, info.months, xbrl_element)
+                if key in other_values and element.value == element.value:
+                    compared += 1
+                    different += element.value != other_values[key]
+    return compared, different
+
+
+def time_statements(filing_text, source, repeat):
+    '''
+    Returns (best seconds, FinancialStatements) of getting the statements of a
+    freshly parsed filing repeat times (only get_statements is timed)
+    '''
+    TextRequest.text = filing_text
+    best = None
+    for _ in range(repeat):
+        filing = Filing('file://filing.txt')
+        start = time.perf_counter()
+        statements = filing.get_statements(source=source)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, statements
+
+
+def main(paths, repeat=5):
+    filings = {path: read(path) for path in paths} if paths else {'tests/data fixtures': make_filing_text()}
+
+    get_request = edgar.filing.GetRequest
+    edgar.filing.GetRequest = TextRequest
+    stdout = sys.stdout
+    try:
+        for name, filing_text in filings.items():
+            # Filing prints its progress
+            sys.stdout = open(os.devnull, 'w')
+            html_seconds, html_statements = time_statements(filing_text, 'html', repeat)
+            xbrl_seconds, xbrl_statements = time_statements(filing_text, 'xbrl', repeat)
+            sys.stdout.close()
+            sys.stdout = stdout
+
+            compared, different = count_differences(xbrl_statements, html_statements)
+            print('{} ({:.1f} MB)'.format(name, len(filing_text) / 1e6))
+            print('{:>8} {:>10.4f} s'.format('html', html_seconds))
+            print('{:>8} {:>10.4f} s ({:.1f}x)  {} of {} values differ'.format(
+                'xbrl', xbrl_seconds, html_seconds / xbrl_seconds, different, compared))
+    finally:
+        sys.stdout = stdout
+        edgar.filing.GetRequest = get_request
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
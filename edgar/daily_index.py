@@ -0,0 +1,166 @@
+'''
+Ingests the EDGAR daily index into an edgar.index_store.FilingIndexStore,
+so that new filings can be picked up during the quarter from each day's
+small master index, rather than downloading the full index of the quarter
+again, e.g.
+
+    https://www.sec.gov/Archives/edgar/daily-index/2019/QTR1/master.20190102.idx
+
+which has the same rows as the full index, with the date as YYYYMMDD:
+
+    CIK|Company Name|Form Type|Date Filed|File Name
+    --------------------------------------------------------------------------------
+    1000045|NICHOLAS FINANCIAL INC|10-Q|20190102|edgar/data/1000045/0001193125-19-000251.txt
+
+A cursor of the last day ingested is kept in the store, so each run only
+downloads the days since. Filings that aren't stored yet are added, and
+each filing is queued in the store once, to be delivered by feed, whether
+or not it was already stored (e.g. by a refresh of the quarter). A filing
+is only marked as delivered once the consumer of feed has handled it, so
+one that's interrupted gets it again next time. Days without an index are
+weekends and holidays, unless they're too recent, in which case the index
+may not have been published yet, so they're tried again next time.
+
+    ingester = DailyIndexIngester(store)
+    for filing_info in ingester.feed(watchlist=['320193'], forms=['10-K', '10-Q']):
+        ...
+'''
+import time
+from datetime import date, datetime, timedelta
+from edgar.edgar import ARCHIVES_URL
+from edgar.requests_wrapper import get_client, _check_response
+
+
+DAILY_INDEX_URL = ARCHIVES_URL+'edgar/daily-index/'
+
+# name of the cursor of the last day ingested in the store
+CURSOR = 'daily-index'
+
+# days (before today) that the index of a weekday may not be published yet
+PUBLISH_DELAY_DAYS = 1
+
+DEFAULT_POLL_INTERVAL = 15 * 60 # seconds
+
+
+
+class DailyIndexIngester:
+    '''
+    Adds the filings of each day's index to a FilingIndexStore, from the day
+    after its cursor until today
+    '''
+    def __init__(self, store, start=None, cursor=CURSOR):
+        '''
+        :param store: edgar.index_store.FilingIndexStore the filings are added to
+        :param start: date of the first day to ingest when the store has no
+            cursor yet, defaults to today
+        :param cursor: name of the cursor in the store, to keep more than one
+        '''
+        self.store = store
+        self.start = start
+        self.cursor = cursor
+
+
+    def get_cursor(self):
+        '''
+        Returns the date of the last day ingested, or None
+        '''
+        day = self.store.get_cursor(self.cursor)
+        return datetime.strptime(day, '%Y-%m-%d').date() if day is not None else None
+
+
+    def ingest(self, today=None):
+        '''
+        Downloads the index of each day since the cursor (through today),
+        adds their filings to the store and queues them to be delivered,
+        and moves the cursor up to the last day that won't change, returning
+        the list of FilingInfo that are newly queued
+        '''
+        today = today or date.today()
+        cursor = self.get_cursor()
+        day = cursor + timedelta(days=1) if cursor is not None else (self.start or today)
+
+        new_filing_infos = []
+        # the cursor stops at the first day that isn't published yet
+        pending = False
+        while day <= today:
+            text = get_daily_index(day)
+            if text is None and day.weekday() < 5 and day >= today - timedelta(days=PUBLISH_DELAY_DAYS):
+                pending = True
+            if text is not None and day == today:
+                # more filings can come in until the day is over
+                pending = True
+
+            # the filings and the cursor are saved together
+            if text is not None:
+                new_filing_infos.extend(self.store.queue_rows(self.cursor, day.isoformat(), day.year,
+                    (day.month - 1) // 3 + 1, _get_rows(text), cursor=not pending))
+            elif not pending:
+                self.store.set_cursor(self.cursor, day.isoformat())
+            day += timedelta(days=1)
+
+        print('ingested {} new filings from the daily index'.format(len(new_filing_infos)))
+        return new_filing_infos
+
+
+    def feed(self, watchlist=None, forms=[], interval=DEFAULT_POLL_INTERVAL, polls=None, callback=None):
+        '''
+        Yields the FilingInfo of new filings as they're ingested, polling the
+        daily index every interval seconds, along with any queued before
+        that haven't been delivered. Each is marked as delivered once the
+        consumer asks for the next one (or it's filtered out), so if the
+        consumer (or callback) raises, it's delivered again next time.
+
+        :param watchlist: ciks of the companies to yield the filings of, or None for all
+        :param forms: forms to yield, or [] for all
+        :param polls: number of times to poll, or None to poll forever
+        :param callback: function called with each FilingInfo, as well as it being yielded
+        '''
+        ciks = {int(cik) for cik in watchlist} if watchlist is not None else None
+        poll = 0
+        while polls is None or poll < polls:
+            if poll > 0:
+                time.sleep(interval)
+            self.ingest()
+            for filing_info in self.store.get_queued(self.cursor):
+                if (ciks is None or int(filing_info.cik) in ciks) and (forms == [] or filing_info.form in forms):
+                    if callback is not None:
+                        callback(filing_info)
+                    yield filing_info
+                self.store.set_delivered(self.cursor, filing_info)
+            poll += 1
+
+
+
+def get_daily_index(day):
+    '''
+    Returns the text of the master index of a day, or None if there isn't one
+    (no filings that day, or it isn't published yet)
+    '''
+    url = '{}{}/QTR{}/master.{:%Y%m%d}.idx'.format(DAILY_INDEX_URL, day.year, (day.month - 1) // 3 + 1, day)
+    response = get_client().get(url)
+    # EDGAR responds with 403 as well as 404 for what isn't there
+    if response.status_code in (403, 404):
+        return None
+    return _check_response(response).text
+
+
+
+def _get_rows(text):
+    '''
+    Yields the [cik, company, form, date_filed, file] of each filing in the
+    text of a daily master index, with date_filed as YYYY-MM-DD
+    '''
+    rows = iter(text.split('\n'))
+    # the header ends with a line of dashes
+    for row in rows:
+        if row.startswith('---'):
+            break
+
+    for row in rows:
+        data = row.split('|')
+        if len(data) == 5:
+            date_filed = data[3]
+            if len(date_filed) == 8 and date_filed.isdigit():
+                data[3] = '{}-{}-{}'.format(date_filed[:4], date_filed[4:6], date_filed[6:])
+            data[4] = data[4].strip()
+            yield data
@@ -120,8 +120,10 @@ def process_symbol_filing(filing_url):
     contains an XML document with issuerCik issuerTradingSymbol tags 
     (usually forms 3, 4, or 5)
     '''
-    filing = Filing(filing_url) # we don't care about the company here
-    document = list(filing.documents.values())[0]
+    # we don't care about the company here, and only need the first document,
+    # so the rest isn't downloaded (closing the response when we're done)
+    with Filing(filing_url, stream=True) as filing:
+        document = next(filing.iter_documents(keep=False))
     return document.get_issuer_trading_symbol()
 
 
@@ -1,5 +1,6 @@
 from bs4 import BeautifulSoup
 from edgar.dtd import DTD
+import xml.etree.ElementTree as ElementTree
 from edgar.document_text import DocumentText
 
 class Document:
@@ -26,6 +27,21 @@ class Document:
         # remove leading zeroes (can also just keep in, doesn't matter)
         cik = None
         symbol = None
+
+        # the xml of forms 3, 4, 5 is well-formed, so try the (much faster)
+        # standard library parser before falling back on BeautifulSoup
+        xml_text = self.doc_text.xml_text
+        if xml_text is not None:
+            try:
+                issuer = ElementTree.fromstring(xml_text.encode('utf-8')).find('issuer')
+            except ElementTree.ParseError:
+                issuer = None
+
+            if issuer is not None and issuer.find('issuerCik') is not None:
+                cik = issuer.findtext('issuerCik').strip().lstrip('0')
+                symbol = issuer.findtext('issuerTradingSymbol', '').strip()
+                print('cik is {0} and symbol is {1}'.format(cik, symbol))
+                return cik, symbol
         
         xml_soup = self.doc_text.xml
         if xml_soup is not None:
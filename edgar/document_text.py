@@ -1,5 +1,13 @@
 from bs4 import BeautifulSoup
 from edgar.dtd import DTD
+from edgar.sgml import SgmlText
+
+# lxml is much faster than python's html.parser, but it's optional
+try:
+    import lxml
+    XML_PARSER = 'lxml'
+except ImportError:
+    XML_PARSER = 'html.parser'
 
 
 # according to the EDGAR SGML specs, DOCUMENT.TEXT has the following children
@@ -8,27 +16,73 @@ attrs = ['pdf', 'xml', 'xbrl', 'table', 'caption', 'stub', 'column', 'footnotes_
 class DocumentText:
     '''
     Used to model a DOCUMENT.TEXT element within an EDGAR SGML
+
+    The text is only copied out of the SGML when data or one of the attrs is
+    accessed, and isn't kept afterwards. The xml is only parsed the first time
+    it's accessed, and is then cached.
     '''
     dtd = DTD()
+    # BeautifulSoup parser for xml; both lowercase tag names
+    xml_parser = XML_PARSER
 
     def __init__(self, data):
         '''
         Constructor
 
         :param data: a dictionary of parsed SGML DOCUMENT.TEXT;
-            keys are tags and values are data as strings
+            keys are tags and values are data as strings (or SgmlText),
+            or the data itself if DOCUMENT.TEXT has no children
+        '''
+        self._data = data
+        self._xml = None
+
+
+    @property
+    def data(self):
+        if type(self._data) is dict:
+            return {tag: _get_text(value) for tag, value in self._data.items()}
+        return _get_text(self._data)
+
+
+    @property
+    def xml_text(self):
+        '''
+        The xml as a str, without parsing it
+        '''
+        return self._get_child('xml')
+
+
+    @property
+    def xml(self):
+        if self._xml is None:
+            value = self._get_child('xml')
+            if value is not None:
+                self._xml = BeautifulSoup(value, self.xml_parser)
+        return self._xml
+
+
+    def __getattr__(self, attr):
+        # for everything else, we take the text as is
+        if attr in attrs:
+            return self._get_child(attr)
+        raise AttributeError('{} has no attribute {}'.format(type(self).__name__, attr))
+
+
+    def _get_child(self, attr):
+        '''
+        Returns the text of the DOCUMENT.TEXT child attr, or None if it's not there
         '''
-        self.data = data
+        tag = getattr(self.dtd, attr).tag
+        data = self.__dict__.get('_data')
 
-        # use data to set attributes
-        for attr in attrs:
-            tag = getattr(self.dtd, attr).tag
+        if type(data) is dict and tag in data:
+            return _get_text(data[tag])
+        return None
 
-            if type(data) is dict and tag in data:
-                value = data[tag]
 
-                if attr == 'xml':
-                    # for everything else, we take the text as is
-                    value = BeautifulSoup(value, 'html.parser')
 
-                setattr(self, attr, value)
\ No newline at end of file
+def _get_text(value):
+    '''
+    Returns value as a str, copying it out of the SGML if it's an SgmlText
+    '''
+    return str(value) if isinstance(value, SgmlText) else value
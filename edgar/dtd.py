@@ -47,7 +47,8 @@ class DTD():
     # children of doc_text
     pdf = Element('<PDF>', True, False, True, doc_text)
     xml = Element('<XML>', True, False, True, doc_text)
-    xbrl = Element('<XBRL>', True, False, True, doc_text)
+    # not required, so documents without it don't get an empty XBRL
+    xbrl = Element('<XBRL>', True, False, False, doc_text)
     table = Element('<TABLE>', True, False, True, doc_text)
     caption = Element('<CAPTION>', False, False, True, doc_text)
     stub = Element('<S>', False, False, True, doc_text)
@@ -69,7 +70,7 @@ class DTD():
                 doc_text
                     # ,pdf
                     ,xml
-                    # ,xbrl
+                    ,xbrl
                     # ,table
                     # ,caption
                     # ,stub
@@ -25,9 +25,18 @@ https://www.sec.gov/forms):
     4: insider trading (gets us the stock symbol (issuerTradingSymbol))
 These can all have ammendments made, e.g. 10-Q/A
 '''
-from edgar.requests_wrapper import GetRequest
+from edgar.requests_wrapper import GetRequest, async_get
+from abc import ABC, abstractmethod
+import asyncio
 import json
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import re
+import threading
+import time
+import warnings
+import zlib
 from datetime import datetime
 import os
 
@@ -43,6 +52,10 @@ SUPPORTED_FORMS = FINANCIAL_FORM_MAP['annual'] + FINANCIAL_FORM_MAP['quarterly']
 
 EDGAR_MIN_YEAR = 1993
 
+# quarters looked up at once by get_filing_info_range and find_latest_filing_info,
+# which share the rate limit of edgar.requests_wrapper
+MAX_QUARTER_WORKERS = 4
+
 ARCHIVES_URL = 'https://www.sec.gov/Archives/'
 FULL_INDEX_URL = ARCHIVES_URL+'edgar/full-index/'
 INDEX_JSON = 'index.json'
@@ -50,9 +63,26 @@ INDEX_JSON = 'index.json'
 COMPANY_IDX = 'company.idx' # sorted by company name
 FORM_IDX = 'form.idx' # sorted by form type
 MASTER_IDX = 'master.idx' # sorted by cik
+MASTER_GZ = 'master.gz' # master.idx gzipped, about a fifth of the size
+# rows before the first filing in master.idx
+MASTER_IDX_HEADER_ROWS = 11
+# bytes read at a time when streaming an index
+INDEX_CHUNK_SIZE = 64 * 1024
 #CRAWLER_IDX = 'crawler.idx'
 #XBRL_IDX = 'xbrl.idx'
 
+# seconds an index.json that can still change (the root's, and the current
+# year's) is kept before it's downloaded again; those of past years are kept
+# for good, since their quarters are all there
+INDEX_JSON_TTL = 5 * 60
+
+# IndexProvider that filing info is looked up from, if set
+_index_provider = None
+
+# {url:(time it expires, json)} of index.json that have been downloaded
+_index_json_cache = {}
+_index_json_lock = threading.Lock()
+
 
 # don't need the following structures, commenting them just in case
 # class Directory():
@@ -77,13 +107,26 @@ MASTER_IDX = 'master.idx' # sorted by cik
 class FilingInfo:
     '''
     FilingInfo class will model crawler.idx filing information
+
+    There's one per row of an index (hundreds of thousands for a quarter),
+    so it has __slots__ rather than a __dict__, and url is only built
+    when it's needed
     '''
+    __slots__ = ('company', 'form', 'cik', 'date_filed', 'file')
+    # what FinancialReportEncoder writes, the same as before url was a property
+    json_attributes = ('company', 'form', 'cik', 'date_filed', 'url')
+
     def __init__(self, company, form, cik, date_filed, file):
         self.company = company
         self.form = form
         self.cik = cik
         self.date_filed = date_filed
-        self.url = ARCHIVES_URL+file
+        # relative to ARCHIVES_URL, e.g. edgar/data/1000209/0001193125-19-004285.txt
+        self.file = file
+
+    @property
+    def url(self):
+        return ARCHIVES_URL+self.file
 
     def __repr__(self):
         return '[{0}, {1}, {2}, {3}, {4}]'.format(
@@ -91,13 +134,45 @@ class FilingInfo:
         
 
 
+class IndexProvider(ABC):
+    '''
+    Source of filing info other than downloading the full index each time,
+    which get_filing_info (and everything that uses it) answers from once
+    it's set with set_index_provider. Implementations return the same
+    FilingInfo as get_filing_info, with year and quarter as numbers (not 0
+    for year, but quarter can be 0 for the latest).
+    '''
+    # True if it can only look up one company at a time, in which case
+    # filing info of all companies (cik='') still comes from the full index
+    per_company = False
+
+    @abstractmethod
+    def get_filing_info(self, cik='', forms=[], year=0, quarter=0):
+        '''
+        Returns a List of FilingInfo, the same as get_filing_info
+        '''
+
+    def get_filing_info_batch(self, ciks, forms=[], year=0, quarter=0):
+        '''
+        Returns a dict of {cik: List of FilingInfo}, the same as get_filing_info_batch
+        '''
+        return {cik: self.get_filing_info(cik=cik, forms=forms, year=year, quarter=quarter) for cik in ciks}
+
+
+
 def get_index_json(year='', quarter=''):
     '''
     Returns json of index.json
         year and quarter are defaulted to '', but can be replaced with an item.href
         from index.json
+
+    It's memoized, for good for past years, and for INDEX_JSON_TTL seconds for
+    the current year and the root, so don't modify it
     '''
-    url = FULL_INDEX_URL+year+quarter+INDEX_JSON
+    url = _get_index_json_url(year, quarter)
+    json_text = _get_cached_index_json(url)
+    if json_text is not None:
+        return json_text
     # print('getting data at '+url)
 
     response = GetRequest(url).response
@@ -106,10 +181,46 @@ def get_index_json(year='', quarter=''):
     json_text = json.loads(text)
     #print(text)
     #print(json['directory']['item'][0]['href'])
+    _cache_index_json(url, year, json_text)
     return json_text
 
 
 
+def clear_index_json_cache():
+    '''
+    Forgets the index.json that have been downloaded (see get_index_json)
+    '''
+    with _index_json_lock:
+        _index_json_cache.clear()
+
+
+
+def _get_cached_index_json(url):
+    '''
+    Returns the json of the index.json at url if it's been downloaded and
+    hasn't expired, otherwise None
+    '''
+    with _index_json_lock:
+        cached = _index_json_cache.get(url)
+    if cached is not None and time.time() < cached[0]:
+        return cached[1]
+    return None
+
+
+
+def _cache_index_json(url, year, json_text):
+    '''
+    Keeps the json of the index.json at url, for good if it's of a past
+    year, otherwise for INDEX_JSON_TTL
+    '''
+    year = year.strip('/') if isinstance(year, str) else str(year)
+    closed = year.isdigit() and int(year) < datetime.now().year
+    expires = float('inf') if closed else time.time() + INDEX_JSON_TTL
+    with _index_json_lock:
+        _index_json_cache[url] = (expires, json_text)
+
+
+
 def get_latest_quarter_dir(year):
     '''
     Given a year (e.g. 2018), traverse the items in index.json to find
@@ -118,6 +229,34 @@ def get_latest_quarter_dir(year):
     '''
     year_str = str(year)+'/'
     index_json = get_index_json(year=year_str)
+    return _get_latest_quarter_dir(index_json)
+
+
+
+async def async_get_latest_quarter_dir(year):
+    '''
+    Coroutine version of get_latest_quarter_dir
+    '''
+    url = _get_index_json_url(str(year)+'/')
+    index_json = _get_cached_index_json(url)
+    if index_json is None:
+        response = await async_get(url)
+        index_json = json.loads(response.text)
+        _cache_index_json(url, year, index_json)
+    return _get_latest_quarter_dir(index_json)
+
+
+
+def _get_index_json_url(year='', quarter=''):
+    return FULL_INDEX_URL+year+quarter+INDEX_JSON
+
+
+
+def _get_latest_quarter_dir(index_json):
+    '''
+    Returns the number and reference of the latest quarter in the index.json
+    of a year (see get_latest_quarter_dir)
+    '''
     items = index_json['directory']['item']
 
     # item list is in order, with the latest at the end
@@ -135,12 +274,119 @@ def find_latest_filing_info_going_back_from(period, cik, year, quarter):
     Returns the latest filing info list in the given year, going backwards from
     the given year and quarter
     '''
-    filing_info_list = []
-    while quarter > 0 and len(filing_info_list) == 0:
-        filing_info_list = get_financial_filing_info(period=period, cik=cik, year=year, quarter=quarter)
-        quarter -= 1
+    if period not in FINANCIAL_FORM_MAP:
+        raise KeyError('period must be either "annual" or "quarterly"')
+    if quarter <= 0:
+        return []
+
+    return find_latest_filing_info(cik, FINANCIAL_FORM_MAP[period], start=(year, 1), end=(year, quarter))
+
+
+
+def find_latest_filing_info(cik, forms=[], start=(EDGAR_MIN_YEAR, 1), end=None, max_workers=MAX_QUARTER_WORKERS):
+    '''
+    Returns the filing info list of the latest quarter between start and end
+    (inclusive) that has any, or [] if none do
+
+    The quarters are looked up max_workers at a time, going back from end,
+    and the search stops as soon as a quarter has filing info and all the
+    quarters after it are known not to
+
+    :param start: (year, quarter) of the earliest quarter
+    :param end: (year, quarter) of the latest quarter, defaults to the current one
+    '''
+    quarters = iter(reversed(_get_quarters(start, end)))
+    futures = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit_next():
+        for year, quarter in quarters:
+            futures.append(executor.submit(get_filing_info, cik=cik, forms=forms, year=year, quarter=quarter))
+            break
+
+    try:
+        for _ in range(max_workers):
+            submit_next()
+
+        # in order, latest first
+        while len(futures) > 0:
+            filing_info_list = futures.popleft().result()
+            if len(filing_info_list) > 0:
+                return filing_info_list
+            submit_next()
+    finally:
+        # returns without waiting for the earlier quarters still being downloaded
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    return []
+
+
+
+def get_filing_info_range(cik, forms=[], start=(EDGAR_MIN_YEAR, 1), end=None, max_workers=MAX_QUARTER_WORKERS):
+    '''
+    Returns a List of FilingInfo of a company from all the quarters between
+    start and end (inclusive), in order of date filed, e.g. every 10-Q since
+    2010 with start=(2010, 1). The quarters are looked up concurrently.
+
+    :param start: (year, quarter) of the earliest quarter
+    :param end: (year, quarter) of the latest quarter, defaults to the current one
+    :param max_workers: number of quarters looked up at once
+    '''
+    quarters = _get_quarters(start, end)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        filing_info_lists = list(executor.map(
+            lambda period: get_filing_info(cik=cik, forms=forms, year=period[0], quarter=period[1]), quarters))
+
+    # stable, so filings on the same day stay in index order
+    filing_infos = [filing_info for filing_info_list in filing_info_lists for filing_info in filing_info_list]
+    filing_infos.sort(key=lambda filing_info: filing_info.date_filed)
+    return filing_infos
+
 
-    return filing_info_list
+
+def _get_quarters(start, end=None):
+    '''
+    Returns the list of (year, quarter) from start to end (inclusive),
+    raising InvalidInputException if start is after end
+
+    :param end: defaults to the current quarter
+    '''
+    if end is None:
+        now = datetime.now()
+        end = (now.year, (now.month - 1) // 3 + 1)
+    for year, quarter in [start, end]:
+        # raises InvalidInputException if they aren't valid
+        _get_period_dirs(year, quarter)
+        if quarter == 0:
+            raise InvalidInputException('Quarter must be 1, 2, 3, or 4')
+    if tuple(start) > tuple(end):
+        raise InvalidInputException('{} is after {}'.format(start, end))
+
+    year, quarter = start
+    quarters = []
+    while (year, quarter) <= tuple(end):
+        quarters.append((year, quarter))
+        year, quarter = (year + 1, 1) if quarter == 4 else (year, quarter + 1)
+    return quarters
+
+
+
+async def async_find_latest_filing_info_going_back_from(period, cik, year, quarter):
+    '''
+    Coroutine version of find_latest_filing_info_going_back_from, which gets
+    the filing info of all the quarters at once
+    '''
+    filing_info_lists = await asyncio.gather(*[
+        async_get_financial_filing_info(period=period, cik=cik, year=year, quarter=q)
+        for q in range(quarter, 0, -1)
+    ])
+    for filing_info_list in filing_info_lists:
+        if len(filing_info_list) > 0:
+            return filing_info_list
+    return []
 
 
 def get_filing_info(cik='', forms=[], year=0, quarter=0):
@@ -148,6 +394,139 @@ def get_filing_info(cik='', forms=[], year=0, quarter=0):
     Public wrapper to get FilingInfo for a given company, type of form, and 
     period
     '''
+    year_str, quarter_str = _get_period_dirs(year, quarter)
+
+    if _use_index_provider(cik, year):
+        _check_forms(forms)
+        return _index_provider.get_filing_info(cik=cik, forms=forms, year=year, quarter=quarter)
+
+    if quarter == 0 and year != 0:
+        # we just want the latest available
+        quarter_str = get_latest_quarter_dir(year)[1]
+
+    return _get_filing_info(cik=cik, forms=forms, year=year_str, quarter=quarter_str)
+
+
+
+def get_filing_info_batch(ciks, forms=[], year=0, quarter=0):
+    '''
+    Returns a dict of {cik: List of FilingInfo} of many companies in a
+    period, from a single download and pass over its index rather than one
+    per company (see get_filing_info). Every cik is in the dict, with an
+    empty list if it has no filings.
+
+    :param ciks: list of cik, e.g. of a watchlist
+    '''
+    year_str, quarter_str = _get_period_dirs(year, quarter)
+
+    # every cik is a company, so any IndexProvider can answer
+    if _index_provider is not None and year != 0:
+        _check_forms(forms)
+        return _index_provider.get_filing_info_batch(ciks, forms=forms, year=year, quarter=quarter)
+
+    if quarter == 0 and year != 0:
+        # we just want the latest available
+        quarter_str = get_latest_quarter_dir(year)[1]
+
+    url = _get_master_idx_url(forms, year_str, quarter_str)
+    response = GetRequest(url).response
+    return _parse_filing_info_batch(response.text, ciks, forms)
+
+
+
+def iter_filing_info(year=0, quarter=0, forms=[], cik='', compressed=False):
+    '''
+    Yields the FilingInfo of a period one at a time, the same as
+    get_filing_info, but as the index is downloaded, so only one row of it
+    is held in memory at a time (rather than the whole index, its rows and
+    all their FilingInfo), e.g. for scanning all filers
+
+    Rows are filtered by form (and cik) before they're decoded or made into
+    FilingInfo, so filtering for a few forms is much cheaper than all.
+
+    :param compressed: download the gzipped index (master.gz), which is about
+        a fifth of the size, and decompress it as it's read
+    '''
+    year_str, quarter_str = _get_period_dirs(year, quarter)
+
+    if quarter == 0 and year != 0:
+        # we just want the latest available
+        quarter_str = get_latest_quarter_dir(year)[1]
+
+    url = _get_master_idx_url(forms, year_str, quarter_str)
+    if compressed:
+        url = url[:-len(MASTER_IDX)] + MASTER_GZ
+
+    for data in _iter_master_idx_rows(url, forms=forms, cik=cik):
+        yield FilingInfo(data[1], data[2], data[0], data[3], data[4])
+
+
+
+def set_index_provider(index_provider):
+    '''
+    Sets the IndexProvider that get_filing_info (and everything that uses it)
+    answers from, e.g. an edgar.index_store.FilingIndexStore or an
+    edgar.submissions.SubmissionsProvider, or None to download the full
+    index each time, returning the previous one
+    '''
+    global _index_provider
+    previous = _index_provider
+    _index_provider = index_provider
+    return previous
+
+
+
+def set_index_store(index_store):
+    '''
+    Deprecated, use set_index_provider
+    '''
+    warnings.warn('set_index_store is deprecated, use set_index_provider', DeprecationWarning, stacklevel=2)
+    return set_index_provider(index_store)
+
+
+
+def _use_index_provider(cik, year):
+    '''
+    Returns True if filing info of cik ('' for all companies) in year should
+    come from the IndexProvider rather than the full index
+    '''
+    return _index_provider is not None and year != 0 and (cik != '' or not _index_provider.per_company)
+
+
+
+async def async_get_filing_info(cik='', forms=[], year=0, quarter=0):
+    '''
+    Coroutine version of get_filing_info, so that the filing info of many
+    periods can be downloaded concurrently, e.g. with asyncio.gather. The
+    index is parsed in the event loop's default executor, and the same as
+    get_filing_info, the IndexProvider (if set) is asked in it instead.
+    '''
+    year_str, quarter_str = _get_period_dirs(year, quarter)
+
+    if _use_index_provider(cik, year):
+        _check_forms(forms)
+        index_provider = _index_provider
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None,
+            lambda: index_provider.get_filing_info(cik=cik, forms=forms, year=year, quarter=quarter))
+
+    if quarter == 0 and year != 0:
+        # we just want the latest available
+        quarter_str = (await async_get_latest_quarter_dir(year))[1]
+
+    url = _get_master_idx_url(forms, year_str, quarter_str)
+    response = await async_get(url)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lambda: _parse_filing_info(response.text, cik, forms))
+
+
+def _get_period_dirs(year, quarter):
+    '''
+    Returns the directories (e.g. '2018/', 'QTR4/') of the index of a year and
+    quarter, '' for either if it's 0 (latest), raising InvalidInputException
+    if they aren't supported
+    '''
     current_year = datetime.now().year
 
     if year!=0 and ((len(str(year)) != 4) or year < EDGAR_MIN_YEAR or year > current_year):
@@ -157,12 +536,7 @@ def get_filing_info(cik='', forms=[], year=0, quarter=0):
 
     year_str = '' if year==0 else str(year)+'/'
     quarter_str = '' if quarter==0 else 'QTR{}/'.format(quarter)
-
-    if quarter == 0 and year != 0:
-        # we just want the latest available
-        quarter_str = get_latest_quarter_dir(year)[1]
-
-    return _get_filing_info(cik=cik, forms=forms, year=year_str, quarter=quarter_str)
+    return year_str, quarter_str
 
 
 def _get_filing_info(cik='', forms=[], year='', quarter=''):
@@ -173,6 +547,117 @@ def _get_filing_info(cik='', forms=[], year='', quarter=''):
         year and quarter are defaulted to '', but can be replaced with an item.href
         from index.json
     '''
+    url = _get_master_idx_url(forms, year, quarter)
+    response = GetRequest(url).response
+    return _parse_filing_info(response.text, cik, forms)
+
+
+
+def _get_master_idx_url(forms, year, quarter):
+    '''
+    Returns the url of the master.idx of a year and quarter (see
+    _get_filing_info), raising InvalidInputException if forms aren't supported
+    '''
+    _check_forms(forms)
+
+    # using master.idx so it's sorted by cik and we can use binary search
+    url = '{}{}{}{}'.format(FULL_INDEX_URL, year, quarter, MASTER_IDX)
+    print('getting {} filing info from {}'.format(forms, url))
+    return url
+
+
+
+def _iter_master_idx_rows(url, forms=[], cik='', response=None):
+    '''
+    Yields the [cik, company, form, date_filed, file] of the filings in the
+    master.idx (or master.gz) at url as it's downloaded, only of the forms
+    (and cik) if given
+
+    :param response: streamed requests.Response of url, if it's already been requested
+    '''
+    if response is None:
+        response = GetRequest(url, stream=True).response
+    try:
+        form_bytes = {form.encode('utf-8') for form in forms}
+        cik_bytes = cik.encode('utf-8')
+
+        lines = _iter_lines(response.iter_content(INDEX_CHUNK_SIZE))
+        # the header ends with a line of dashes
+        for line in lines:
+            if line.startswith(b'---'):
+                break
+
+        if not form_bytes and not cik_bytes:
+            for line in lines:
+                data = line.decode('utf-8', 'replace').split('|')
+                if len(data) == 5:
+                    data[4] = data[4].strip()
+                    yield data
+            return
+
+        for line in lines:
+            # filtered on the cik and form fields before the row is split or decoded
+            company_start = line.find(b'|') + 1
+            form_start = line.find(b'|', company_start) + 1
+            form_end = line.find(b'|', form_start)
+            if form_end == -1 or (cik_bytes and line[:company_start-1] != cik_bytes) \
+                    or (form_bytes and line[form_start:form_end] not in form_bytes):
+                continue
+            data = line.decode('utf-8', 'replace').split('|')
+            if len(data) == 5:
+                data[4] = data[4].strip()
+                yield data
+    finally:
+        # also when the caller stops early
+        response.close()
+
+
+
+def _iter_lines(chunks):
+    '''
+    Yields the lines (bytes, without the newline) of an iterable of chunks
+    of bytes, decompressing them first if they're gzipped
+    '''
+    decompressor = None
+    remainder = b''
+    for chunk in chunks:
+        if decompressor is None:
+            # gzip files start with 1f 8b, unless they've already been decompressed
+            remainder += chunk
+            if len(remainder) < 2:
+                continue
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if remainder[:2] == b'\x1f\x8b' else False
+            chunk, remainder = remainder, b''
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        for line in lines:
+            yield line
+
+    if decompressor:
+        remainder += decompressor.flush()
+    for line in remainder.split(b'\n'):
+        if line:
+            yield line
+
+
+
+def _check_forms(forms):
+    '''
+    Raises InvalidInputException if any of the forms aren't supported
+    '''
+    for form in forms:
+        if form not in SUPPORTED_FORMS:
+            raise InvalidInputException('{} is not a supported form'.format(form))
+
+
+
+def _parse_filing_info(text, cik='', forms=[]):
+    '''
+    Return a List of FilingInfo from the text of a master.idx (see _get_filing_info)
+    '''
     def _get_raw_data(row):
         '''
         Returns a list from a string (master idx row) that is delimited by "|"
@@ -204,19 +689,12 @@ def _get_filing_info(cik='', forms=[], year='', quarter=''):
                         data[4].strip() # File Name
                     ))
 
-    for form in forms:
-        if form not in SUPPORTED_FORMS:
-            raise InvalidInputException('{} is not a supported form'.format(form))
-
-    # using master.idx so it's sorted by cik and we can use binary search
-    url = '{}{}{}{}'.format(FULL_INDEX_URL, year, quarter, MASTER_IDX)
-    print('getting {} filing info from {}'.format(forms, url))
-
-    response = GetRequest(url).response
-    text = response.text
     # print(text)
     rows = text.split('\n')
-    data_rows = rows[11:]
+    data_rows = rows[MASTER_IDX_HEADER_ROWS:]
+    # the blank line at the end would be out of order for the binary search
+    while len(data_rows) > 0 and data_rows[-1].strip() == '':
+        data_rows.pop()
 
     filing_infos = []
 
@@ -232,32 +710,22 @@ def _get_filing_info(cik='', forms=[], year='', quarter=''):
             # comparisons are done as strings, same as ordering in master.idx
             # e.g. 11 > 100
             if data[0] == cik:
-                # matched cik
-                _add_filing_info(filing_infos, data, forms)
-
-                # get all before and after (there can be multiple)
-                # go backwards to get those before
-                index = mid - 1
-                data = _get_raw_data(data_rows[index])
-                while data[0] == cik and index >= 0:
-                    _add_filing_info(filing_infos, data, forms)
-                    index -= 1
-                    data = _get_raw_data(data_rows[index])
-
-                # after
-                index = mid + 1
-                data = _get_raw_data(data_rows[index])
-                while data[0] == cik and index < len(data_rows):
-                    _add_filing_info(filing_infos, data, forms)
-                    index += 1
-                    data = _get_raw_data(data_rows[index])
-
+                # matched cik, get all before and after (there can be multiple)
+                first = mid
+                while first > 0 and _get_raw_data(data_rows[first-1])[0] == cik:
+                    first -= 1
+                last = mid + 1
+                while last < len(data_rows) and _get_raw_data(data_rows[last])[0] == cik:
+                    last += 1
+
+                for row in data_rows[first:last]:
+                    _add_filing_info(filing_infos, _get_raw_data(row), forms)
                 break
 
             elif data[0] < cik:
                 start = mid + 1
             else:
-                end = mid - 1
+                end = mid
     else:
         # go through all
         for row in data_rows:
@@ -269,6 +737,37 @@ def _get_filing_info(cik='', forms=[], year='', quarter=''):
 
 
 
+def _parse_filing_info_batch(text, ciks, forms=[]):
+    '''
+    Return a dict of {cik: List of FilingInfo} from the text of a master.idx
+    (see get_filing_info_batch)
+
+    The ciks of the rows are sorted (as numbers) once, and each company's
+    rows are found with a binary search (searchsorted) of all of them at
+    once, so only the rows of the ciks are split and turned into FilingInfo
+    '''
+    data_rows = [row for row in text.split('\n')[MASTER_IDX_HEADER_ROWS:] if row.count('|') == 4]
+    row_ciks = np.fromiter((int(row[:row.index('|')]) for row in data_rows), dtype=np.int64, count=len(data_rows))
+    # stable, so each company's rows stay in the order of master.idx
+    order = np.argsort(row_ciks, kind='stable')
+    sorted_ciks = row_ciks[order]
+
+    # ciks can be given with leading zeros, e.g. 0000320193
+    wanted = np.array([int(cik) for cik in ciks], dtype=np.int64)
+    starts = np.searchsorted(sorted_ciks, wanted, side='left')
+    ends = np.searchsorted(sorted_ciks, wanted, side='right')
+
+    filing_infos = {}
+    for cik, start, end in zip(ciks, starts, ends):
+        cik_filing_infos = filing_infos[cik] = []
+        for i in order[start:end]:
+            data = data_rows[i].split('|')
+            if forms == [] or data[2] in forms:
+                cik_filing_infos.append(FilingInfo(data[1], data[2], data[0], data[3], data[4].strip()))
+    return filing_infos
+
+
+
 def get_financial_filing_info(period, cik, year='', quarter=''):
     if period not in FINANCIAL_FORM_MAP:
         raise KeyError('period must be either "annual" or "quarterly"')
@@ -278,6 +777,18 @@ def get_financial_filing_info(period, cik, year='', quarter=''):
 
 
 
+async def async_get_financial_filing_info(period, cik, year='', quarter=''):
+    '''
+    Coroutine version of get_financial_filing_info
+    '''
+    if period not in FINANCIAL_FORM_MAP:
+        raise KeyError('period must be either "annual" or "quarterly"')
+
+    forms = FINANCIAL_FORM_MAP[period]
+    return await async_get_filing_info(cik=cik, forms=forms, year=year, quarter=quarter)
+
+
+
 ########## Exceptions ##########
 class InvalidInputException(Exception):
     pass
\ No newline at end of file
@@ -0,0 +1,111 @@
+'''
+Local stand-in for www.sec.gov, serving a mirror of EDGAR from a directory,
+e.g. one recorded with edgar.requests_wrapper.RecordingAdapter:
+
+    <directory>/Archives/edgar/full-index/2016/QTR1/master.idx
+    <directory>/Archives/edgar/data/320193/0001193125-16-439878.txt
+
+so the whole pipeline (Stock -> Filing -> FinancialReport) can be run and
+load tested without the network, e.g.
+
+    with FakeEdgarServer('fixtures') as server:
+        configure(transport=RewriteHostAdapter(server.url))
+        Stock('AAPL').get_filing('quarterly', 2016, 1).get_statements()
+
+It can also be run on its own:
+    python -m edgar.fake_edgar <directory> [port]
+'''
+import functools
+import sys
+import threading
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+
+DEFAULT_HOST = '127.0.0.1'
+
+
+
+class FakeEdgarHandler(SimpleHTTPRequestHandler):
+    '''
+    Serves the files of the mirror, with keep-alive like www.sec.gov
+    '''
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+
+class FakeEdgarServer(ThreadingMixIn, HTTPServer):
+    '''
+    Threaded HTTP server of a mirror of EDGAR in directory, which runs in the
+    background while used as a context manager (or between start and stop)
+    '''
+    daemon_threads = True
+
+    def __init__(self, directory, host=DEFAULT_HOST, port=0, verbose=False):
+        '''
+        :param directory: root of the mirror, which has the Archives directory
+        :param port: port to listen on, 0 for any free one
+        :param verbose: log each request to stderr
+        '''
+        self.directory = directory
+        self.verbose = verbose
+        self.thread = None
+        handler = functools.partial(FakeEdgarHandler, directory=directory)
+        super().__init__((host, port), handler)
+
+
+    @property
+    def url(self):
+        '''
+        e.g. http://127.0.0.1:8000, to use in place of https://www.sec.gov
+        '''
+        host, port = self.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+
+def main(argv):
+    if len(argv) < 2:
+        print('usage: python -m edgar.fake_edgar <directory> [port]')
+        return 1
+    port = int(argv[2]) if len(argv) > 2 else 8000
+    server = FakeEdgarServer(argv[1], port=port, verbose=True)
+    print('serving {} at {}'.format(argv[1], server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1,16 +1,35 @@
 '''
 Logic related to the handling of filings and documents
 '''
-from edgar.requests_wrapper import GetRequest
+from edgar.requests_wrapper import GetRequest, async_get
 from edgar.document import Document
-from edgar.sgml import Sgml
+from edgar.sgml import Sgml, SgmlStream
 from edgar.dtd import DTD
-from edgar.financials import get_financial_report
+from edgar.sec_header import SecHeader
+from edgar.financials import get_financial_report, FinancialStatements
+from edgar.xbrl import XbrlInstance, parse_presentation, parse_labels, get_xbrl_financial_report
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import asyncio
+import fnmatch
+import time
 
 
 FILING_SUMMARY_FILE = 'FilingSummary.xml'
 
+# include patterns that cover what's needed for financial statements
+FINANCIAL_DOCUMENTS = [FILING_SUMMARY_FILE, 'R[0-9]*.htm', 'R[0-9]*.xml']
+
+# include patterns that cover what's needed for financial statements from XBRL
+# (*_htm.xml is the instance extracted from inline XBRL)
+XBRL_DOCUMENTS = [FILING_SUMMARY_FILE, 'EX-101.INS', 'EX-101.PRE', 'EX-101.LAB', '*_htm.xml']
+
+# where financial statements can be read from: R pages or XBRL
+STATEMENT_SOURCES = ['html', 'xbrl']
+
+# size of the chunks read from the network when streaming a filing
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 
 class Statements:
@@ -49,44 +68,374 @@ class Statements:
 
     all_statements = income_statements + balance_sheets + cash_flows
 
+    # {attribute of FinancialStatements:short names}
+    core_statements = {
+        'income_statements': income_statements,
+        'balance_sheets': balance_sheets,
+        'cash_flows': cash_flows,
+    }
+
+
+
+class FilingSummaryReport:
+    '''
+    Models a Report in a filing's FilingSummary.xml, which points to the
+    R page (HtmlFileName) that renders a statement, note, etc.
+    '''
+    def __init__(self, short_name, long_name, html_file_name, menu_category, role):
+        self.short_name = short_name
+        self.long_name = long_name
+        self.html_file_name = html_file_name
+        self.menu_category = menu_category
+        self.role = role
+
+    def __repr__(self):
+        return '[{0}, {1}, {2}, {3}]'.format(
+            self.short_name, self.html_file_name, self.menu_category, self.role)
+
 
 
 class Filing:
 
     STATEMENTS = Statements()
+    text = None
     sgml = None
+    sgml_stream = None
+    # streamed response, open until the filing has been read or closed
+    response = None
+    report_index = None
+    xbrl_instance = None
+    xbrl_presentation = None
+    xbrl_labels = None
 
 
-    def __init__(self, url, company=None):
+    def __init__(self, url, company=None, stream=False, include=None, text=None):
+        '''
+        :param url: url of the filing's sgml (.txt)
+        :param company: identifier for the company
+        :param stream: if True, documents are parsed as they are downloaded,
+            and only downloaded once they're needed (see iter_documents and
+            get_document), rather than downloading the whole filing up front.
+            Call close (or use the Filing as a context manager) when stopping
+            before the end of the filing.
+        :param include: list of patterns (e.g. FilingSummary.xml, R[0-9]*.htm,
+            EX-101.INS) matched case-sensitively against each document's
+            TYPE and FILENAME; documents matching none of them are skipped
+            without being parsed. None (default) includes all documents.
+            FINANCIAL_DOCUMENTS covers the financial statements, and
+            XBRL_DOCUMENTS covers them when read from XBRL.
+        :param text: the filing's sgml, if it has already been downloaded
+            (e.g. by fetch), in which case url isn't requested
+        '''
         self.url = url
         # made this company instead of symbol since not all edgar companies are publicly traded
         self.company = company
+        self.include = include
 
-        response = GetRequest(url).response
-        text = response.text
-        
-        self.text = text
-
-        print('Processing SGML at '+url)
-        
         dtd = DTD()
-        sgml = Sgml(text, dtd)
-
-        self.sgml = sgml
+        document_filter = _get_document_filter(include)
 
         # {filename:Document}
         self.documents = {}
-        for document_raw in sgml.map[dtd.sec_document.tag][dtd.document.tag]:
-            document = Document(document_raw)
-            self.documents[document.filename] = document
+
+        if stream:
+            response = self.response = GetRequest(url, stream=True).response
+
+            print('Streaming SGML at '+url)
+
+            self.sgml_stream = SgmlStream(response.iter_content(STREAM_CHUNK_SIZE, decode_unicode=True), dtd, lazy=True, document_filter=document_filter)
+            sec_header = self.sgml_stream.read_header()
+            self.header = SecHeader(self.sgml_stream.header_text)
+        else:
+            if text is None:
+                response = GetRequest(url).response
+                text = response.text
+            
+            self.text = text
+
+            print('Processing SGML at '+url)
+            
+            # documents refer to their text in self.text rather than copying it
+            sgml = Sgml(text, dtd, lazy=True, document_filter=document_filter)
+
+            self.sgml = sgml
+
+            for document_raw in sgml.map[dtd.sec_document.tag].get(dtd.document.tag, []):
+                document = Document(document_raw)
+                self.documents[document.filename] = document
         
-        acceptance_datetime_element = sgml.map[dtd.sec_document.tag][dtd.sec_header.tag][dtd.acceptance_datetime.tag]
+            sec_header = sgml.map[dtd.sec_document.tag][dtd.sec_header.tag]
+            header_start = text.find(dtd.sec_header.tag)
+            header_end = text.find(dtd.sec_header.get_end_tag_string(), header_start)
+            self.header = SecHeader(text[header_start:header_end])
+
+        acceptance_datetime_element = sec_header[dtd.acceptance_datetime.tag]
         acceptance_datetime_text = acceptance_datetime_element[:8] # YYYYMMDDhhmmss, the rest is junk
         # not concerned with time/timezones
         self.date_filed = datetime.strptime(acceptance_datetime_text, '%Y%m%d')
 
 
 
+    @classmethod
+    async def fetch(cls, url, company=None, include=None, executor=None):
+        '''
+        Coroutine that returns the Filing at url, downloading it without
+        blocking the event loop (see edgar.requests_wrapper.AsyncClient), so
+        that many filings can be downloaded concurrently, e.g.
+            filings = await asyncio.gather(*[Filing.fetch(url) for url in urls])
+
+        :param executor: concurrent.futures.Executor the filing is parsed in,
+            defaults to the event loop's default executor
+        (see the constructor for the rest)
+        '''
+        response = await async_get(url)
+        loop = asyncio.get_running_loop()
+        # decoding and parsing the text can take a while, so it's done outside the event loop
+        return await loop.run_in_executor(executor,
+            lambda: cls(url, company=company, include=include, text=response.text))
+
+
+
+    def iter_documents(self, keep=True):
+        '''
+        Yields the Documents of the filing in order. When streaming, each
+        Document is yielded as soon as it has been downloaded, so the caller
+        can stop early once it has what it needs.
+
+        :param keep: if False, streamed Documents aren't kept in self.documents,
+            so only the Document being read is held in memory
+        '''
+        # documents already read
+        for document in list(self.documents.values()):
+            yield document
+
+        for document in self._read_documents(keep):
+            yield document
+
+
+
+    def get_document(self, filename):
+        '''
+        Returns the Document with the given filename, or None if the filing
+        doesn't have it. When streaming, only reads as far as that Document.
+        '''
+        if filename in self.documents:
+            return self.documents[filename]
+
+        for document in self._read_documents(True):
+            if document.filename == filename:
+                return document
+
+        return None
+
+
+
+    def _read_documents(self, keep):
+        '''
+        Yields the Documents that have not been read from the stream yet
+        (nothing if the filing isn't being streamed)
+        '''
+        if self.sgml_stream is None:
+            return
+
+        for document_raw in self.sgml_stream:
+            document = Document(document_raw)
+            if keep:
+                self.documents[document.filename] = document
+            yield document
+
+        # all of it has been read, so the connection can go back to the pool
+        self.close()
+
+
+
+    def close(self):
+        '''
+        Closes the streamed response (if any), e.g. when stopping before the
+        end of the filing, so its connection isn't held until garbage collection
+        '''
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+
+
+
+    def __enter__(self):
+        return self
+
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+
+    def get_statements(self, parallel=False, max_workers=None, source='html'):
+        '''
+        Returns FinancialStatements with the income statements, balance sheets,
+        and cash flows of the filing (None for any that can't be found), finding
+        all of them in one pass over the FilingSummary.xml reports and parsing
+        each R page once. FinancialStatements.timings has the seconds spent
+        in each stage.
+
+        :param parallel: if True, R pages are parsed in separate processes
+            (parsing is CPU bound, so threads wouldn't speed it up); only
+            worth it for filings with several large statements
+        :param max_workers: max number of processes used if parallel
+        :param source: 'html' to parse the R pages, or 'xbrl' to read the
+            statements from the XBRL instance (see edgar.xbrl), which is
+            faster and gives exact values
+        '''
+        if source not in STATEMENT_SOURCES:
+            raise FilingException('{} is not a supported source, use one of {}'.format(source, STATEMENT_SOURCES))
+
+        timings = {}
+
+        start = time.perf_counter()
+        report_index = self.get_report_index()
+        timings['report_index'] = time.perf_counter() - start
+
+        # {attribute:FilingSummaryReport}
+        start = time.perf_counter()
+        statement_reports = self._find_statement_reports(report_index or {})
+        timings['lookup'] = time.perf_counter() - start
+
+        for attribute, names in self.STATEMENTS.core_statements.items():
+            if attribute not in statement_reports:
+                print('could not find {} for any ShortName in {}'.format(attribute, names))
+
+        if source == 'xbrl':
+            return self._get_xbrl_statements(statement_reports, timings)
+
+        statement_files = {attribute: report.html_file_name for attribute, report in statement_reports.items()}
+
+        start = time.perf_counter()
+        # {filename:html}, so that each R page is only read (and parsed) once
+        financial_html_texts = {}
+        for attribute, filename in list(statement_files.items()):
+            if filename not in financial_html_texts:
+                print('Getting financial data for {}'.format(filename))
+                document = self.get_document(filename)
+                if document is None:
+                    # e.g. left out by include
+                    print('could not find {} for {} in the filing'.format(filename, attribute))
+                    del statement_files[attribute]
+                    continue
+                financial_html_texts[filename] = document.doc_text.data
+        timings['documents'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if parallel:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                timed_reports = dict(zip(financial_html_texts,
+                    executor.map(_get_timed_financial_report, [self.company] * len(financial_html_texts),
+                        [self.date_filed] * len(financial_html_texts), financial_html_texts.values())))
+        else:
+            timed_reports = {filename: _get_timed_financial_report(self.company, self.date_filed, financial_html_text)
+                for filename, financial_html_text in financial_html_texts.items()}
+        timings['parsing'] = time.perf_counter() - start
+
+        statements = FinancialStatements(timings=timings)
+        for attribute, filename in statement_files.items():
+            financial_report, seconds = timed_reports[filename]
+            setattr(statements, attribute, financial_report)
+            timings[attribute] = seconds
+
+        return statements
+
+
+
+    def _get_xbrl_statements(self, statement_reports, timings):
+        '''
+        Returns FinancialStatements of the statement_reports
+        ({attribute:FilingSummaryReport}) read from the XBRL of the filing,
+        picking the concepts of each statement by its Role
+        '''
+        start = time.perf_counter()
+        xbrl_texts = self._get_xbrl_texts() if self.xbrl_instance is None else {}
+        timings['documents'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if self.xbrl_instance is None and 'instance' in xbrl_texts:
+            self.xbrl_instance = XbrlInstance.parse(xbrl_texts['instance'])
+            self.xbrl_presentation = parse_presentation(xbrl_texts['presentation']) \
+                if 'presentation' in xbrl_texts else {}
+            self.xbrl_labels = parse_labels(xbrl_texts['labels']) if 'labels' in xbrl_texts else {}
+        timings['parsing'] = time.perf_counter() - start
+
+        statements = FinancialStatements(timings=timings)
+        if self.xbrl_instance is None:
+            print('No XBRL instance in this filing')
+            return statements
+
+        for attribute, report in statement_reports.items():
+            start = time.perf_counter()
+            concepts = self.xbrl_presentation.get(report.role)
+            if concepts is None:
+                print('could not find the XBRL presentation of {} (role {})'.format(report.short_name, report.role))
+                continue
+            setattr(statements, attribute, get_xbrl_financial_report(
+                self.company, self.date_filed, self.xbrl_instance, concepts, self.xbrl_labels))
+            timings[attribute] = time.perf_counter() - start
+
+        return statements
+
+
+
+    def _get_xbrl_texts(self):
+        '''
+        Returns {'instance', 'presentation', 'labels':xml} of the XBRL
+        documents the filing has
+        '''
+        xbrl_texts = {}
+        for document in self.iter_documents():
+            doc_type = document.type.upper()
+            filename = (document.filename or '').lower()
+            if doc_type == 'EX-101.INS' or (filename.endswith('_htm.xml') and 'instance' not in xbrl_texts):
+                kind = 'instance'
+            elif doc_type == 'EX-101.PRE':
+                kind = 'presentation'
+            elif doc_type == 'EX-101.LAB':
+                kind = 'labels'
+            else:
+                continue
+
+            doc_text = document.doc_text
+            text = doc_text.xbrl or doc_text.xml_text
+            if text is None and isinstance(doc_text.data, str):
+                text = doc_text.data
+            if text is not None:
+                xbrl_texts[kind] = text
+
+        return xbrl_texts
+
+
+
+    def _find_statement_reports(self, report_index):
+        '''
+        Returns {attribute of FinancialStatements:FilingSummaryReport} of the
+        core statements found in report_index, in one pass over it. Where a
+        statement matches several short names, the first in Statements wins
+        (same as _get_statement).
+        '''
+        # {short name:(attribute, priority)}
+        candidates = {}
+        for attribute, names in self.STATEMENTS.core_statements.items():
+            for priority, name in enumerate(names):
+                candidates.setdefault(name.lower(), (attribute, priority))
+
+        # {attribute:(priority, filename)}
+        best = {}
+        for short_name, report in report_index.items():
+            if short_name in candidates:
+                attribute, priority = candidates[short_name]
+                if attribute not in best or priority < best[attribute][0]:
+                    best[attribute] = (priority, report)
+
+        return {attribute: report for attribute, (priority, report) in best.items()}
+
+
+
     def get_financial_data(self):
         '''
         This is mostly just for easy QA to return all financial statements
@@ -108,7 +457,7 @@ class Filing:
             filename = names[1]
             print('Getting financial data for {0} (filename: {1})'
                 .format(short_name, filename))
-            financial_html_text = self.documents[filename].doc_text.data
+            financial_html_text = self.get_document(filename).doc_text.data
 
             financial_report = get_financial_report(self.company, self.date_filed, financial_html_text)
 
@@ -128,14 +477,15 @@ class Filing:
         '''
         statement_names = []
 
-        if FILING_SUMMARY_FILE in self.documents:
-            filing_summary_doc = self.documents[FILING_SUMMARY_FILE]
-            filing_summary_xml = filing_summary_doc.doc_text.xml
+        report_index = self.get_report_index()
 
+        if report_index is not None:
             for short_name in statement_short_names:
-                filename = self.get_html_file_name(filing_summary_xml, short_name)
-                if filename is not None:
-                    statement_names += [(short_name, filename)]
+                report = report_index.get(short_name.lower())
+                if report is not None:
+                    statement_names += [(short_name, report.html_file_name)]
+                else:
+                    print(f'could not find anything for ShortName {short_name.lower()}')
         else:
             print('No financial documents in this filing')
 
@@ -147,6 +497,53 @@ class Filing:
 
 
 
+    def get_report_index(self):
+        '''
+        Return the reports in FilingSummary.xml as a dict of
+        {lowercase ShortName:FilingSummaryReport}, or None if the filing has
+        no FilingSummary.xml. Only parsed the first time it's called.
+        '''
+        if self.report_index is None:
+            filing_summary_doc = self.get_document(FILING_SUMMARY_FILE)
+
+            if filing_summary_doc is not None:
+                self.report_index = self.build_report_index(filing_summary_doc.doc_text.xml)
+
+        return self.report_index
+
+
+
+    @staticmethod
+    def build_report_index(filing_summary_xml):
+        '''
+        Return a dict of {lowercase ShortName:FilingSummaryReport} for the
+        Reports in FilingSummary.xml (filing_summary_xml), walking it once.
+        If ShortNames repeat, the first Report is kept.
+        '''
+        report_index = {}
+
+        for report in filing_summary_xml.find_all('report'):
+            # {lowercase tag name:text} of the Report's elements
+            values = {child.name: child.get_text() for child in report.find_all(recursive=False)}
+
+            if 'shortname' not in values:
+                print('The following report has no ShortName element')
+                print(report)
+                continue
+
+            report_index.setdefault(values['shortname'].lower(), FilingSummaryReport(
+                values['shortname'],
+                values.get('longname'),
+                # older filings have R pages in xml rather than html
+                values.get('htmlfilename', values.get('xmlfilename')),
+                values.get('menucategory'),
+                values.get('role')
+            ))
+
+        return report_index
+
+
+
     @staticmethod
     def get_html_file_name(filing_summary_xml, report_short_name):
         '''
@@ -155,30 +552,64 @@ class Filing:
         e.g.
              report_short_name of consolidated statements of income matches
              CONSOLIDATED STATEMENTS OF INCOME
+
+        To look up more than one Report, use build_report_index (or
+        Filing.get_report_index) rather than walking filing_summary_xml each time
         '''
-        reports = filing_summary_xml.find_all('report')
-        for report in reports:
-            short_name = report.find('shortname')
-            if short_name is None:
-                print('The following report has no ShortName element')
-                print(report)
-                continue
-            # otherwise, get the text and keep procesing
-            short_name = short_name.get_text().lower()
-            # we want to make sure it matches, up until the end of the text
-            if short_name == report_short_name.lower():
-                filename = report.find('htmlfilename').get_text()
-                return filename
-        print(f'could not find anything for ShortName {report_short_name.lower()}')
-        return None
+        report = Filing.build_report_index(filing_summary_xml).get(report_short_name.lower())
+        if report is None:
+            print(f'could not find anything for ShortName {report_short_name.lower()}')
+            return None
+        return report.html_file_name
 
 
 
-    def get_income_statements(self):
+    def get_income_statements(self, source='html'):
+        if source == 'xbrl':
+            return self.get_statements(source=source).income_statements
         return self._get_financial_data(self.STATEMENTS.income_statements, False)
 
-    def get_balance_sheets(self):
+    def get_balance_sheets(self, source='html'):
+        if source == 'xbrl':
+            return self.get_statements(source=source).balance_sheets
         return self._get_financial_data(self.STATEMENTS.balance_sheets, False)
 
-    def get_cash_flows(self):
-        return self._get_financial_data(self.STATEMENTS.cash_flows, False)
\ No newline at end of file
+    def get_cash_flows(self, source='html'):
+        if source == 'xbrl':
+            return self.get_statements(source=source).cash_flows
+        return self._get_financial_data(self.STATEMENTS.cash_flows, False)
+
+
+
+def _get_timed_financial_report(company, date_filed, financial_html_text):
+    '''
+    Returns the FinancialReport of an R page and the seconds spent parsing it
+    (module level, so that it can run in a ProcessPoolExecutor)
+    '''
+    start = time.perf_counter()
+    financial_report = get_financial_report(company, date_filed, financial_html_text)
+    return financial_report, time.perf_counter() - start
+
+
+
+def _get_document_filter(include):
+    '''
+    Returns a document_filter (see edgar.sgml.Sgml) for the patterns in include,
+    or None if include is None
+    '''
+    if include is None:
+        return None
+
+    patterns = list(include)
+
+    # case-sensitive, so that e.g. R[0-9]*.htm doesn't match rmd-20190331x10q.htm
+    def document_filter(doc_type, filename):
+        values = [value for value in (doc_type, filename) if value is not None]
+        return any(fnmatch.fnmatchcase(value, pattern) for value in values for pattern in patterns)
+
+    return document_filter
+
+
+
+class FilingException(Exception):
+    pass
@@ -3,28 +3,48 @@ Handles financial logic
 '''
 import re
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from json import JSONEncoder
 from datetime import datetime
+import numpy as np
+import pandas as pd
+import sys
 
 class FinancialReportEncoder(JSONEncoder):
         
     def default(self, o):
         if isinstance(o, datetime):
             return o.isoformat()
+        if hasattr(o, 'json_attributes'):
+            # e.g. FilingInfo, whose url is a property rather than an attribute
+            return {name: getattr(o, name) for name in o.json_attributes}
+        if hasattr(o, '__slots__'):
+            return _get_slots_dict(o)
         return o.__dict__
 
 
 
+def _get_slots_dict(o):
+    '''
+    Returns a dict of the attributes of o, which has __slots__ instead of a __dict__
+    '''
+    return {slot: getattr(o, slot) for slot in o.__slots__}
+
+
+
 class FinancialElement:
     '''
     Models financial elements
     '''
+    # there can be millions of these, so no __dict__
+    __slots__ = ('label', 'value')
+
     def __init__(self, label, value):
         self.label = label
         self.value = value
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(_get_slots_dict(self))
 
 
 
@@ -33,6 +53,8 @@ class FinancialInfo:
     Models financial data provided in a financial report
     financial elements are stored in a map to retain flexibility
     '''
+    __slots__ = ('date', 'months', 'map')
+
     def __init__(self, date, months, map):
         '''
         :param date: date of the information
@@ -44,7 +66,7 @@ class FinancialInfo:
         self.map = map
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(_get_slots_dict(self))
 
 
 
@@ -66,6 +88,126 @@ class FinancialReport:
     def add_financial_info(self, financial_info: FinancialInfo):
         self.reports.append(financial_info)
 
+    def to_columnar(self):
+        return ColumnarFinancialReport.from_report(self)
+
+    def to_frame(self):
+        '''
+        Returns a pandas DataFrame of the report (see ColumnarFinancialReport.to_frame)
+        '''
+        return self.to_columnar().to_frame()
+
+    def __repr__(self):
+        return str(self.__dict__)
+
+
+
+
+
+class ColumnarFinancialReport:
+    '''
+    Compact, columnar form of a FinancialReport, for holding many of them:
+    a period axis (dates, months), an axis of XBRL elements (with a label
+    each), and a 2-D array of values with a row per period and a column per
+    element (nan where a period has no value for an element)
+
+    Element names and labels are interned, so they're shared across reports.
+    '''
+    def __init__(self, company, date_filed, elements, labels, dates, months, values):
+        '''
+        :param elements: tuple of XBRL element names, e.g. us-gaap_Assets
+        :param labels: tuple of the label of each element
+        :param dates: numpy datetime64 array of the date of each period
+        :param months: numpy float array of the months each period covers
+            (nan if a snapshot, e.g. balance sheet)
+        :param values: numpy float array of shape (len(dates), len(elements))
+        '''
+        self.company = company
+        self.date_filed = date_filed
+        self.elements = elements
+        self.labels = labels
+        self.dates = dates
+        self.months = months
+        self.values = values
+
+    @classmethod
+    def from_report(cls, financial_report):
+        # {element:column}, in the order elements first appear
+        columns = {}
+        labels = []
+        for financial_info in financial_report.reports:
+            for xbrl_element, financial_element in financial_info.map.items():
+                if xbrl_element not in columns:
+                    columns[xbrl_element] = len(columns)
+                    labels.append(financial_element.label)
+
+        values = np.full((len(financial_report.reports), len(columns)), np.nan)
+        for row, financial_info in enumerate(financial_report.reports):
+            for xbrl_element, financial_element in financial_info.map.items():
+                if financial_element.value is not None:
+                    values[row, columns[xbrl_element]] = financial_element.value
+
+        return cls(
+            financial_report.company,
+            financial_report.date_filed,
+            tuple(sys.intern(xbrl_element) for xbrl_element in columns),
+            tuple(None if label is None else sys.intern(label) for label in labels),
+            np.array([financial_info.date for financial_info in financial_report.reports], dtype='datetime64[us]'),
+            np.array([np.nan if financial_info.months is None else financial_info.months
+                for financial_info in financial_report.reports], dtype=float),
+            values
+        )
+
+    def to_report(self):
+        '''
+        Returns the FinancialReport that this was made from
+        '''
+        reports = []
+        for row, date in enumerate(self.dates.astype(datetime)):
+            months = self.months[row]
+            financial_info = FinancialInfo(date, None if np.isnan(months) else int(months), {})
+            for column, value in enumerate(self.values[row].tolist()):
+                if not np.isnan(value):
+                    financial_info.map[self.elements[column]] = FinancialElement(self.labels[column], value)
+            reports.append(financial_info)
+
+        return FinancialReport(self.company, self.date_filed, reports)
+
+    def get_values(self, xbrl_element):
+        '''
+        Returns the values of xbrl_element for each period (a view, not a copy)
+        '''
+        return self.values[:, self.elements.index(xbrl_element)]
+
+    def to_frame(self):
+        '''
+        Returns a pandas DataFrame with a row per period, indexed by date and
+        months, and a column per XBRL element. The values aren't copied.
+        '''
+        index = pd.MultiIndex.from_arrays([self.dates, self.months], names=['date', 'months'])
+        return pd.DataFrame(self.values, index=index, columns=list(self.elements), copy=False)
+
+    def __repr__(self):
+        return '<ColumnarFinancialReport [{0}, {1}, {2} periods, {3} elements]>'.format(
+            self.company, self.date_filed, len(self.dates), len(self.elements))
+
+
+
+class FinancialStatements:
+    '''
+    Models the core financial statements of a filing, each a FinancialReport
+    (None if it couldn't be found)
+    '''
+    def __init__(self, income_statements=None, balance_sheets=None, cash_flows=None, timings=None):
+        '''
+        :param timings: dict of the seconds spent in each stage of getting
+            the statements, e.g. {'report_index': 0.01, 'parsing': 0.2, ...}
+        '''
+        self.income_statements = income_statements
+        self.balance_sheets = balance_sheets
+        self.cash_flows = cash_flows
+        self.timings = timings if timings is not None else {}
+
     def __repr__(self):
         return str(self.__dict__)
 
@@ -138,27 +280,39 @@ def _process_financial_info(financial_html_text):
     :param financial_html_text: html-structured financial data from an annual
         or quarterly Edgar filing
     '''
-    source_soup = BeautifulSoup(financial_html_text, 'html.parser')
-    report = source_soup.find('table', {'class':'report'})
-    rows = report.find_all('tr')
+    rows = _get_report_rows(financial_html_text)
+    return _process_report_rows(rows)
+
+
 
+def _process_report_rows(rows):
+    '''
+    Return a list of FinancialInfo objects from the rows of the report table
+    of an R page (see _get_report_rows)
+    '''
     financial_info = []
 
     dates, period_units, unit_text = _get_statement_meta_data(rows)
+    # the units are the same for the whole table
+    unit_scales = _get_unit_scales(unit_text)
+
+    # cells with financial values as (index, xbrl_element, label, text),
+    # parsed together once the whole table has been read
+    value_cells = []
 
     for i, date in enumerate(dates):
         dt = datetime.strptime(date, '%b. %d, %Y')
         financial_info.append(FinancialInfo(dt, period_units[i], {}))
 
     for row_num, row in enumerate(rows):
-        data = row.find_all('td')
+        data = [cell for cell in row if cell.name == 'td']
 
         xbrl_element = None
         label = None
         numeric_data_available = False
 
         for index, info in enumerate(data):
-            info_text = info.get_text().strip()
+            info_text = info.text.strip()
 
             class_list = None
             try:
@@ -169,8 +323,6 @@ def _process_financial_info(financial_html_text):
                 # print(info)
                 continue
 
-            processed_financial_value = None
-
             if 'pl' in class_list:
                 # pl class indicates the td is the financial label
                 xbrl_element = _process_xbrl_element(info)
@@ -180,26 +332,30 @@ def _process_financial_info(financial_html_text):
             elif 'nump' in class_list or 'num' in class_list:
                 # nump class indicates td, and so more generally, the row, has numeric data
                 numeric_data_available = True
-                processed_financial_value = _process_financial_value(info_text, xbrl_element, unit_text)
+                value_cells.append((index, xbrl_element, label, info_text))
 
             elif 'text' in class_list:
                 if numeric_data_available:
                     # this corner case occurs when a given element appears sparsely (e.g. not collected in every period)
-                    processed_financial_value = _process_financial_value(info_text, xbrl_element, unit_text)
+                    value_cells.append((index, xbrl_element, label, info_text))
                 # else:
                 # 	# super label (abstract - no financial data)
                 # 	print(xbrl_element)
 
-            if processed_financial_value is not None:
-                # print(index)
-                if index-1 not in range(len(financial_info)):
-                    print('index-1 {} is too big to capture {}'.format(index-1, processed_financial_value))
-                financial_info_map = financial_info[index-1].map
+    processed_financial_values = _process_financial_values(
+        [cell[3] for cell in value_cells], [cell[1] for cell in value_cells], unit_scales)
 
-                if xbrl_element not in financial_info_map:
-                    # handles adjustment details
-                    # e.g. https://www.sec.gov/Archives/edgar/data/867773/0000867773-18-000082.txt
-                    financial_info_map[xbrl_element] = FinancialElement(label, processed_financial_value)
+    for (index, xbrl_element, label, info_text), processed_financial_value in zip(value_cells, processed_financial_values):
+        if processed_financial_value is not None:
+            # print(index)
+            if index-1 not in range(len(financial_info)):
+                print('index-1 {} is too big to capture {}'.format(index-1, processed_financial_value))
+            financial_info_map = financial_info[index-1].map
+
+            if xbrl_element not in financial_info_map:
+                # handles adjustment details
+                # e.g. https://www.sec.gov/Archives/edgar/data/867773/0000867773-18-000082.txt
+                financial_info_map[xbrl_element] = FinancialElement(label, processed_financial_value)
 
 
     # clean reports
@@ -212,10 +368,210 @@ def _process_financial_info(financial_html_text):
 
 
 
+# whitespace that BeautifulSoup collapses when it's all that's between tags
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+
+class ReportCell:
+    '''
+    Models a td or th of the report table of an R page, keeping only what
+    the financial data is parsed from (rather than the whole html tree)
+    '''
+    __slots__ = ('name', 'attrs', 'text_parts', 'div_strings', 'anchor_attrs', '_div_depth')
+
+    def __init__(self, name, attrs):
+        '''
+        :param name: td or th
+        :param attrs: dict of the cell's html attributes, with class as a list
+        '''
+        self.name = name
+        self.attrs = attrs
+        # all of the text within the cell
+        self.text_parts = []
+        # stripped (non-empty) text within the cell's first div, None if no div
+        self.div_strings = None
+        # attributes of the cell's first anchor, None if no anchor
+        self.anchor_attrs = None
+        # > 0 while in the first div
+        self._div_depth = 0
+
+    @property
+    def text(self):
+        return ''.join(self.text_parts)
+
+    def __repr__(self):
+        return '<{0} {1}>{2}</{0}>'.format(self.name, self.attrs, self.text)
+
+
+
+class ReportTableParser(HTMLParser):
+    '''
+    Event-based parser of the first table with class "report" in an R page.
+    rows is the list of the table's rows (tr, including those of nested
+    tables), each a list of the ReportCells (td and th) within it, in order.
+    '''
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        # number of open tables, counting the report table (0 if not in it)
+        self._table_depth = 0
+        self._done = False
+        self._open_rows = []
+        self._open_cells = []
+        # text since the last tag, which can come in more than one piece
+        self._pending_data = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        if self._done:
+            return
+
+        if tag == 'table':
+            if self._table_depth > 0:
+                self._table_depth += 1
+            elif 'report' in _get_attrs(attrs).get('class', []):
+                self._table_depth = 1
+            return
+
+        if self._table_depth == 0:
+            return
+
+        if tag == 'tr':
+            row = []
+            self.rows.append(row)
+            self._open_rows.append(row)
+        elif tag == 'td' or tag == 'th':
+            cell = ReportCell(tag, _get_attrs(attrs))
+            # cells belong to every row they're in (same as find_all)
+            for row in self._open_rows:
+                row.append(cell)
+            self._open_cells.append(cell)
+        elif tag == 'div':
+            for cell in self._open_cells:
+                if cell._div_depth > 0:
+                    cell._div_depth += 1
+                elif cell.div_strings is None:
+                    cell.div_strings = []
+                    cell._div_depth = 1
+        elif tag == 'a':
+            for cell in self._open_cells:
+                if cell.anchor_attrs is None:
+                    cell.anchor_attrs = _get_attrs(attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        # e.g. <div/>
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        if self._done or self._table_depth == 0:
+            return
+
+        if tag == 'table':
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._done = True
+        elif tag == 'tr':
+            if self._open_rows:
+                self._open_rows.pop()
+        elif tag == 'td' or tag == 'th':
+            if self._open_cells:
+                self._open_cells.pop()
+        elif tag == 'div':
+            for cell in self._open_cells:
+                if cell._div_depth > 0:
+                    cell._div_depth -= 1
+
+    def handle_data(self, data):
+        if self._open_cells:
+            self._pending_data.append(data)
+
+    def handle_comment(self, data):
+        # comments aren't text, but do split it
+        self._flush_data()
+
+    def close(self):
+        super().close()
+        self._flush_data()
+
+    def _flush_data(self):
+        '''
+        Adds the text since the last tag to the open cells
+        '''
+        if not self._pending_data:
+            return
+
+        data = ''.join(self._pending_data)
+        self._pending_data = []
+
+        if data.strip(ASCII_SPACES) == '':
+            # same as BeautifulSoup, which collapses whitespace between tags
+            data = '\n' if '\n' in data else ' '
+
+        stripped = data.strip()
+        for cell in self._open_cells:
+            cell.text_parts.append(data)
+            if cell._div_depth > 0 and stripped:
+                cell.div_strings.append(stripped)
+
+
+
+def _get_attrs(attrs):
+    '''
+    Returns a dict of html attributes from HTMLParser's list of (name, value),
+    splitting class into a list (same as BeautifulSoup)
+    '''
+    attrs_map = dict(attrs)
+    if 'class' in attrs_map:
+        attrs_map['class'] = (attrs_map['class'] or '').split()
+    return attrs_map
+
+
+
+def _get_report_rows(financial_html_text):
+    '''
+    Returns the rows of the report table of an R page (see ReportTableParser)
+    '''
+    parser = ReportTableParser()
+    parser.feed(financial_html_text)
+    parser.close()
+    return parser.rows
+
+
+
+def _get_report_rows_soup(financial_html_text):
+    '''
+    Same as _get_report_rows, but using a BeautifulSoup tree (much slower);
+    kept as the reference the event-based parser is checked against
+    '''
+    source_soup = BeautifulSoup(financial_html_text, 'html.parser')
+    report = source_soup.find('table', {'class':'report'})
+
+    rows = []
+    for tr in report.find_all('tr'):
+        row = []
+        for info in tr.find_all(['td', 'th']):
+            cell = ReportCell(info.name, dict(info.attrs))
+            cell.text_parts.append(info.get_text())
+            div = info.find('div')
+            if div is not None:
+                cell.div_strings = list(div.stripped_strings)
+            anchor = info.find('a')
+            if anchor is not None:
+                cell.anchor_attrs = dict(anchor.attrs)
+            row.append(cell)
+        rows.append(row)
+
+    return rows
+
+
+
 def _get_statement_meta_data(rows):
     '''
-    Returns the dates, period_units, unit_text given the html table rows of a
-    financial statement filing
+    Returns the dates, period_units, unit_text given the rows of the report
+    table of a financial statement filing (see _get_report_rows)
 
     :return: tuple of:
         dates - list of the different dates of the filing,
@@ -233,11 +589,11 @@ def _get_statement_meta_data(rows):
     # all the meta data we need is in the first two tables rows
     for row_num, row in enumerate(rows[:2]):
         # meta data comes from the table headers
-        data = row.find_all('th')
+        data = [cell for cell in row if cell.name == 'th']
 
 
         for index, info in enumerate(data):
-            info_text = info.get_text().replace('\n', '')
+            info_text = info.text.replace('\n', '')
 
             class_list = info.attrs['class']
             
@@ -250,7 +606,7 @@ def _get_statement_meta_data(rows):
                     # so that we can determine our table structure
                     title_repeat = 0 if 'colspan' not in info.attrs or int(info.attrs['colspan']) == 1 else int(info.attrs['colspan']) - 1
                     # first th with tl class has title and unit specification
-                    info_list = info.find('div').get_text('|', strip=True).split('|')
+                    info_list = '|'.join(info.div_strings).split('|')
                     # e.g. shares in Thousands, $ in Millions
                     unit_text = info_list[1]
                     # e.g. CONSOLIDATED STATEMENTS OF INCOME - USD ($)
@@ -307,18 +663,18 @@ def _process_period(info_text):
 
 def _process_xbrl_element(info):
     '''
-    Returns the name of the XBRL element in info (html BeautifulSoup).
+    Returns the name of the XBRL element in info (ReportCell).
     Leaving "us-gaap_" prefix in so it's contains both the namespace
     and elementName of the XBRL (in case it's not always us-gaap)
 
-    :param info: must be an html element with an anchor child that has an
+    :param info: must be a cell with an anchor child that has an
         onclick attribute of the form: 
         onclick="top.Show.showAR( this, 'defref_<xbrl_name>', window );"
     :return: <xbrl_name>
     '''
     # us-gaap namespace element is in the onclick of the anchor tag
-    anchor = info.find('a')
-    onclick_attr = anchor.attrs['onclick']
+    anchor = info.anchor_attrs
+    onclick_attr = anchor['onclick']
     # strip javascript
     xbrl_element = onclick_attr.replace(
         'top.Show.showAR( this, \'defref_', ''
@@ -328,40 +684,107 @@ def _process_xbrl_element(info):
 
 
 
-def _process_financial_value(text, xbrl_element, unit_text):
+# strips everything but the amount from a financial value
+NON_NUMERIC_REGEX = re.compile('[^0-9\\.]')
+
+# {x in "x in y" of unit_text:kind of value}
+UNIT_KINDS = {'shares': 'shares', '$': 'dollars'}
+# {y in "x in y" of unit_text:scale}, checked in order
+UNIT_SCALES = [('billions', 1000000000), ('millions', 1000000), ('thousands', 1000)]
+
+
+
+def _get_unit_scales(unit_text):
     '''
-    Returns float representation of text after stripping special characters
+    Returns a dict of what values of each kind (shares, dollars, per_share)
+    are multiplied by, given the unit_text of a financial statement
 
-    :param text: the monetary value, which if in brackets, is negative
-    :param xbrl_element: text of html element that contains xbrl info
-        for the value of the text (i.e. the context)
     :param unit_text: text of the form "x in y" where
         x is either "shares" or "$"
         y is either "thousands", "millions", or "billions"
+        e.g. "shares in Thousands, $ in Millions"
     '''
-    is_negative = True if '(' in text else False
-    # strip special characters
-    amount_text = re.sub('[^0-9\\.]', '', text)
-    value = None
+    unit_scales = {'shares': 1, 'dollars': 1, 'per_share': 1}
+    unit_text = '' if unit_text is None else unit_text.lower()
+
+    for unit, kind in UNIT_KINDS.items():
+        for scale_text, scale in UNIT_SCALES:
+            if '{} in {}'.format(unit, scale_text) in unit_text:
+                unit_scales[kind] = scale
+                break
+
+    return unit_scales
+
+
+
+def _get_unit_kind(xbrl_element):
+    '''
+    Returns the kind of value (see _get_unit_scales) of an XBRL element
+    '''
+    if 'PerShare' in xbrl_element:
+        return 'per_share'
+    elif 'Shares' in xbrl_element:
+        return 'shares'
+    return 'dollars'
+
+
+
+def _process_financial_values(texts, xbrl_elements, unit_scales):
+    '''
+    Returns a list of the float representations of texts (None where a text
+    isn't numeric) after stripping special characters and applying units,
+    parsing them all in one step
+
+    :param texts: the monetary values, which if in brackets, are negative
+    :param xbrl_elements: the XBRL element of each text (i.e. the context)
+    :param unit_scales: see _get_unit_scales
+    '''
+    if len(texts) == 0:
+        return []
+
+    amount_texts = [NON_NUMERIC_REGEX.sub('', text) for text in texts]
+    signs = np.array([-1.0 if '(' in text else 1.0 for text in texts])
+
+    # {xbrl_element:scale}, since each row repeats its element
+    element_scales = {}
+    for xbrl_element in xbrl_elements:
+        if xbrl_element not in element_scales:
+            element_scales[xbrl_element] = unit_scales[_get_unit_kind(xbrl_element)]
+    scales = np.array([element_scales[xbrl_element] for xbrl_element in xbrl_elements], dtype=float)
 
     try:
-        amount = float(amount_text)
-        value = -amount if is_negative else amount
-
-        # handle units
-        if('PerShare' in xbrl_element):
-            value = value # no change
-        elif (('Shares' in xbrl_element and 'shares in billions' in unit_text.lower())
-            or ('Shares' not in xbrl_element and '$ in billions' in unit_text.lower())):
-            value = value * 1000000000
-        elif (('Shares' in xbrl_element and 'shares in millions' in unit_text.lower())
-            or ('Shares' not in xbrl_element and '$ in millions' in unit_text.lower())):
-            value = value * 1000000
-        elif (('Shares' in xbrl_element and 'shares in thousands' in unit_text.lower())
-            or ('Shares' not in xbrl_element and '$ in thousands' in unit_text.lower())):
-            value = value * 1000
+        amounts = np.array(amount_texts, dtype=float)
+    except ValueError:
+        # some aren't numeric (e.g. blank or a dash), find which
+        amounts = np.array([_get_amount(amount_text, text, xbrl_element)
+            for amount_text, text, xbrl_element in zip(amount_texts, texts, xbrl_elements)])
+
+    values = signs * amounts * scales
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
 
+
+def _get_amount(amount_text, text, xbrl_element):
+    '''
+    Returns amount_text as a float, or nan (with a warning) if it's not numeric
+    '''
+    try:
+        return float(amount_text)
     except ValueError:
         print('Warning: {} (from {}) is not numeric even after removing special characters () - ignoring'.format(text, xbrl_element, amount_text))
+        return np.nan
+
 
-    return value
\ No newline at end of file
+
+def _process_financial_value(text, xbrl_element, unit_text):
+    '''
+    Returns float representation of text after stripping special characters
+
+    :param text: the monetary value, which if in brackets, is negative
+    :param xbrl_element: text of html element that contains xbrl info
+        for the value of the text (i.e. the context)
+    :param unit_text: text of the form "x in y" where
+        x is either "shares" or "$"
+        y is either "thousands", "millions", or "billions"
+    '''
+    return _process_financial_values([text], [xbrl_element], _get_unit_scales(unit_text))[0]
\ No newline at end of file
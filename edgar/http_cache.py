@@ -0,0 +1,458 @@
+'''
+Disk cache of EDGAR responses, so that the same indexes and filings aren't
+downloaded again, e.g. when re-running a backtest
+
+Filings under /Archives/edgar/data/ never change once they're accepted, so
+they're cached for good. Everything else (e.g. the full-index master.idx of
+the current quarter, or index.json) can change, so it's revalidated with the
+server (If-None-Match/If-Modified-Since) each time, which costs a request
+but not the download when it hasn't changed.
+
+Bodies are stored zlib compressed, named by the sha256 of their content (so
+identical bodies are only stored once), and a small json file per url
+points to the body and keeps its validators. When the bodies go over
+max_size, the least recently used urls are evicted, by an index of the urls
+in order of use kept in memory (read from the url files' modification times
+once, the first time it's needed).
+
+Streamed responses are stored as they're read: the body is compressed into
+a temp file, which becomes the stored body once it's been read to the end
+(and is dropped if the response is closed before that). Cached bodies are
+served streamed the same way, decompressed as they're read.
+
+    objects/ab/ab12...ef.zz - body, named by its sha256
+    urls/34/34cd...01.json - {url, sha256, headers}, named by the sha256 of the url
+    tmp/ - bodies being written
+'''
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+# urls of content that never changes once it's there
+IMMUTABLE_URL_PATTERNS = [re.compile('/Archives/edgar/data/')]
+
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3 # bytes (compressed)
+
+# response headers kept with a body
+CACHED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Date']
+
+# bytes of compressed body read at a time when a cached body is streamed
+READ_CHUNK_SIZE = 64 * 1024
+
+
+
+class CacheEntry:
+    '''
+    Models a cached response
+    '''
+    __slots__ = ('url', 'sha256', 'headers', 'immutable', 'path')
+
+    def __init__(self, url, sha256, headers, immutable, path):
+        '''
+        :param sha256: hex digest of the body, which names its file
+        :param headers: dict of the CACHED_HEADERS the response had
+        :param immutable: True if the url never changes (see IMMUTABLE_URL_PATTERNS)
+        :param path: path of the entry's json file
+        '''
+        self.url = url
+        self.sha256 = sha256
+        self.headers = headers
+        self.immutable = immutable
+        self.path = path
+
+    def get_conditional_headers(self):
+        '''
+        Returns the headers for asking the server whether the entry has changed
+        '''
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def __repr__(self):
+        return '[{0}, {1}, {2}]'.format(self.url, self.sha256, 'immutable' if self.immutable else 'mutable')
+
+
+
+class HttpCache:
+    '''
+    Disk cache of responses, used by edgar.requests_wrapper.Client, e.g.
+        configure(cache=HttpCache('~/.edgar-cache'))
+
+    stats has the number of hits (served from disk), revalidated (served
+    from disk after the server said it hadn't changed), misses (downloaded),
+    stored and evicted
+    '''
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE, immutable_url_patterns=IMMUTABLE_URL_PATTERNS,
+            compression_level=6):
+        '''
+        :param directory: where the cache is kept, created if it doesn't exist
+        :param max_size: most bytes of (compressed) bodies kept
+        :param immutable_url_patterns: compiled regexes of urls that are never revalidated
+        :param compression_level: zlib level, 1 (fastest) to 9 (smallest)
+        '''
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+        self.immutable_url_patterns = immutable_url_patterns
+        self.compression_level = compression_level
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self.lock = threading.Lock()
+        # {url file path:sha256} from least to most recently used, {sha256:number
+        # of urls pointing to it} and total bytes of bodies, read when first needed
+        self._index = None
+        self._references = None
+        self._size = None
+
+        os.makedirs(os.path.join(self.directory, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, 'urls'), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, 'tmp'), exist_ok=True)
+
+
+    def is_immutable(self, url):
+        return any(pattern.search(url) for pattern in self.immutable_url_patterns)
+
+
+    def get_entry(self, url):
+        '''
+        Returns the CacheEntry of url, or None if it isn't cached
+        '''
+        path = self._get_url_path(url)
+        try:
+            with open(path, mode='r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get('url') != url or not os.path.exists(self._get_object_path(data['sha256'])):
+            return None
+        return CacheEntry(url, data['sha256'], data.get('headers', {}), self.is_immutable(url), path)
+
+
+    def get_response(self, entry, stream=False):
+        '''
+        Returns a requests.Response of a CacheEntry, marking it as recently
+        used, or None if its body can't be read (e.g. it's been evicted)
+
+        :param stream: if True, the body is decompressed as it's read from the
+            response (e.g. with iter_content) rather than up front
+        '''
+        object_path = self._get_object_path(entry.sha256)
+        try:
+            # the modification time keeps the order of use for the next run
+            os.utime(entry.path)
+            if stream:
+                raw = _DecompressingReader(open(object_path, mode='rb'))
+            else:
+                with open(object_path, mode='rb') as f:
+                    content = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+        with self.lock:
+            if self._index is not None and entry.path in self._index:
+                self._index.move_to_end(entry.path)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry.url
+        response.headers = CaseInsensitiveDict(entry.headers)
+        if stream:
+            response.raw = raw
+        else:
+            # the body has been read, so iter_content works from it
+            response._content = content
+            response._content_consumed = True
+        return response
+
+
+    def put(self, url, response):
+        '''
+        Stores the body of a (non-streamed) requests.Response of url
+        '''
+        content = response.content
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        temp_path = None
+        if not os.path.exists(self._get_object_path(sha256)):
+            temp_path = self._write_temp(zlib.compress(content, self.compression_level))
+        self._add(url, sha256, response.headers, temp_path)
+
+
+    def put_stream(self, url, response):
+        '''
+        Stores the body of a streamed requests.Response of url as it's read,
+        once it's been read to the end
+        '''
+        response.raw = _CachingReader(response.raw, self, url, response.headers)
+
+
+    def _add(self, url, sha256, headers, temp_path):
+        '''
+        Points url to the body named sha256, which is moved into place from
+        temp_path (compressed) unless it's already stored
+
+        :param temp_path: path of the compressed body, or None if it's stored
+        '''
+        object_path = self._get_object_path(sha256)
+        url_path = self._get_url_path(url)
+        headers = {name: headers[name] for name in CACHED_HEADERS if name in headers}
+        data = json.dumps({'url': url, 'sha256': sha256, 'headers': headers}).encode('utf-8')
+
+        # checked, written and counted at once, so a body stored by two threads is counted once
+        with self.lock:
+            self._load_index()
+            if temp_path is not None:
+                if os.path.exists(object_path):
+                    _remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    self._size += os.path.getsize(temp_path)
+                    os.replace(temp_path, object_path)
+            self._write(url_path, data)
+
+            self._references[sha256] = self._references.get(sha256, 0) + 1
+            previous = self._index.pop(url_path, None)
+            if previous is not None:
+                # the url pointed to another (or the same) body before
+                self._release(previous)
+            self._index[url_path] = sha256
+            self.stats['stored'] += 1
+
+            if self._size > self.max_size:
+                self._evict()
+
+
+    def evict(self):
+        '''
+        Removes the least recently used urls until the bodies fit in max_size,
+        and their bodies once no url points to them
+        '''
+        with self.lock:
+            self._load_index()
+            self._evict()
+
+
+    def record(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+
+    def _evict(self):
+        # called with the lock held
+        while self._size > self.max_size and self._index:
+            url_path, sha256 = self._index.popitem(last=False)
+            _remove(url_path)
+            self.stats['evicted'] += 1
+            self._release(sha256)
+
+
+    def _release(self, sha256):
+        '''
+        Drops a url's reference to a body, removing the body if it was the last
+        '''
+        self._references[sha256] -= 1
+        if self._references[sha256] == 0:
+            del self._references[sha256]
+            self._size -= _remove(self._get_object_path(sha256))
+
+
+    def _load_index(self):
+        '''
+        Reads the index of urls and the size of the bodies from disk, if they
+        haven't been yet (called with the lock held)
+        '''
+        if self._index is not None:
+            return
+
+        # [(last used, path, sha256)]
+        entries = []
+        for root, directories, filenames in os.walk(os.path.join(self.directory, 'urls')):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    with open(path, mode='r', encoding='utf-8') as f:
+                        sha256 = json.load(f)['sha256']
+                    entries.append((os.path.getmtime(path), path, sha256))
+                except (OSError, ValueError, KeyError):
+                    continue
+        entries.sort()
+        self._index = OrderedDict((path, sha256) for last_used, path, sha256 in entries)
+
+        self._references = {}
+        for sha256 in self._index.values():
+            self._references[sha256] = self._references.get(sha256, 0) + 1
+
+        size = 0
+        for root, directories, filenames in os.walk(os.path.join(self.directory, 'objects')):
+            size += sum(os.path.getsize(os.path.join(root, filename)) for filename in filenames)
+        self._size = size
+
+
+    def _get_size(self):
+        self._load_index()
+        return self._size
+
+
+    def _get_url_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'urls', key[:2], key + '.json')
+
+
+    def _get_object_path(self, sha256):
+        return os.path.join(self.directory, 'objects', sha256[:2], sha256 + '.zz')
+
+
+    def _write(self, path, data):
+        '''
+        Writes data to path atomically, so a partly written file is never read
+        '''
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self._write_temp(data, directory)
+        try:
+            os.replace(temp_path, path)
+        except BaseException:
+            _remove(temp_path)
+            raise
+
+
+    def _write_temp(self, data, directory=None):
+        '''
+        Returns the path of a new temp file with data in it
+        '''
+        f, temp_path = self._open_temp(directory)
+        try:
+            with f:
+                f.write(data)
+        except BaseException:
+            _remove(temp_path)
+            raise
+        return temp_path
+
+
+    def _open_temp(self, directory=None):
+        '''
+        Returns a new temp file opened for writing and its path, in
+        directory (defaults to tmp, which isn't counted in the size of the
+        bodies), so it can be moved into place
+        '''
+        fd, temp_path = tempfile.mkstemp(dir=directory or os.path.join(self.directory, 'tmp'), suffix='.tmp')
+        return os.fdopen(fd, 'wb'), temp_path
+
+
+
+class _DecompressingReader:
+    '''
+    Raw body of a streamed cached response: reads the compressed body from
+    a file, decompressing it as it's read
+    '''
+    def __init__(self, f):
+        self.f = f
+        self.decompressor = zlib.decompressobj()
+        self.buffer = b''
+
+    def read(self, amt=None, *args, **kwargs):
+        while (amt is None or len(self.buffer) < amt) and not self.f.closed:
+            data = self.f.read(READ_CHUNK_SIZE)
+            self.buffer += self.decompressor.decompress(data) if data else self.decompressor.flush()
+            if not data or self.decompressor.eof:
+                # all of it has been read
+                self.f.close()
+        amt = len(self.buffer) if amt is None else amt
+        chunk, self.buffer = self.buffer[:amt], self.buffer[amt:]
+        return chunk
+
+    def close(self):
+        self.f.close()
+
+
+
+class _CachingReader:
+    '''
+    Raw body of a streamed response that's being stored: what's read from
+    raw is hashed and compressed into a temp file, which is added to the
+    cache once raw has been read to the end, or removed if it's closed first
+    '''
+    def __init__(self, raw, cache, url, headers):
+        self.raw = raw
+        self.cache = cache
+        self.url = url
+        self.headers = headers
+        self.sha256 = hashlib.sha256()
+        self.compressor = zlib.compressobj(cache.compression_level)
+        self.file, self.temp_path = cache._open_temp()
+
+    def stream(self, amt=READ_CHUNK_SIZE, decode_content=None):
+        # requests reads a streamed body with raw.stream if there is one (urllib3), otherwise raw.read
+        if hasattr(self.raw, 'stream'):
+            chunks = self.raw.stream(amt, decode_content=decode_content)
+        else:
+            chunks = iter(lambda: self.raw.read(amt), b'')
+        for chunk in chunks:
+            self._write(chunk)
+            yield chunk
+        self._commit()
+
+    def read(self, amt=None, *args, **kwargs):
+        chunk = self.raw.read(amt, *args, **kwargs)
+        self._write(chunk)
+        if amt is None or not chunk:
+            self._commit()
+        return chunk
+
+    def close(self):
+        self._discard()
+        self.raw.close()
+
+    def __getattr__(self, name):
+        # e.g. release_conn
+        return getattr(self.raw, name)
+
+    def __del__(self):
+        self._discard()
+
+    def _write(self, chunk):
+        if self.file is not None and chunk:
+            self.sha256.update(chunk)
+            self.file.write(self.compressor.compress(chunk))
+
+    def _commit(self):
+        if self.file is None:
+            return
+        self.file.write(self.compressor.flush())
+        self.file.close()
+        self.file = None
+        try:
+            self.cache._add(self.url, self.sha256.hexdigest(), self.headers, self.temp_path)
+        except OSError:
+            _remove(self.temp_path)
+
+    def _discard(self):
+        if self.__dict__.get('file') is not None:
+            self.file.close()
+            self.file = None
+            _remove(self.temp_path)
+
+
+
+def _remove(path):
+    '''
+    Removes the file at path, returning its size (0 if it wasn't there)
+    '''
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
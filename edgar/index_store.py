@@ -0,0 +1,400 @@
+'''
+Local store of the EDGAR full-index, so that each quarter's master.idx
+(tens of MB) is only downloaded once, and filing info is looked up from
+disk rather than by downloading and searching the whole index each time
+
+The rows of each quarter's master.idx are kept in a SQLite table, with
+the cik as an integer, indexed by cik, form type and date filed:
+
+    filings(year, quarter, cik, company, form, date_filed, file)
+
+Quarters that are over are complete and never downloaded again. The
+current quarter's index grows until it's over, so it's refreshed once it's
+older than refresh_interval: it's only downloaded again if it has changed
+(a conditional request with the ETag and Last-Modified of the last
+download), and only the new rows are added. Each quarter is ingested by
+one thread at a time, so concurrent lookups don't download it twice.
+
+Use it for edgar.edgar.get_filing_info (and everything that uses it) with
+    set_index_provider(FilingIndexStore('~/.edgar-index.sqlite'))
+'''
+import os
+import sqlite3
+from itertools import islice
+import threading
+import time
+from datetime import date, datetime, timedelta
+import requests
+from edgar.edgar import FilingInfo, IndexProvider, get_latest_quarter_dir, _get_master_idx_url, _iter_master_idx_rows
+from edgar.requests_wrapper import get_client, _check_response
+
+
+DEFAULT_REFRESH_INTERVAL = 60 * 60 # seconds
+
+# the full-index of a quarter is still updated for a few days after it ends
+COMPLETE_AFTER_DAYS = 7
+
+# most ciks in one query, under SQLite's limit of variables
+MAX_QUERY_CIKS = 500
+
+# rows inserted per transaction while a master.idx is downloaded
+INSERT_BATCH_SIZE = 10000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS filings (
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    cik INTEGER NOT NULL,
+    company TEXT NOT NULL,
+    form TEXT NOT NULL,
+    date_filed TEXT NOT NULL,
+    file TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS filings_file ON filings (file, cik, form);
+CREATE INDEX IF NOT EXISTS filings_cik ON filings (cik, year, quarter);
+CREATE INDEX IF NOT EXISTS filings_form ON filings (form, date_filed);
+CREATE INDEX IF NOT EXISTS filings_date_filed ON filings (date_filed);
+CREATE TABLE IF NOT EXISTS quarters (
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    complete INTEGER NOT NULL,
+    refreshed REAL NOT NULL,
+    PRIMARY KEY (year, quarter)
+);
+CREATE TABLE IF NOT EXISTS validators (
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (year, quarter)
+);
+CREATE TABLE IF NOT EXISTS cursors (
+    name TEXT PRIMARY KEY,
+    day TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS queued (
+    name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    cik INTEGER NOT NULL,
+    company TEXT NOT NULL,
+    form TEXT NOT NULL,
+    date_filed TEXT NOT NULL,
+    file TEXT NOT NULL,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, file, cik, form)
+);
+'''
+
+
+
+class FilingIndexStore(IndexProvider):
+    '''
+    SQLite store of the full-index of the quarters that have been looked up,
+    which are downloaded (ingested) the first time they're needed
+    '''
+    def __init__(self, path, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        '''
+        :param path: path of the SQLite file, created if it doesn't exist
+            (or ':memory:')
+        :param refresh_interval: seconds before the index of a quarter that
+            isn't over is downloaded again
+        '''
+        self.path = path if path == ':memory:' else os.path.expanduser(path)
+        self.refresh_interval = refresh_interval
+        self.lock = threading.RLock()
+        # {(year, quarter):threading.Lock held while the quarter is updated}
+        self.quarter_locks = {}
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+
+
+    def get_filing_info(self, cik='', forms=[], year=0, quarter=0):
+        '''
+        Returns the List of FilingInfo of a quarter, the same as
+        edgar.edgar.get_filing_info, ingesting the quarter first if it isn't
+        stored (or refreshing it if it's out of date)
+
+        :param cik: only filings of this cik, or '' for all
+        :param forms: only filings of these forms, or [] for all
+        :param quarter: 1, 2, 3, 4, or 0 for the latest
+        '''
+        if quarter == 0:
+            quarter = get_latest_quarter_dir(year)[0]
+        self.update(year, quarter)
+
+        query = 'SELECT company, form, cik, date_filed, file FROM filings WHERE year = ? AND quarter = ?'
+        params = [year, quarter]
+        if cik != '':
+            query += ' AND cik = ?'
+            params.append(int(cik))
+        if forms:
+            query += ' AND form IN ({})'.format(', '.join('?' * len(forms)))
+            params.extend(forms)
+        query += ' ORDER BY rowid'
+
+        with self.lock:
+            rows = self.connection.execute(query, params).fetchall()
+        return [FilingInfo(company, form, str(cik), date_filed, file)
+            for company, form, cik, date_filed, file in rows]
+
+
+    def get_filing_info_batch(self, ciks, forms=[], year=0, quarter=0):
+        '''
+        Returns a dict of {cik: List of FilingInfo} of many companies in a
+        quarter, the same as edgar.edgar.get_filing_info_batch
+        '''
+        if quarter == 0:
+            quarter = get_latest_quarter_dir(year)[0]
+        self.update(year, quarter)
+
+        # ciks can be given with leading zeros, e.g. 0000320193
+        filing_infos = {cik: [] for cik in ciks}
+        cik_map = {}
+        for cik in ciks:
+            cik_map.setdefault(int(cik), []).append(cik)
+        numbers = list(cik_map)
+
+        for i in range(0, len(numbers), MAX_QUERY_CIKS):
+            chunk = numbers[i:i+MAX_QUERY_CIKS]
+            query = 'SELECT company, form, cik, date_filed, file FROM filings WHERE year = ? AND quarter = ?' \
+                ' AND cik IN ({})'.format(', '.join('?' * len(chunk)))
+            params = [year, quarter] + chunk
+            if forms:
+                query += ' AND form IN ({})'.format(', '.join('?' * len(forms)))
+                params.extend(forms)
+            query += ' ORDER BY rowid'
+
+            with self.lock:
+                rows = self.connection.execute(query, params).fetchall()
+            for company, form, cik, date_filed, file in rows:
+                filing_info = FilingInfo(company, form, str(cik), date_filed, file)
+                for key in cik_map[cik]:
+                    filing_infos[key].append(filing_info)
+        return filing_infos
+
+
+    def update(self, year, quarter):
+        '''
+        Ingests a quarter if it isn't stored, or if it isn't complete and
+        hasn't been refreshed within refresh_interval, returning the number
+        of new filings
+        '''
+        with self.lock:
+            quarter_lock = self.quarter_locks.setdefault((year, quarter), threading.Lock())
+
+        # callers waiting on the same quarter find it's been updated once they get the lock
+        with quarter_lock:
+            with self.lock:
+                row = self.connection.execute('SELECT complete, refreshed FROM quarters WHERE year = ? AND quarter = ?',
+                    (year, quarter)).fetchone()
+            if row is not None and (row[0] or time.time() - row[1] < self.refresh_interval):
+                return 0
+            return self.ingest(year, quarter)
+
+
+    def ingest(self, year, quarter):
+        '''
+        Downloads the master.idx of a quarter, if it has changed since it was
+        last downloaded, and adds the filings that aren't stored yet,
+        returning the number added
+        '''
+        url = _get_master_idx_url([], '{}/'.format(year), 'QTR{}/'.format(quarter))
+        refreshed = time.time()
+        complete = is_complete(year, quarter, refreshed)
+
+        response = get_client().get(url, stream=True, headers=self._get_conditional_headers(year, quarter))
+        if response.status_code == requests.codes.not_modified:
+            response.close()
+            with self.lock, self.connection:
+                self.connection.execute('UPDATE quarters SET complete = ?, refreshed = ? WHERE year = ? AND quarter = ?',
+                    (int(complete), refreshed, year, quarter))
+            print('{} QTR{} has not changed'.format(year, quarter))
+            return 0
+
+        _check_response(response)
+        # streamed into the store, rather than holding the whole index
+        added = self.add_rows(year, quarter, _iter_master_idx_rows(url, response=response), complete=complete,
+            refreshed=refreshed)
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO validators (year, quarter, etag, last_modified) '
+                'VALUES (?, ?, ?, ?)', (year, quarter, response.headers.get('ETag'), response.headers.get('Last-Modified')))
+        return added
+
+
+    def add_rows(self, year, quarter, rows, complete=False, refreshed=None):
+        '''
+        Adds filings of a quarter that aren't stored yet, returning the number added
+
+        :param rows: iterable of [cik, company, form, date_filed, file] as in master.idx
+        :param complete: True if the quarter is over and has all its filings
+        :param refreshed: time.time() of the download of the rows
+
+        rows are inserted INSERT_BATCH_SIZE at a time, each batch in its own
+        transaction, so the store isn't locked while rows are downloaded.
+        The quarter is only marked as stored after the last batch, so if the
+        download fails, it's ingested again next time.
+        '''
+        rows = iter(rows)
+        added = 0
+        while True:
+            batch = [(year, quarter, int(cik), company, form, date_filed, file)
+                for cik, company, form, date_filed, file in islice(rows, INSERT_BATCH_SIZE)]
+            if not batch:
+                break
+            with self.lock, self.connection:
+                before = self.connection.total_changes
+                self.connection.executemany(
+                    'INSERT OR IGNORE INTO filings (year, quarter, cik, company, form, date_filed, file) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+                added += self.connection.total_changes - before
+
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO quarters (year, quarter, complete, refreshed) '
+                'VALUES (?, ?, ?, ?)', (year, quarter, int(complete), refreshed or time.time()))
+        print('stored {} new filings of {} QTR{}'.format(added, year, quarter))
+        return added
+
+
+    def insert_rows(self, year, quarter, rows):
+        '''
+        Adds filings of a quarter that aren't stored yet (e.g. from a daily
+        index), without marking the quarter as stored, returning the list of
+        FilingInfo of those added
+
+        :param rows: iterable of [cik, company, form, date_filed, file] as in master.idx
+        '''
+        added = []
+        with self.lock, self.connection:
+            for cik, company, form, date_filed, file in rows:
+                cursor = self.connection.execute(
+                    'INSERT OR IGNORE INTO filings (year, quarter, cik, company, form, date_filed, file) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', (year, quarter, int(cik), company, form, date_filed, file))
+                if cursor.rowcount == 1:
+                    added.append(FilingInfo(company, form, str(int(cik)), date_filed, file))
+        return added
+
+
+    def _get_conditional_headers(self, year, quarter):
+        '''
+        Returns the headers for asking whether the master.idx of a stored
+        quarter has changed, or None if it isn't stored
+        '''
+        with self.lock:
+            row = self.connection.execute('SELECT etag, last_modified FROM validators WHERE year = ? AND quarter = ?',
+                (year, quarter)).fetchone()
+        if row is None:
+            return None
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers or None
+
+
+    def queue_rows(self, name, day, year, quarter, rows, cursor=False):
+        '''
+        Adds the filings of a day's index to the store (those that aren't
+        stored yet) and queues them to be delivered under name (those that
+        haven't been queued yet), whether or not they were already stored
+        (e.g. by a refresh of the quarter), returning the list of FilingInfo
+        newly queued. All in one transaction, along with moving the cursor
+        name to day if cursor is True.
+
+        :param day: YYYY-MM-DD of the daily index the rows are from
+        :param rows: iterable of [cik, company, form, date_filed, file] as in master.idx
+        '''
+        queued = []
+        with self.lock, self.connection:
+            for cik, company, form, date_filed, file in rows:
+                self.connection.execute(
+                    'INSERT OR IGNORE INTO filings (year, quarter, cik, company, form, date_filed, file) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', (year, quarter, int(cik), company, form, date_filed, file))
+                row = self.connection.execute(
+                    'INSERT OR IGNORE INTO queued (name, day, cik, company, form, date_filed, file) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', (name, day, int(cik), company, form, date_filed, file))
+                if row.rowcount == 1:
+                    queued.append(FilingInfo(company, form, str(int(cik)), date_filed, file))
+            if cursor:
+                self._set_cursor(name, day)
+        return queued
+
+
+    def get_queued(self, name):
+        '''
+        Returns the list of FilingInfo queued under name that haven't been
+        delivered yet, in the order they were queued
+        '''
+        with self.lock:
+            rows = self.connection.execute('SELECT company, form, cik, date_filed, file FROM queued '
+                'WHERE name = ? AND delivered = 0 ORDER BY rowid', (name,)).fetchall()
+        return [FilingInfo(company, form, str(cik), date_filed, file)
+            for company, form, cik, date_filed, file in rows]
+
+
+    def set_delivered(self, name, filing_info):
+        '''
+        Marks a FilingInfo queued under name as delivered
+        '''
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE queued SET delivered = 1 WHERE name = ? AND file = ? AND cik = ? AND form = ?',
+                (name, filing_info.file, int(filing_info.cik), filing_info.form))
+
+
+    def get_cursor(self, name):
+        '''
+        Returns the day (YYYY-MM-DD) saved as the cursor name, or None
+        '''
+        with self.lock:
+            row = self.connection.execute('SELECT day FROM cursors WHERE name = ?', (name,)).fetchone()
+        return row[0] if row is not None else None
+
+
+    def set_cursor(self, name, day):
+        '''
+        Saves day (YYYY-MM-DD) as the cursor name, e.g. the last day of the
+        daily index that's been ingested
+        '''
+        with self.lock, self.connection:
+            self._set_cursor(name, day)
+
+
+    def _set_cursor(self, name, day):
+        # called in a transaction
+        self.connection.execute('INSERT OR REPLACE INTO cursors (name, day) VALUES (?, ?)', (name, day))
+        # days up to the cursor aren't read again, so what's been delivered from them can't be queued again
+        self.connection.execute('DELETE FROM queued WHERE name = ? AND delivered = 1 AND day <= ?', (name, day))
+
+
+    def get_quarters(self):
+        '''
+        Returns a list of the (year, quarter) that are stored
+        '''
+        with self.lock:
+            return self.connection.execute('SELECT year, quarter FROM quarters ORDER BY year, quarter').fetchall()
+
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+
+def is_complete(year, quarter, timestamp=None):
+    '''
+    Returns True if the full-index of a quarter won't change anymore at
+    timestamp (defaults to now)
+    '''
+    end = date(year + quarter // 4, quarter * 3 % 12 + 1, 1)
+    today = datetime.fromtimestamp(timestamp or time.time()).date()
+    return today >= end + timedelta(days=COMPLETE_AFTER_DAYS)
+
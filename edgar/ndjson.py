@@ -0,0 +1,217 @@
+'''
+Serializes FinancialReports as NDJSON (newline delimited JSON), one report
+per line, so many reports can be streamed to a file or socket and read back
+one at a time
+
+Each line has the same structure as FinancialReportEncoder output, e.g.
+{"company":"AAPL","date_filed":"2016-01-27T00:00:00","reports":[{"date":"2015-12-26T00:00:00","months":3,"map":{"us-gaap_SalesRevenueNet":{"label":"Net sales","value":75872000000.0}}}]}
+
+Lines are written directly from the objects, without building intermediate
+dicts. orjson is used if it's installed, otherwise the fragments are built
+with the json module's C string encoder.
+'''
+import json
+from datetime import datetime
+from functools import lru_cache
+from io import TextIOBase
+from json.encoder import encode_basestring_ascii
+from math import isfinite
+import numpy as np
+from edgar.financials import FinancialReport, FinancialInfo, FinancialElement
+
+# orjson is much faster than the json module, but it's optional
+try:
+    import orjson
+    BACKEND = 'orjson'
+except ImportError:
+    orjson = None
+    BACKEND = 'json'
+
+BACKENDS = ['orjson', 'json']
+
+
+
+def dumps_report(financial_report, backend=None):
+    '''
+    Returns a FinancialReport as one line of NDJSON (without the newline)
+
+    :param backend: 'orjson' or 'json', defaults to BACKEND
+    '''
+    return ''.join(_get_fragments(financial_report)) if _get_backend(backend) == 'json' \
+        else _dumps_orjson(financial_report).decode()
+
+
+
+def iter_ndjson(financial_reports, backend=None):
+    '''
+    Yields a line of NDJSON (including the newline) as bytes for each FinancialReport,
+    e.g. for sending over a socket
+
+    :param financial_reports: iterable of FinancialReport, which is only iterated once
+    :param backend: 'orjson' or 'json', defaults to BACKEND
+    '''
+    if _get_backend(backend) == 'json':
+        for financial_report in financial_reports:
+            fragments = _get_fragments(financial_report)
+            fragments.append('\n')
+            yield ''.join(fragments).encode()
+    else:
+        for financial_report in financial_reports:
+            yield _dumps_orjson(financial_report) + b'\n'
+
+
+
+def dump_reports(financial_reports, fp, backend=None):
+    '''
+    Writes FinancialReports to fp as NDJSON and returns the number written
+
+    :param fp: text or binary file-like object, e.g. open(path, 'w'),
+        open(path, 'wb') or socket.makefile('wb')
+    :param backend: 'orjson' or 'json', defaults to BACKEND
+    '''
+    text = isinstance(fp, TextIOBase)
+    count = 0
+    for line in iter_ndjson(financial_reports, backend=backend):
+        fp.write(line.decode() if text else line)
+        count += 1
+    return count
+
+
+
+def loads_report(line):
+    '''
+    Returns a FinancialReport from a line of NDJSON (str or bytes)
+    '''
+    data = orjson.loads(line) if orjson is not None else json.loads(line)
+    reports = [
+        FinancialInfo(
+            _get_datetime(info['date']),
+            info['months'],
+            {xbrl_element: FinancialElement(element['label'], element['value'])
+                for xbrl_element, element in info['map'].items()})
+        for info in data['reports']
+    ]
+    return FinancialReport(data['company'], _get_datetime(data['date_filed']), reports)
+
+
+
+def load_reports(fp):
+    '''
+    Yields a FinancialReport for each line of NDJSON in fp, skipping blank lines
+
+    :param fp: text or binary file-like object (or any iterable of lines)
+    '''
+    for line in fp:
+        if line.strip():
+            yield loads_report(line)
+
+
+
+def _get_backend(backend):
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise NdjsonException('{} is not a supported backend, use one of {}'.format(backend, BACKENDS))
+    if backend == 'orjson' and orjson is None:
+        raise NdjsonException('orjson backend requested, but orjson is not installed')
+    return backend
+
+
+
+def _get_fragments(financial_report):
+    '''
+    Returns the list of JSON strings that make up a FinancialReport
+    '''
+    fragments = ['{"company":', _encode_value(financial_report.company),
+        ',"date_filed":', _encode_value(financial_report.date_filed),
+        ',"reports":[']
+    append = fragments.append
+
+    for i, financial_info in enumerate(financial_report.reports):
+        append('{"date":' if i == 0 else ',{"date":')
+        append(_encode_value(financial_info.date))
+        append(',"months":')
+        append(_encode_value(financial_info.months))
+        append(',"map":{')
+        separator = ''
+        for xbrl_element, financial_element in financial_info.map.items():
+            append(separator)
+            append(_encode_string(xbrl_element))
+            append(':{"label":')
+            append(_encode_value(financial_element.label))
+            append(',"value":')
+            append(_encode_value(financial_element.value))
+            append('}')
+            separator = ','
+        append('}}')
+
+    append(']}')
+    return fragments
+
+
+
+# element names and labels repeat across reports, as do dates
+@lru_cache(maxsize=65536)
+def _encode_string(text):
+    return encode_basestring_ascii(text)
+
+
+
+@lru_cache(maxsize=4096)
+def _encode_datetime(date):
+    return '"' + date.isoformat() + '"'
+
+
+
+def _encode_value(value):
+    '''
+    Returns the JSON of a scalar value of a FinancialReport, the same as orjson
+    writes it: null for nan and infinity (rather than the json module's NaN,
+    which isn't valid JSON), and numpy scalars as Python numbers
+    '''
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return _encode_string(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return float.__repr__(value) if isfinite(value) else 'null'
+    if type(value) is int:
+        return int.__repr__(value)
+    if isinstance(value, datetime):
+        return _encode_datetime(value)
+    return json.dumps(value)
+
+
+
+def _orjson_default(o):
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, (FinancialElement, FinancialInfo)):
+        return {slot: getattr(o, slot) for slot in o.__slots__}
+    if isinstance(o, FinancialReport):
+        return {'company': o.company, 'date_filed': o.date_filed, 'reports': o.reports}
+    raise TypeError
+
+
+def _dumps_orjson(financial_report):
+    # orjson writes nan as null, and datetimes the same as isoformat
+    return orjson.dumps(financial_report, default=_orjson_default)
+
+
+
+def _get_datetime(value):
+    '''
+    Returns an isoformat string as a datetime, leaving anything else as it is
+    '''
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+
+
+class NdjsonException(Exception):
+    pass
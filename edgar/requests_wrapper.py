@@ -1,13 +1,438 @@
+'''
+All requests to EDGAR go through a shared Client, which keeps connections
+alive across requests (so they aren't set up again for each index or
+filing), identifies itself with a User-Agent, keeps to SEC's limit on the
+rate of requests, and retries when EDGAR is throttling or unavailable
+
+SEC's fair access policy (https://www.sec.gov/os/accessing-edgar-data) asks
+for no more than 10 requests per second, and for a User-Agent that says who
+is making them, e.g. configure(user_agent='Sample Company admin@sample.com')
+
+AsyncClient (see async_get) makes the same requests from coroutines, so
+many filings can be downloaded concurrently from an asyncio event loop.
+
+Responses can also be cached on disk (see edgar.http_cache), e.g.
+configure(cache=HttpCache('~/.edgar-cache'))
+
+Requests are sent through a transport (a requests adapter), which can be
+swapped out, e.g. to record responses into a directory (RecordingAdapter),
+replay them from it without the network (ReplayAdapter), or send them to a
+local server (RewriteHostAdapter, see edgar.fake_edgar)
+'''
+import asyncio
+import io
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib.parse import urlsplit
+
+
+MAX_REQUESTS_PER_SECOND = 10
+# most requests in flight at once from AsyncClient
+MAX_CONCURRENT_REQUESTS = 10
+# can also be set with the EDGAR_USER_AGENT environment variable
+DEFAULT_USER_AGENT = os.environ.get('EDGAR_USER_AGENT',
+    'sec-edgar-financials (https://github.com/farhadab/sec-edgar-financials)')
+
+# responses worth trying again, after backing off
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+
+class TokenBucket:
+    '''
+    Thread-safe token bucket: allows bursts of up to capacity requests, and
+    max_per_second requests per second on average
+    '''
+    def __init__(self, max_per_second, capacity=None):
+        '''
+        :param max_per_second: tokens added per second
+        :param capacity: most tokens the bucket holds, defaults to max_per_second
+        '''
+        self.max_per_second = max_per_second
+        self.capacity = max_per_second if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        '''
+        Takes a token, waiting until there is one
+        '''
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.max_per_second)
+            self.updated = now
+            # reserve the token now, so callers waiting at the same time are spaced out
+            self.tokens -= 1
+            wait = -self.tokens / self.max_per_second if self.tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+
+class Client:
+    '''
+    HTTP client shared by everything that requests EDGAR (see get_client)
+    '''
+    def __init__(self, user_agent=None, max_requests_per_second=MAX_REQUESTS_PER_SECOND,
+            retries=3, backoff=0.5, max_backoff=30, pool_size=10, timeout=30, cache=None, transport=None):
+        '''
+        :param user_agent: User-Agent header, defaults to DEFAULT_USER_AGENT
+        :param max_requests_per_second: shared by all threads using the client
+        :param retries: number of times a request is retried after a
+            connection error or a response in RETRY_STATUS_CODES
+        :param backoff: seconds to back off before the first retry, doubled
+            for each retry after it (with jitter), unless the response has a
+            Retry-After
+        :param max_backoff: most seconds to back off
+        :param pool_size: number of connections kept alive per host
+        :param timeout: seconds to wait for the server to respond
+        :param cache: edgar.http_cache.HttpCache that ok responses are kept in
+            and served from, or None to not cache
+        :param transport: requests adapter that requests are sent through
+            (e.g. ReplayAdapter), defaults to a pooled HTTPAdapter
+        '''
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.limiter = TokenBucket(max_requests_per_second)
+
+        self.session = requests.Session()
+        adapter = transport or HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent or DEFAULT_USER_AGENT,
+            # responses are decompressed by requests, including when streamed
+            'Accept-Encoding': 'gzip, deflate',
+        })
+
+
+    def get(self, url, stream=False, headers=None):
+        '''
+        Returns the requests.Response of a GET of url, after any retries,
+        or from the cache if it has it (and it hasn't changed)
+
+        :param stream: if True, the body is only downloaded as it is read from
+            the response (e.g. with response.iter_content). Streamed responses
+            are stored in the cache once they've been read to the end, and
+            served from it streamed.
+        :param headers: dict of request headers, e.g. If-Modified-Since for a
+            conditional request; requests with headers aren't served from or
+            stored in the cache, since the response depends on them
+        '''
+        if self.cache is None or headers:
+            return self._get(url, stream, headers)
+
+        entry = self.cache.get_entry(url)
+        if entry is not None and entry.immutable:
+            response = self.cache.get_response(entry, stream)
+            if response is not None:
+                self.cache.record('hits')
+                return response
+            entry = None
+
+        headers = entry.get_conditional_headers() if entry is not None else None
+        response = self._get(url, stream, headers)
+
+        if entry is not None and response.status_code == requests.codes.not_modified:
+            response.close()
+            cached_response = self.cache.get_response(entry, stream)
+            if cached_response is not None:
+                self.cache.record('revalidated')
+                return cached_response
+            # evicted in the meantime
+            response = self._get(url, stream)
+
+        self.cache.record('misses')
+        if response.status_code == requests.codes.ok:
+            if stream:
+                self.cache.put_stream(url, response)
+            else:
+                self.cache.put(url, response)
+        return response
+
+
+    def _get(self, url, stream, headers=None):
+        '''
+        Returns the requests.Response of a GET of url, after any retries
+        '''
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(url, stream=stream, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    raise
+                print('{} getting {}, retrying'.format(type(e).__name__, url))
+                self._back_off(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.retries:
+                print('{} getting {}, retrying'.format(response.status_code, url))
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+                self._back_off(attempt, retry_after)
+                continue
+
+            return response
+
+
+    def _back_off(self, attempt, retry_after=None):
+        '''
+        Sleeps before retrying: the Retry-After given by the server if it's
+        in seconds, otherwise exponential backoff with full jitter
+        '''
+        try:
+            seconds = float(retry_after)
+        except (TypeError, ValueError):
+            seconds = random.uniform(0, self.backoff * 2 ** attempt)
+        time.sleep(min(seconds, self.max_backoff))
+
+
+    def close(self):
+        self.session.close()
+
+
+
+class AsyncClient:
+    '''
+    Makes requests from coroutines without blocking the event loop
+
+    requests are made by a Client on a pool of threads, so they share its
+    connections and rate limiter with everything else, and at most
+    max_concurrency of them are in flight at once (others wait their turn
+    in the event loop)
+    '''
+    def __init__(self, client=None, max_concurrency=MAX_CONCURRENT_REQUESTS):
+        '''
+        :param client: Client that makes the requests, defaults to the shared
+            one (see get_client) at the time of each request
+        :param max_concurrency: most requests in flight at once
+        '''
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        # asyncio.Semaphore belongs to an event loop, so there's one per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+
+    async def get(self, url):
+        '''
+        Returns the requests.Response of a GET of url, with its body already
+        downloaded (see Client.get)
+        '''
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+
+        async with semaphore:
+            return await loop.run_in_executor(self.executor, self._get, url)
+
+
+    def _get(self, url):
+        client = self.client or get_client()
+        response = client.get(url)
+        # read the body here rather than in the event loop
+        response.content
+        return response
+
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+
+class RecordingAdapter(BaseAdapter):
+    '''
+    Transport that sends requests on (through adapter) and saves the body
+    of each ok response in directory, at the path of its url, e.g.
+    https://www.sec.gov/Archives/edgar/full-index/2018/QTR4/master.idx to
+    <directory>/Archives/edgar/full-index/2018/QTR4/master.idx, which is a
+    mirror of EDGAR that ReplayAdapter or edgar.fake_edgar can serve
+    '''
+    def __init__(self, directory, adapter=None):
+        '''
+        :param adapter: transport the requests are sent through, defaults to HTTPAdapter
+        '''
+        super().__init__()
+        self.directory = directory
+        self.adapter = adapter or HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == requests.codes.ok:
+            path = _get_mirror_path(self.directory, request.url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + '.tmp'
+            # reads the whole body, even if it's streamed
+            with open(temp_path, mode='wb') as f:
+                f.write(response.content)
+            os.replace(temp_path, path)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+
+class ReplayAdapter(BaseAdapter):
+    '''
+    Transport that serves requests from a mirror of EDGAR in directory (see
+    RecordingAdapter) without the network, with a 404 for anything not in it
+    '''
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+
+    def send(self, request, stream=False, **kwargs):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        try:
+            with open(_get_mirror_path(self.directory, request.url), mode='rb') as f:
+                body = f.read()
+            response.status_code = requests.codes.ok
+            response.reason = 'OK'
+        except (OSError, RequestException):
+            body = 'not in {}'.format(self.directory).encode('utf-8')
+            response.status_code = requests.codes.not_found
+            response.reason = 'Not Found'
+        response.headers['Content-Length'] = str(len(body))
+        response.raw = io.BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+
+
+class RewriteHostAdapter(BaseAdapter):
+    '''
+    Transport that sends requests to another host (through adapter), keeping
+    their path, e.g. https://www.sec.gov/Archives/... to
+    http://127.0.0.1:8000/Archives/... with base_url http://127.0.0.1:8000
+    '''
+    def __init__(self, base_url, adapter=None):
+        '''
+        :param adapter: transport the requests are sent through, defaults to HTTPAdapter
+        '''
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+        self.adapter = adapter or HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request = request.copy()
+        request.url = self.base_url + url.path + ('?' + url.query if url.query else '')
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+
+def _get_mirror_path(directory, url):
+    '''
+    Returns the path of url in a mirror of EDGAR in directory, raising
+    RequestException if it would be outside of it
+    '''
+    root = os.path.abspath(directory)
+    path = os.path.abspath(os.path.join(root, *urlsplit(url).path.split('/')))
+    if not path.startswith(root + os.sep):
+        raise RequestException('{} is not in {}'.format(url, directory))
+    return path
+
+
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+
+def get_client():
+    '''
+    Returns the shared Client, creating it with the defaults if configure
+    hasn't been called
+    '''
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Client()
+    return _client
+
+
+
+def get_async_client():
+    '''
+    Returns the shared AsyncClient, which makes requests with the shared Client
+    '''
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncClient()
+    return _async_client
+
+
+
+def configure(**kwargs):
+    '''
+    Replaces the shared Client with one created with kwargs (see Client),
+    e.g. configure(user_agent='Sample Company admin@sample.com'), and returns it
+    '''
+    global _client
+    client = Client(**kwargs)
+    with _client_lock:
+        previous = _client
+        _client = client
+    if previous is not None:
+        previous.close()
+    return client
+
+
 
 class GetRequest:
-    def __init__(self, url):
-        response = requests.get(url)
-        response.encoding = 'utf-8'
-        if response.status_code != requests.codes.ok:
-            raise RequestException('{}: {}'.format(response.status_code, response.text))
-        
-        self.response = response
+    def __init__(self, url, stream=False):
+        '''
+        :param stream: if True, the body is only downloaded as it is read from
+            the response (e.g. with response.iter_content)
+        '''
+        self.response = _check_response(get_client().get(url, stream=stream))
+
+
+
+async def async_get(url):
+    '''
+    Coroutine that returns the requests.Response of a GET of url (see
+    AsyncClient), raising RequestException if it isn't ok, same as GetRequest
+    '''
+    return _check_response(await get_async_client().get(url))
+
+
+
+def _check_response(response):
+    '''
+    Returns response with its encoding set, raising RequestException if it isn't ok
+    '''
+    response.encoding = 'utf-8'
+    if response.status_code != requests.codes.ok:
+        raise RequestException('{}: {}'.format(response.status_code, response.text))
+    return response
+
+
 
 class RequestException(Exception):
-    pass
\ No newline at end of file
+    pass
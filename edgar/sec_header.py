@@ -0,0 +1,204 @@
+'''
+Models the SEC-HEADER of a filing, which precedes its documents and
+describes the submission (form type, period, filers, etc.)
+
+Apart from ACCEPTANCE-DATETIME, the header of a filing's .txt isn't tagged,
+but is made of "KEY: value" lines, nested by tabs into sections, e.g.
+
+<SEC-HEADER>0000320193-16-000017.hdr.sgml : 20160127
+<ACCEPTANCE-DATETIME>20160127163541
+ACCESSION NUMBER:		0000320193-16-000017
+CONFORMED SUBMISSION TYPE:	10-Q
+PUBLIC DOCUMENT COUNT:		90
+CONFORMED PERIOD OF REPORT:	20151226
+FILED AS OF DATE:		20160127
+DATE AS OF CHANGE:		20160127
+
+FILER:
+
+	COMPANY DATA:	
+		COMPANY CONFORMED NAME:			APPLE INC
+		CENTRAL INDEX KEY:			0000320193
+		...
+		FISCAL YEAR END:			0926
+	...
+</SEC-HEADER>
+'''
+import re
+from datetime import datetime
+from edgar.requests_wrapper import GetRequest
+from edgar.dtd import DTD
+from edgar.sgml import SgmlStream
+
+
+# the header is usually a few KB, so it should only take a chunk or two
+HEADER_CHUNK_SIZE = 8 * 1024
+
+# sections that describe the companies/people involved in a filing, in order
+# of preference for the filing's cik (forms 3, 4, 5 have ISSUER, and SC 13D/G
+# have SUBJECT COMPANY rather than FILER)
+FILER_SECTIONS = ['FILER', 'ISSUER', 'SUBJECT COMPANY', 'REPORTING-OWNER', 'FILED BY']
+
+# e.g. "\t\tCENTRAL INDEX KEY:\t\t\t0000320193"
+HEADER_LINE_REGEX = re.compile('^(\\t*)([A-Z][A-Z0-9 ()/&.,\\-]*):(.*)$')
+
+
+
+class SecHeader:
+    '''
+    Models the SEC-HEADER of a filing
+    '''
+    dtd = DTD()
+
+    def __init__(self, text):
+        '''
+        Constructor
+
+        :param text: text of the SEC-HEADER (with or without its tags)
+        '''
+        self.text = text
+        self.acceptance_datetime = None
+        self.map = self._parse_header(text)
+
+
+    def _parse_header(self, text):
+        '''
+        Returns the header's lines as a dictionary. Values of fields are str
+        (list of str if the field repeats, e.g. ITEM INFORMATION), and values
+        of sections (e.g. FILER) are lists of dictionaries, since a section can
+        repeat (e.g. a filing with multiple filers).
+        '''
+        result = {}
+        # (indent, section) for the sections that the current line can be in
+        sections = [(-1, result)]
+        acceptance_datetime_tag = self.dtd.acceptance_datetime.tag
+
+        for line in text.splitlines():
+            if line.startswith(acceptance_datetime_tag):
+                acceptance_datetime_text = line[len(acceptance_datetime_tag):].strip()
+                self.acceptance_datetime = datetime.strptime(acceptance_datetime_text, '%Y%m%d%H%M%S')
+                continue
+
+            line_match = HEADER_LINE_REGEX.match(line.rstrip())
+            if line_match is None:
+                # blank lines, tags, and the .hdr.sgml line
+                continue
+
+            indent = len(line_match.group(1))
+            key = line_match.group(2)
+            value = line_match.group(3).strip()
+
+            while sections[-1][0] >= indent:
+                sections.pop()
+            section = sections[-1][1]
+
+            if value == '':
+                # start of a section
+                child = {}
+                section.setdefault(key, []).append(child)
+                sections.append((indent, child))
+            elif key in section:
+                if not isinstance(section[key], list):
+                    section[key] = [section[key]]
+                section[key].append(value)
+            else:
+                section[key] = value
+
+        return result
+
+
+    @property
+    def accession_number(self):
+        return self.map.get('ACCESSION NUMBER')
+
+    @property
+    def form_type(self):
+        return self.map.get('CONFORMED SUBMISSION TYPE')
+
+    @property
+    def document_count(self):
+        count = self.map.get('PUBLIC DOCUMENT COUNT')
+        return None if count is None else int(count)
+
+    @property
+    def period_of_report(self):
+        return _get_date(self.map.get('CONFORMED PERIOD OF REPORT'))
+
+    @property
+    def date_filed(self):
+        return _get_date(self.map.get('FILED AS OF DATE'))
+
+    @property
+    def filers(self):
+        '''
+        List of the sections (dictionaries) describing the companies/people
+        in the filing, e.g. FILER, or ISSUER and REPORTING-OWNER for form 4
+        '''
+        filers = []
+        for section in FILER_SECTIONS:
+            filers += self.map.get(section, [])
+        return filers
+
+    @property
+    def cik(self):
+        '''
+        CENTRAL INDEX KEY of the first filer, without leading zeroes
+        (same as in master.idx)
+        '''
+        company_data = self._get_company_data()
+        cik = company_data.get('CENTRAL INDEX KEY')
+        return None if cik is None else cik.lstrip('0')
+
+    @property
+    def company(self):
+        return self._get_company_data().get('COMPANY CONFORMED NAME')
+
+    @property
+    def fiscal_year_end(self):
+        '''
+        MMDD of the first filer's fiscal year end, e.g. 0926
+        '''
+        return self._get_company_data().get('FISCAL YEAR END')
+
+
+    def _get_company_data(self):
+        '''
+        Returns the COMPANY DATA (or OWNER DATA) of the first filer
+        '''
+        for filer in self.filers:
+            for data_section in ['COMPANY DATA', 'OWNER DATA']:
+                if data_section in filer:
+                    return filer[data_section][0]
+        return {}
+
+
+    def __repr__(self):
+        return '<SecHeader [{0}, {1}, {2}, {3}]>'.format(
+            self.accession_number, self.form_type, self.cik, self.period_of_report)
+
+
+
+def get_sec_header(url):
+    '''
+    Returns the SecHeader of the filing at url, downloading only as much of
+    the filing as it takes to read the header
+
+    :param url: url of the filing's sgml (.txt), e.g. FilingInfo.url
+    '''
+    response = GetRequest(url, stream=True).response
+    try:
+        sgml_stream = SgmlStream(response.iter_content(HEADER_CHUNK_SIZE, decode_unicode=True), SecHeader.dtd)
+        sgml_stream.read_header()
+    finally:
+        # don't download the rest
+        response.close()
+
+    return SecHeader(sgml_stream.header_text)
+
+
+
+def _get_date(text):
+    '''
+    Returns a datetime given text of the form YYYYMMDD, or None
+    '''
+    return None if not text else datetime.strptime(text, '%Y%m%d')
@@ -9,17 +9,57 @@ class SgmlException(Exception):
     pass
 
 
+class SgmlText:
+    '''
+    Refers to the text of an element by its offsets within the sgml, so that
+    the text is only copied out of the sgml (and stripped) when it's needed
+    '''
+    __slots__ = ('source', 'start', 'end')
+
+    def __init__(self, source, start, end):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    def __str__(self):
+        return self.source[self.start:self.end].strip()
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return '<SgmlText [{0}:{1}]>'.format(self.start, self.end)
+
+
+
 class Sgml:
 
-    def __init__(self, document, dtd):
+    # without "?", would get <a>0</a> instead of just <a>
+    opening_tag_regex = re.compile('<[^/].+?>')
+
+    def __init__(self, document, dtd, lazy=False, document_filter=None):
+        '''
+        :param document: the sgml text
+        :param dtd: DTD of the sgml
+        :param lazy: if True, the text enclosed by elements that have an end
+            tag but no children (e.g. TEXT, XML) is kept in the map as SgmlText
+            (offsets into document) instead of being copied out as str
+        :param document_filter: function of a DOCUMENT's TYPE and FILENAME
+            returning whether to parse it; DOCUMENTs it returns False for are
+            skipped without extracting their TEXT. None parses every DOCUMENT.
+        '''
         self.dtd = dtd
         self.document = document
+        self.lazy = lazy
+        self.document_filter = document_filter
+        # {tag:[child tags]}, looked up for every element with an end tag
+        self.children = {tag: dtd.get_all_children(tag) for tag in dtd.map}
         self.map = self._parse_sgml(document)
 
 
     def _parse_sgml(self, data) -> dict():
         '''
-        Consumes an SGML document and returns a json/dictionary using recursion
+        Consumes an SGML document and returns a json/dictionary in a single pass
 
         No python library to parse SGML and solution in 
         https://stackoverflow.com/questions/12505419/parse-sgml-with-open-arbitrary-tags-in-python-3/12534420#12534420
@@ -28,145 +68,247 @@ class Sgml:
         Need to parse manually using EDGAR self.dtd
             data is the SGML text
 
-        Approach is recursive (divide and conquer):
-        1. find tag that's part of EDGAR's self.dtd
+        Approach walks the text once, keeping a stack of (result, start, end)
+        regions that still need to be scanned. Offsets always refer to data
+        itself, so nothing is copied until a value is extracted:
+        1. find the next tag in the region that's part of EDGAR's self.dtd
         2. If no end tag, extract data until next tag
            Else (has an end tag), 
                If the enclosed data contains child tags for the
-               given tag, as per the self.dtd, recurse over enclosed data
+               given tag, as per the self.dtd, scan the enclosed region next
                Else extract the enclosed data
-        3. If there is additional data outside of what's enclosed, recurse over that
-           as well
+        3. If there is additional data outside of what's enclosed, scan that
+           as well (after any enclosed region, to keep the document order)
         '''
-        data = data.strip()
-
         result = {}
+        regions = [(result, 0, len(data))]
+
+        while regions:
+            region_result, start, end = regions.pop()
+
+            tag_match = self._get_next_tag_match(data, start, end)
+            if tag_match is None or tag_match.group(0) not in self.dtd.map:
+                continue
+
+            tag = tag_match.group(0)
+            tag_end = tag_match.end()
+            element = self.dtd.map[tag]
+
+            if not element.has_end_tag:
+                # extract data until next tag
+                next_tag_match = self._get_next_tag_match(data, tag_end, end)
+                next_tag_start = end if next_tag_match is None else next_tag_match.start()
+                self._add_result(region_result, tag, data[tag_end:next_tag_start].strip())
+                regions.append((region_result, next_tag_start, end))
+                continue
+
+            # has an end tag
+            end_tag = element.get_end_tag_string()
+            end_tag_start = data.find(end_tag, tag_end, end)
+            if end_tag_start == -1:
+                raise SgmlException('Could not parse sgml: no {} for {} at {}'.format(end_tag, tag, tag_match.start()))
+
+            if tag == self.dtd.document.tag and not self._include_document(data, tag_end, end_tag_start):
+                # skip over the whole document
+                regions.append((region_result, end_tag_start + len(end_tag), end))
+                continue
 
-        try:
-            tag = self._get_next_tag(data)
-            # print('tag: '+tag)
-            # print('data: '+data)
-            # print('')
-
-            if tag in self.dtd.map: # also covers the case where tag is None
-                tag_start = data.find(tag)
-                tag_end = tag_start+len(tag)
-
-                element = self.dtd.map[tag]
-                value = None
-                end = len(data)
-
-                if not element.has_end_tag:
-                    # extract data until next tag
-                    next_tag = self._get_next_tag(data[tag_end:])
-                    next_tag_start = len(data) # using data since this is used in end
-                    if next_tag is not None:
-                        # print('next_tag is '+next_tag)
-                        next_tag_start = data.find(next_tag)
-                    value = data[tag_end:next_tag_start].strip()
-                    self._add_result(result, tag, value)
-                    end = next_tag_start
+            contains_edgar_tags = False
+            for child in self.children[tag]:
+                if data.find(child, tag_end, end_tag_start) != -1:
+                    contains_edgar_tags = True
+                    break
                 else:
-                    # has an end tag
-                    end_tag = element.get_end_tag_string()
-                    # print('end_tag is '+end_tag)
-                    end_tag_start = data.find(end_tag)
-                    enclosed_data = data[tag_end:end_tag_start]
-                    # print(enclosed_data)
-                    contains_edgar_tags = False
-                    children = self.dtd.get_all_children(tag)
-                    # print(children)
-
-                    for child in children:
-                        if child in enclosed_data:
-                            contains_edgar_tags = True
-                            break
-                        else:
-                            # the tag isn't in the enclosed_data, so we add empty result
-                            child_element = self.dtd.map[child]
-                            
-                            if child_element.required:
-                                child_no_value = [] if child_element.repeats else ''
-                                self._add_result(result, child, child_no_value)
-
-                    if contains_edgar_tags:
-                        # has children, recurse over enclosed data
-                        # print('recursing over tag '+tag)
-                        # print(enclosed_data)
-                        value = self._parse_sgml(enclosed_data)
-                        # print('done recursing over tag '+tag)
-                        self._add_result(result, tag, value)
-                        
-                    else:
-                        # no children, extract the enclosed data
-                        value = enclosed_data.strip()
-                        self._add_result(result, tag, value)
-
-                    end = end_tag_start + len(end_tag)
-                        
-                if end < len(data):
-                    # there is additional data outside of what's enclosed, recurse
-                    additional_data = data[end:]
-                    # print('recursing over additional data for tag '+tag)
-                    # print(additional_data)
-                    value = self._parse_sgml(additional_data)
-                    # print('done recursing over additional data for tag '+tag)
-                    key = self._get_next_tag(additional_data)
-                    # value will be dict, so no key is needed
-                    self._add_result(result, None, value)
-
-        except KeyError as e:
-            raise SgmlException('Could not parse sgml: {}'.format(e))
-        
+                    # the tag isn't in the enclosed data, so we add empty result
+                    child_element = self.dtd.map[child]
+
+                    if child_element.required:
+                        child_no_value = [] if child_element.repeats else ''
+                        self._add_result(region_result, child, child_no_value)
+
+            # additional data outside of what's enclosed is scanned after
+            # the enclosed data (regions is a stack)
+            regions.append((region_result, end_tag_start + len(end_tag), end))
+
+            if contains_edgar_tags:
+                # has children, scan the enclosed data into its own result
+                value = {}
+                self._add_result(region_result, tag, value)
+                regions.append((value, tag_end, end_tag_start))
+            elif self.lazy:
+                # no children, refer to the enclosed data
+                self._add_result(region_result, tag, SgmlText(data, tag_end, end_tag_start))
+            else:
+                # no children, extract the enclosed data
+                self._add_result(region_result, tag, data[tag_end:end_tag_start].strip())
+
         return result
 
 
     def _add_result(self, result, key, value):
         '''
         Helper to update result based on the key and value, according to the EDGAR self.dtd
-        If key is None, assumes value is dict and recurses over value's keys
         '''
-        if key is None:
-            # value is dict, add its keys to result recursively
-            for value_key in value:
-                self._add_result(result, value_key, value[value_key])
-        else:
-            element = self.dtd.map[key]
-            # print('adding result for '+key)
-
-            if key in result and not element.repeats:
-                # for QA...
-                print('overriding '+key+':'+str(result[key]))
-                print('with '+key+':'+str(value))
-
-            if element.repeats:
-                # dealing with a list
-                if key not in result:
-                    if isinstance(value, list):
-                        # value is already a list, add to result
-                        # print('creating result['+key+'] = '+str(value))
-                        result[key] = value
-                    else:
-                        # need to cast value as list
-                        # print('creating result['+key+'] = ['+str(value)+']')
-                        result[key] = [value]
-                else:
-                    # it's already a list and in result, add to it
-                    # print('adding result['+key+'] += '+str(value)+'')
-                    result[key] += value
+        element = self.dtd.map[key]
+        # print('adding result for '+key)
+
+        if key in result and not element.repeats:
+            # for QA...
+            print('overriding '+key+':'+str(result[key]))
+            print('with '+key+':'+str(value))
+
+        if element.repeats:
+            # dealing with a list
+            if key not in result:
+                result[key] = []
+            if isinstance(value, list):
+                # value is already a list, add its items to result
+                result[key] += value
             else:
-                # print('creating result['+key+'] = '+str(value))
-                result[key] = value
+                result[key].append(value)
+        else:
+            # print('creating result['+key+'] = '+str(value))
+            result[key] = value
+
+
+    def _include_document(self, data, start, end):
+        '''
+        Returns whether the DOCUMENT enclosed by data[start:end] passes
+        self.document_filter, only looking at what comes before its TEXT
+        '''
+        if self.document_filter is None:
+            return True
+
+        text_start = data.find(self.dtd.doc_text.tag, start, end)
+        if text_start == -1:
+            text_start = end
 
+        doc_type = self._peek_value(data, self.dtd.doc_type.tag, start, text_start)
+        filename = self._peek_value(data, self.dtd.filename.tag, start, text_start)
+        return self.document_filter(doc_type, filename)
 
-    @staticmethod
-    def _get_next_tag(data):
+
+    def _peek_value(self, data, tag, start, end):
         '''
-        Helper to return the next opening tag within data, or None if not found
+        Returns the value of the element without an end tag, tag, within
+        data[start:end], or None if it's not there
         '''
-        opening_tag_regex = '<[^/].+?>'
-        tag_match = re.search(opening_tag_regex, data) # without "?", would get <a>0</a> instead of just <a>
-        # print(data)
-        # print(tag_match)
-        tag = None if tag_match is None else tag_match.group(0)
-        return tag
\ No newline at end of file
+        tag_start = data.find(tag, start, end)
+        if tag_start == -1:
+            return None
+
+        tag_end = tag_start + len(tag)
+        next_tag_match = self._get_next_tag_match(data, tag_end, end)
+        next_tag_start = end if next_tag_match is None else next_tag_match.start()
+        return data[tag_end:next_tag_start].strip()
+
+
+    @classmethod
+    def _get_next_tag_match(cls, data, start, end):
+        '''
+        Helper to return the match of the next opening tag within data[start:end],
+        or None if not found (without copying data)
+        '''
+        return cls.opening_tag_regex.search(data, start, end)
+
+
+class SgmlStream:
+    '''
+    Parses the sgml of an SEC document/filing as it arrives in chunks of text
+    (e.g. over the network), so that each DOCUMENT can be used as soon as its
+    end tag has been read. Only the DOCUMENT currently being read is buffered.
+    '''
+
+    def __init__(self, chunks, dtd, lazy=False, document_filter=None):
+        '''
+        Constructor
+
+        :param chunks: iterable of str, e.g. from response.iter_content with
+            decode_unicode=True
+        :param dtd: DTD of the sgml
+        :param lazy: see Sgml; SgmlText of a DOCUMENT refers to that DOCUMENT's
+            text only
+        :param document_filter: see Sgml
+        '''
+        self.dtd = dtd
+        self.lazy = lazy
+        self.document_filter = document_filter
+        self.chunks = iter(chunks)
+        self.header = None
+        self.header_text = None
+        self._buffer = ''
+
+
+    def read_header(self):
+        '''
+        Returns the parsed SEC-HEADER (same structure as in Sgml.map), reading
+        only as far as its end tag. Its text is kept in self.header_text.
+        '''
+        if self.header is None:
+            header_tag = self.dtd.sec_header.tag
+            end = self._read_until(self.dtd.sec_header.get_end_tag_string())
+            start = self._buffer.find(header_tag, 0, end)
+            if end == -1 or start == -1:
+                raise SgmlException('Could not parse sgml: no {} in stream'.format(header_tag))
+
+            self.header_text = self._buffer[start:end]
+            self._buffer = self._buffer[end:]
+            self.header = Sgml(self.header_text, self.dtd).map[header_tag]
+
+        return self.header
+
+
+    def __iter__(self):
+        '''
+        Yields the parsed DOCUMENTs (same structure as the items of the
+        DOCUMENT list in Sgml.map) as soon as they have been read. Can be
+        iterated again after stopping early; it resumes where it left off.
+        '''
+        self.read_header()
+        document_tag = self.dtd.document.tag
+
+        while True:
+            end = self._read_until(self.dtd.document.get_end_tag_string())
+            if end == -1:
+                # nothing left but the closing SEC-DOCUMENT tag
+                self._buffer = ''
+                return
+
+            sgml = Sgml(self._buffer[:end], self.dtd, self.lazy, self.document_filter)
+            self._buffer = self._buffer[end:]
+
+            if document_tag in sgml.map:
+                yield sgml.map[document_tag][0]
+
+
+    def _read_until(self, tag):
+        '''
+        Reads chunks into the buffer until it contains tag, returning the index
+        just past tag in the buffer, or -1 if the chunks ran out first
+        '''
+        index = self._buffer.find(tag)
+        if index != -1:
+            return index + len(tag)
+
+        # chunks are only joined once tag is found (or the chunks run out)
+        # so that reading a large DOCUMENT stays linear
+        pending = [self._buffer]
+        length = len(self._buffer)
+        # tag may straddle chunks, so keep enough of the previous text around
+        keep = len(tag) - 1
+        tail = self._buffer[-keep:]
+
+        for chunk in self.chunks:
+            window = tail + chunk
+            index = window.find(tag)
+            pending.append(chunk)
+
+            if index != -1:
+                self._buffer = ''.join(pending)
+                return length - len(tail) + index + len(tag)
+
+            length += len(chunk)
+            tail = window[-keep:]
+
+        self._buffer = ''.join(pending)
+        return -1
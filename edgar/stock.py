@@ -2,7 +2,8 @@
 This module ties it all together; it will be the main module that's used 
 '''
 import pandas as pd
-from edgar.edgar import get_financial_filing_info, get_latest_quarter_dir, find_latest_filing_info_going_back_from, SYMBOLS_DATA_PATH
+from edgar.edgar import get_financial_filing_info, get_latest_quarter_dir, find_latest_filing_info, \
+    FINANCIAL_FORM_MAP, EDGAR_MIN_YEAR, SYMBOLS_DATA_PATH
 from edgar.filing import Filing
 from datetime import datetime
 
@@ -39,15 +40,12 @@ class Stock:
             current_quarter = quarter if quarter > 0 else get_latest_quarter_dir(current_year)[0]
             print('No {} filing info found for year={} quarter={}. Finding latest.'.format(period, current_year, current_quarter))
 
-            # go back through the quarters to find the latest
-            filing_info_list = find_latest_filing_info_going_back_from(period, self.cik, current_year, current_quarter)
-
-            if len(filing_info_list) == 0:
-                # we still have nothing, one last try with the previous year
-                # this is useful when you're checking for data early on in a
-                # calendar year, since it takes time for the filings to come in
-                print('Will do a final attempt to find filing info from last year')
-                filing_info_list = find_latest_filing_info_going_back_from(period, self.cik, current_year - 1, 4)
+            # go back through the quarters to find the latest, through the
+            # previous year, which is useful when you're checking for data
+            # early on in a calendar year, since it takes time for the
+            # filings to come in (the quarters are looked up a few at a time)
+            filing_info_list = find_latest_filing_info(self.cik, FINANCIAL_FORM_MAP[period],
+                start=(max(current_year - 1, EDGAR_MIN_YEAR), 1), end=(current_year, current_quarter))
 
             if len(filing_info_list) == 0:
                 # still not successful, throw hands up and quit
@@ -0,0 +1,199 @@
+'''
+Index provider that looks up a company's filings from its EDGAR submissions
+feed rather than the full index of every company, e.g.
+
+    https://data.sec.gov/submissions/CIK0000320193.json
+
+which has the company's recent filings (at least a year's, or the last
+1000) as columns, and the names of files with the older ones, e.g.
+
+    {"cik": "320193", "name": "Apple Inc.", "filings": {
+        "recent": {"accessionNumber": [...], "filingDate": [...], "form": [...], ...},
+        "files": [{"name": "CIK0000320193-submissions-001.json", "filingFrom": "1994-01-26", "filingTo": "2014-04-24", ...}]
+    }}
+
+The older files are only downloaded when a lookup needs their dates. The
+feed changes as the company files, so it's downloaded again once it's older
+than max_age, but the older files never change. Both are kept in directory
+(if given) as well as in memory.
+
+Use it for edgar.edgar.get_filing_info (and everything that uses it) with
+    set_index_provider(SubmissionsProvider('~/.edgar-submissions'))
+
+Company names are as the company is named now (e.g. Apple Inc.), rather
+than as it was named in the index of the quarter (e.g. APPLE INC).
+'''
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from edgar.edgar import FilingInfo, IndexProvider, InvalidInputException
+from edgar.requests_wrapper import GetRequest
+
+
+SUBMISSIONS_URL = 'https://data.sec.gov/submissions/'
+
+DEFAULT_MAX_AGE = 60 * 60 # seconds
+
+
+
+class Submissions:
+    '''
+    Models the filings of a company from its submissions feed, with the
+    filings of each file as a list of (date filed, form, accession number)
+    '''
+    def __init__(self, cik, name, recent, files, loaded):
+        '''
+        :param recent: filings of the feed itself
+        :param files: list of dicts of the older files (name, filingFrom, filingTo)
+        :param loaded: time.time() of the download of the feed
+        '''
+        self.cik = cik
+        self.name = name
+        self.recent = recent
+        self.files = files
+        self.loaded = loaded
+        # {file name:filings}, of the older files that have been loaded
+        self.pages = {}
+
+    def __repr__(self):
+        return '[{0}, {1}, {2} recent filings, {3} files]'.format(self.cik, self.name, len(self.recent), len(self.files))
+
+
+
+class SubmissionsProvider(IndexProvider):
+    '''
+    IndexProvider of the filing info of one company at a time from its
+    submissions feed (see module docstring)
+    '''
+    per_company = True
+
+    def __init__(self, directory=None, max_age=DEFAULT_MAX_AGE):
+        '''
+        :param directory: where downloaded feeds are kept, or None to only
+            keep them in memory
+        :param max_age: seconds before a company's feed is downloaded again
+        '''
+        self.directory = os.path.expanduser(directory) if directory else None
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        # {cik:Submissions}
+        self.submissions = {}
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+
+    def get_filing_info(self, cik='', forms=[], year=0, quarter=0):
+        '''
+        Returns the List of FilingInfo of a company in a quarter, in order of
+        date filed, the same as edgar.edgar.get_filing_info
+
+        :param quarter: 1, 2, 3, 4, or 0 for the latest (the current one
+            for the current year)
+        '''
+        if cik == '':
+            raise InvalidInputException('submissions are per company, so a cik is needed')
+
+        if quarter == 0:
+            now = datetime.now()
+            quarter = (now.month - 1) // 3 + 1 if year == now.year else 4
+        start = '{}-{:02d}-01'.format(year, quarter * 3 - 2)
+        end = '{}-{:02d}-01'.format(year + quarter // 4, quarter * 3 % 12 + 1)
+
+        submissions = self.get_submissions(cik)
+        cik = str(int(cik))
+        filing_infos = [
+            FilingInfo(submissions.name, form, cik, date_filed, 'edgar/data/{}/{}.txt'.format(cik, accession_number))
+            for date_filed, form, accession_number in self._iter_filings_in_range(submissions, start, end)
+            if start <= date_filed < end and (forms == [] or form in forms)
+        ]
+        filing_infos.sort(key=lambda filing_info: filing_info.date_filed)
+        return filing_infos
+
+
+    def get_submissions(self, cik):
+        '''
+        Returns the Submissions of a company, downloading its feed if it
+        isn't loaded or is older than max_age
+        '''
+        cik = int(cik)
+        with self.lock:
+            submissions = self.submissions.get(cik)
+        if submissions is not None and time.time() - submissions.loaded < self.max_age:
+            return submissions
+
+        data, loaded = self._get_json('CIK{:010d}.json'.format(cik), immutable=False)
+        filings = data.get('filings', {})
+        submissions = Submissions(str(cik), data.get('name', ''), _get_filings(filings.get('recent', {})),
+            filings.get('files', []), loaded)
+        with self.lock:
+            self.submissions[cik] = submissions
+        return submissions
+
+
+    def _iter_filings_in_range(self, submissions, start, end):
+        '''
+        Yields the (date filed, form, accession number) of a company that may
+        be between start and end (dates), loading the older files they're in
+        '''
+        for date_filed, form, accession_number in submissions.recent:
+            yield date_filed, form, accession_number
+
+        for page in submissions.files:
+            if page.get('filingTo', end) < start or page.get('filingFrom', start) >= end:
+                continue
+            filings = submissions.pages.get(page['name'])
+            if filings is None:
+                filings = submissions.pages[page['name']] = _get_filings(self._get_json(page['name'], immutable=True)[0])
+            for date_filed, form, accession_number in filings:
+                yield date_filed, form, accession_number
+
+
+    def _get_json(self, name, immutable):
+        '''
+        Returns (json, time.time() of its download) of a file of the submissions
+        feed, from directory if it's there (and isn't older than max_age,
+        unless it's immutable)
+        '''
+        path = os.path.join(self.directory, name) if self.directory else None
+        if path is not None:
+            try:
+                modified = os.path.getmtime(path)
+                if immutable or time.time() - modified < self.max_age:
+                    with open(path, mode='r', encoding='utf-8') as f:
+                        return json.load(f), modified
+            except (OSError, ValueError):
+                pass
+
+        loaded = time.time()
+        text = GetRequest(SUBMISSIONS_URL + name).response.text
+        data = json.loads(text)
+        if path is not None:
+            _write(path, text)
+        return data, loaded
+
+
+
+def _get_filings(columns):
+    '''
+    Returns the list of (date filed, form, accession number) of the columns
+    of a submissions file
+    '''
+    return list(zip(columns.get('filingDate', []), columns.get('form', []), columns.get('accessionNumber', [])))
+
+
+
+def _write(path, text):
+    '''
+    Writes text to path atomically, so a partly written file is never read
+    '''
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode='w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
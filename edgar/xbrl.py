@@ -0,0 +1,416 @@
+'''
+Extracts financial statements from a filing's XBRL, rather than from the
+rendered R pages (see edgar.financials)
+
+The XBRL instance (EX-101.INS, or the *_htm.xml extracted from inline XBRL)
+has every fact of the filing, each referring to a context (the period, and
+dimensions for breakdowns such as segments), a unit and its precision
+(decimals), e.g.
+
+<us-gaap:SalesRevenueNet contextRef="FD2016Q1QTD" decimals="-6" unitRef="usd">75872000000</us-gaap:SalesRevenueNet>
+
+The presentation linkbase (EX-101.PRE) lists the concepts of each statement,
+by role (the Role of the statement's Report in FilingSummary.xml), and the
+label linkbase (EX-101.LAB) has their labels.
+
+Documents are read with ElementTree.iterparse, and elements are dropped as
+soon as they've been read, so large text blocks aren't kept in memory.
+'''
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime
+from io import BytesIO
+from edgar.financials import FinancialReport, FinancialInfo, FinancialElement
+
+
+XBRLI = '{http://www.xbrl.org/2003/instance}'
+LINK = '{http://www.xbrl.org/2003/linkbase}'
+XLINK = '{http://www.w3.org/1999/xlink}'
+XSI = '{http://www.w3.org/2001/XMLSchema-instance}'
+
+LABEL_ROLE = 'http://www.xbrl.org/2003/role/label'
+
+# preferred label roles starting with this (e.g. negatedLabel, negatedTotalLabel)
+# present the value with its sign flipped
+NEGATED_LABEL_PREFIX = 'negated'
+
+# average days in a month, for the months a context's period covers
+DAYS_PER_MONTH = 365.25 / 12
+
+
+
+class XbrlContext:
+    '''
+    Models an xbrli:context of an XBRL instance
+    '''
+    __slots__ = ('date', 'months', 'dimensional')
+
+    def __init__(self, date, months, dimensional):
+        '''
+        :param date: datetime of the end of the period (or the instant)
+        :param months: number of months the period covers, or None if it's an
+            instant (e.g. balance sheet), same as FinancialInfo.months
+        :param dimensional: True if the context has a segment or scenario,
+            i.e. it's a breakdown (e.g. by segment) rather than the total
+        '''
+        self.date = date
+        self.months = months
+        self.dimensional = dimensional
+
+    def __repr__(self):
+        return '[{0}, {1}, {2}]'.format(self.date, self.months, self.dimensional)
+
+
+
+class XbrlFact:
+    '''
+    Models a numeric fact of an XBRL instance
+    '''
+    __slots__ = ('value', 'unit', 'decimals')
+
+    def __init__(self, value, unit, decimals):
+        '''
+        :param value: float, as reported (not scaled)
+        :param unit: id of the fact's xbrli:unit (see XbrlInstance.units)
+        :param decimals: precision of the value, e.g. -6 if rounded to
+            millions, float('inf') if exact, or None if not given
+        '''
+        self.value = value
+        self.unit = unit
+        self.decimals = decimals
+
+    def __repr__(self):
+        return '[{0}, {1}, {2}]'.format(self.value, self.unit, self.decimals)
+
+
+
+class XbrlInstance:
+    '''
+    Models the numeric facts of an XBRL instance, along with their contexts and units
+    '''
+    def __init__(self, contexts, units, facts):
+        '''
+        :param contexts: {context id:XbrlContext}
+        :param units: {unit id:measure}, e.g. USD, shares, USD/shares
+        :param facts: {concept:{context id:XbrlFact}}, concepts named as
+            prefix_name (e.g. us-gaap_Revenues), same as the XBRL elements
+            of FinancialInfo.map
+        '''
+        self.contexts = contexts
+        self.units = units
+        self.facts = facts
+
+    @classmethod
+    def parse(cls, source):
+        '''
+        Returns an XbrlInstance from the xml (str, bytes or binary file-like
+        object) of an XBRL instance
+
+        Only numeric facts are kept. Where a concept is reported more than once
+        for the same context (e.g. rounded in one place and exact in another),
+        the most precise fact (highest decimals) is kept, preferring the unit
+        the concept was first reported in, so values of different units
+        aren't mixed.
+        '''
+        contexts = {}
+        units = {}
+        facts = {}
+        # {concept:unit id it was first reported in}
+        concept_units = {}
+        # {namespace uri:prefix}
+        prefixes = {}
+
+        depth = 0
+        root = None
+        for event, element in ElementTree.iterparse(_get_file(source), events=('start-ns', 'start', 'end')):
+            if event == 'start-ns':
+                prefix, uri = element
+                prefixes.setdefault(uri, prefix)
+                continue
+            if event == 'start':
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                # only children of the root (and all that they contain) are read
+                continue
+
+            tag = element.tag
+            if tag == XBRLI + 'context':
+                contexts[element.get('id')] = _get_context(element)
+            elif tag == XBRLI + 'unit':
+                units[element.get('id')] = _get_unit(element)
+            elif element.get('unitRef') is not None and element.get(XSI + 'nil') != 'true':
+                fact = XbrlFact(_get_float(element.text), element.get('unitRef'), _get_decimals(element.get('decimals')))
+                if fact.value is not None:
+                    concept = _get_concept(tag, prefixes)
+                    context_facts = facts.setdefault(concept, {})
+                    context_ref = element.get('contextRef')
+                    existing = context_facts.get(context_ref)
+                    unit = concept_units.setdefault(concept, fact.unit)
+                    if existing is None or _get_rank(fact, unit) > _get_rank(existing, unit):
+                        context_facts[context_ref] = fact
+
+            # everything under the root so far has been read
+            root.clear()
+
+        return cls(contexts, units, facts)
+
+
+
+def parse_presentation(source):
+    '''
+    Returns {role:[(concept, preferred label role)]} of a presentation linkbase
+    (str, bytes or binary file-like object), with the concepts of each role
+    in presentation order (depth first, by order of the arcs). The preferred
+    label role is None if the arc doesn't have one.
+    '''
+    # {role:([(from, to, order, preferred label role)], {locator label:concept})}
+    links = {}
+    for event, element in ElementTree.iterparse(_get_file(source)):
+        if element.tag != LINK + 'presentationLink':
+            continue
+        arcs, locators = links.setdefault(element.get(XLINK + 'role'), ([], {}))
+        for child in element:
+            if child.tag == LINK + 'loc':
+                locators[child.get(XLINK + 'label')] = _get_href_concept(child.get(XLINK + 'href'))
+            elif child.tag == LINK + 'presentationArc':
+                arcs.append((child.get(XLINK + 'from'), child.get(XLINK + 'to'),
+                    float(child.get('order', 0)), child.get('preferredLabel')))
+        element.clear()
+
+    return {role: _get_presentation_order(arcs, locators) for role, (arcs, locators) in links.items()}
+
+
+
+def parse_labels(source):
+    '''
+    Returns {concept:{label role:label}} of a label linkbase (str, bytes or
+    binary file-like object)
+    '''
+    labels = {}
+    for event, element in ElementTree.iterparse(_get_file(source)):
+        if element.tag != LINK + 'labelLink':
+            continue
+        # {locator label:concept}, {resource label:[(role, text)]}
+        locators = {}
+        resources = {}
+        arcs = []
+        for child in element:
+            if child.tag == LINK + 'loc':
+                locators[child.get(XLINK + 'label')] = _get_href_concept(child.get(XLINK + 'href'))
+            elif child.tag == LINK + 'label':
+                resources.setdefault(child.get(XLINK + 'label'), []).append(
+                    (child.get(XLINK + 'role', LABEL_ROLE), (child.text or '').strip()))
+            elif child.tag == LINK + 'labelArc':
+                arcs.append((child.get(XLINK + 'from'), child.get(XLINK + 'to')))
+        element.clear()
+
+        for from_label, to_label in arcs:
+            concept = locators.get(from_label)
+            if concept is not None:
+                concept_labels = labels.setdefault(concept, {})
+                for role, text in resources.get(to_label, []):
+                    concept_labels.setdefault(role, text)
+
+    return labels
+
+
+
+def get_xbrl_financial_report(company, date_filed, instance, concepts, labels=None):
+    '''
+    Returns a FinancialReport of the given concepts from an XbrlInstance,
+    with a FinancialInfo for each period that has a value for any of them
+    (in the same order as R pages: by months, then latest first). Facts of
+    dimensional contexts (e.g. by segment) are left out, as they are on the
+    face of the statements.
+
+    Values are as reported in the instance, so they're exact, whereas R pages
+    are rounded to their units (e.g. $ in Millions). As on R pages, the sign
+    is flipped where the preferred label role is a negated one (e.g.
+    negatedLabel, for a cost shown as a deduction).
+
+    :param company: identifier for the company
+    :param date_filed: datetime representing ACCEPTANCE-DATETIME of Filing
+    :param instance: XbrlInstance of the filing
+    :param concepts: list of (concept, preferred label role) of the statement
+        (see parse_presentation), or of concepts
+    :param labels: {concept:{label role:label}} (see parse_labels); if None,
+        or a concept has no label, the concept's name is used
+    '''
+    # {(date, months):{concept:FinancialElement}}
+    periods = {}
+    for concept in concepts:
+        concept, label_role = concept if isinstance(concept, tuple) else (concept, None)
+        concept_facts = instance.facts.get(concept)
+        if not concept_facts:
+            # e.g. abstracts, which are headings
+            continue
+
+        label = _get_label(labels, concept, label_role)
+        sign = -1 if _is_negated(label_role) else 1
+        for context_ref, fact in concept_facts.items():
+            context = instance.contexts.get(context_ref)
+            if context is None or context.dimensional:
+                continue
+            financial_map = periods.setdefault((context.date, context.months), {})
+            if concept not in financial_map:
+                financial_map[concept] = FinancialElement(label, sign * fact.value)
+
+    ordered_periods = sorted(periods, key=lambda period: (period[1] or 0, -period[0].toordinal()))
+    reports = [FinancialInfo(date, months, periods[(date, months)]) for date, months in ordered_periods]
+    return FinancialReport(company, date_filed, reports)
+
+
+
+def _get_file(source):
+    '''
+    Returns source as something ElementTree.iterparse can read
+    '''
+    if isinstance(source, str):
+        # the xml declaration, if any, has to come first
+        return BytesIO(source.lstrip().encode('utf-8'))
+    if isinstance(source, bytes):
+        return BytesIO(source.lstrip())
+    return source
+
+
+
+def _get_context(element):
+    '''
+    Returns an XbrlContext from an xbrli:context element
+    '''
+    period = element.find(XBRLI + 'period')
+    instant = period.findtext(XBRLI + 'instant')
+    if instant is not None:
+        date = _get_date(instant)
+        months = None
+    else:
+        start = _get_date(period.findtext(XBRLI + 'startDate'))
+        date = _get_date(period.findtext(XBRLI + 'endDate'))
+        months = int(round((date - start).days / DAYS_PER_MONTH))
+
+    dimensional = element.find(XBRLI + 'entity/' + XBRLI + 'segment') is not None \
+        or element.find(XBRLI + 'scenario') is not None
+    return XbrlContext(date, months, dimensional)
+
+
+
+def _get_unit(element):
+    '''
+    Returns the measure of an xbrli:unit element without its prefix,
+    e.g. USD, or USD/shares if it's a divide
+    '''
+    divide = element.find(XBRLI + 'divide')
+    if divide is not None:
+        numerator = divide.findtext(XBRLI + 'unitNumerator/' + XBRLI + 'measure', '')
+        denominator = divide.findtext(XBRLI + 'unitDenominator/' + XBRLI + 'measure', '')
+        return '{}/{}'.format(_strip_prefix(numerator), _strip_prefix(denominator))
+    return '*'.join(_strip_prefix(measure.text) for measure in element.findall(XBRLI + 'measure'))
+
+
+
+def _strip_prefix(qname):
+    return (qname or '').strip().split(':')[-1]
+
+
+
+def _get_concept(tag, prefixes):
+    '''
+    Returns the concept of an element tag, e.g. us-gaap_Revenues for
+    {http://fasb.org/us-gaap/2018-01-31}Revenues
+    '''
+    uri, name = tag[1:].split('}', 1)
+    return '{}_{}'.format(prefixes.get(uri, ''), name)
+
+
+
+def _get_href_concept(href):
+    '''
+    Returns the concept of a locator's href, e.g. us-gaap_Revenues for
+    https://xbrl.fasb.org/us-gaap/2018/elts/us-gaap-2018-01-31.xsd#us-gaap_Revenues
+    '''
+    return href.rsplit('#', 1)[-1]
+
+
+
+def _get_presentation_order(arcs, locators):
+    '''
+    Returns [(concept, preferred label role)] of a role's presentation arcs,
+    depth first from the roots, by order of the arcs
+    '''
+    # {from:[(order, to, preferred label role)]}
+    children = {}
+    to_labels = set()
+    for from_label, to_label, order, preferred_label in arcs:
+        children.setdefault(from_label, []).append((order, to_label, preferred_label))
+        to_labels.add(to_label)
+
+    roots = [label for label in locators if label not in to_labels]
+
+    concepts = []
+    seen = set()
+    stack = [(root, None) for root in reversed(roots)]
+    while stack:
+        label, preferred_label = stack.pop()
+        concept = locators.get(label)
+        if concept is not None and concept not in seen:
+            seen.add(concept)
+            concepts.append((concept, preferred_label))
+        for order, to_label, to_preferred_label in sorted(children.get(label, []), key=lambda child: child[0], reverse=True):
+            if locators.get(to_label) not in seen:
+                stack.append((to_label, to_preferred_label))
+
+    return concepts
+
+
+
+def _get_label(labels, concept, label_role):
+    concept_labels = (labels or {}).get(concept, {})
+    return concept_labels.get(label_role) or concept_labels.get(LABEL_ROLE) or concept
+
+
+
+def _is_negated(label_role):
+    return label_role is not None and label_role.rsplit('/', 1)[-1].startswith(NEGATED_LABEL_PREFIX)
+
+
+
+def _get_date(text):
+    return datetime.strptime(text.strip()[:10], '%Y-%m-%d')
+
+
+
+def _get_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+
+def _get_decimals(text):
+    if text is None:
+        return None
+    if text == 'INF':
+        return float('inf')
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+
+def _get_precision(fact):
+    return float('-inf') if fact.decimals is None else fact.decimals
+
+
+
+def _get_rank(fact, unit):
+    '''
+    Returns what a fact is ranked by among the facts of a concept and context:
+    being in the concept's unit, then precision
+    '''
+    return fact.unit == unit, _get_precision(fact)
@@ -6,10 +6,16 @@ here = os.path.abspath(os.path.dirname(__file__))
 
 requires = [
     'pandas==0.23.4',
+    'numpy>=1.15.0',
     'requests==2.20.0',
     'bs4==0.0.1',
 ]
 
+# optional, but much faster at parsing xml
+extras = {
+    'lxml': ['lxml'],
+}
+
 test_requirements = [
     'pytest==4.0.1'
 ]
@@ -36,6 +42,7 @@ setup(
     keywords=['sec', 'edgar', 'financials', 'stock', 'fundamental', 'analysis'],
     python_requires="==3.7",
     install_requires=requires,
+    extras_require=extras,
     tests_require=test_requirements,
     classifiers=[
         'Intended Audience :: Developers',
@@ -0,0 +1,65 @@
+'''
+Local HTTP server for testing requests without the network
+'''
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    '''
+    Serves routes, a dict of {path:route}, where a route is a tuple of
+    (status, body, headers) or a function of (StubHandler, number of the
+    request to the path) that returns one. Use as a context manager:
+
+        with StubServer({'/ok': (200, b'ok', {})}) as server:
+            requests.get(server.url + '/ok')
+    '''
+    daemon_threads = True
+
+    def __init__(self, routes):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.routes = routes
+        self.url = 'http://127.0.0.1:{}'.format(self.server_address[1])
+        # {path:number of requests}
+        self.counts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep-alive
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            count = server.counts[self.path] = server.counts.get(self.path, 0) + 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+        try:
+            route = server.routes.get(self.path, (404, b'not found', {}))
+            status, body, headers = route(self, count) if callable(route) else route
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
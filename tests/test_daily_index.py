@@ -0,0 +1,153 @@
+import pytest
+from datetime import date
+import edgar.daily_index
+from tests.stub_server import StubServer
+from edgar.daily_index import DailyIndexIngester, get_daily_index, _get_rows
+from edgar.index_store import FilingIndexStore
+from edgar.requests_wrapper import RequestException, configure
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+DAILY_INDEX_HEADER = '''Description:           Daily Index of EDGAR Dissemination Feed by Company Name
+Last Data Received:    Jan 02, 2019
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+
+
+
+
+CIK|Company Name|Form Type|Date Filed|File Name
+--------------------------------------------------------------------------------
+'''
+
+JAN_2 = DAILY_INDEX_HEADER + '''1000045|NICHOLAS FINANCIAL INC|10-Q|20190102|edgar/data/1000045/0001193125-19-000251.txt
+1000209|MEDALLION FINANCIAL CORP|8-K|20190102|edgar/data/1000209/0001193125-19-000343.txt
+'''
+
+JAN_3 = DAILY_INDEX_HEADER + '''1000209|MEDALLION FINANCIAL CORP|4|20190103|edgar/data/1000209/0001209191-19-000401.txt
+'''
+
+JAN_4 = DAILY_INDEX_HEADER + '''320193|APPLE INC|8-K|20190104|edgar/data/320193/0001193125-19-001071.txt
+'''
+
+NEW_ROW = '320193|APPLE INC|10-Q|{0:%Y%m%d}|edgar/data/320193/0000320193-19-000010.txt\n'
+
+
+def path(day):
+    return '/daily-index/{}/QTR{}/master.{:%Y%m%d}.idx'.format(day.year, (day.month - 1) // 3 + 1, day)
+
+
+def growing(text, day):
+    '''
+    Returns a route of a daily index that has a new filing after the first request
+    '''
+    def route(handler, count):
+        return 200, (text + (NEW_ROW.format(day) if count > 1 else '')).encode(), {}
+    return route
+
+
+@pytest.fixture
+def daily_server(monkeypatch):
+    today = date.today()
+    routes = {
+        path(date(2019, 1, 2)): (200, JAN_2.encode(), {}),
+        path(date(2019, 1, 4)): growing(JAN_4, date(2019, 1, 4)),
+        path(today): growing(DAILY_INDEX_HEADER, today),
+        '/daily-index/2019/QTR1/master.20190107.idx': (500, b'error', {}),
+    }
+    with StubServer(routes) as server:
+        monkeypatch.setattr(edgar.daily_index, 'DAILY_INDEX_URL', server.url + '/daily-index/')
+        yield server
+
+
+@pytest.fixture
+def store(tmpdir):
+    store = FilingIndexStore(str(tmpdir.join('index.sqlite')))
+    yield store
+    store.close()
+
+
+############## Positive Testing ##############
+
+def test_get_rows():
+    rows = list(_get_rows(JAN_2))
+    assert rows[0] == ['1000045', 'NICHOLAS FINANCIAL INC', '10-Q', '2019-01-02', 'edgar/data/1000045/0001193125-19-000251.txt']
+    assert len(rows) == 2
+    assert list(_get_rows(DAILY_INDEX_HEADER)) == []
+
+
+def test_ingest(daily_server, store):
+    ingester = DailyIndexIngester(store, start=date(2019, 1, 1))
+
+    # 1st is a holiday, 3rd isn't published yet
+    filing_infos = ingester.ingest(today=date(2019, 1, 3))
+    assert [filing_info.cik for filing_info in filing_infos] == ['1000045', '1000209']
+    assert filing_infos[0].date_filed == '2019-01-02'
+    assert ingester.get_cursor() == date(2019, 1, 2)
+
+    daily_server.routes[path(date(2019, 1, 3))] = (200, JAN_3.encode(), {})
+    filing_infos = ingester.ingest(today=date(2019, 1, 4))
+    assert [filing_info.form for filing_info in filing_infos] == ['4', '8-K']
+    # the 4th can still get new filings
+    assert ingester.get_cursor() == date(2019, 1, 3)
+    assert daily_server.counts[path(date(2019, 1, 2))] == 1
+
+    # only what's new
+    filing_infos = ingester.ingest(today=date(2019, 1, 4))
+    assert [filing_info.form for filing_info in filing_infos] == ['10-Q']
+    assert ingester.ingest(today=date(2019, 1, 6)) == []
+    assert ingester.get_cursor() == date(2019, 1, 6)
+    # already stored
+    assert store.insert_rows(2019, 1, _get_rows(JAN_2)) == []
+
+
+def test_feed(daily_server, store):
+    ingester = DailyIndexIngester(store)
+    found = []
+    feed = ingester.feed(watchlist=['0000320193'], forms=['10-Q'], interval=0, polls=2, callback=found.append)
+    filing_infos = list(feed)
+    assert [filing_info.cik for filing_info in filing_infos] == ['320193']
+    assert found == filing_infos
+    assert daily_server.counts[path(date.today())] == 2
+    # today isn't over
+    assert ingester.get_cursor() is None
+
+
+def test_feed_already_stored(daily_server, store):
+    daily_server.routes[path(date.today())] = (200, JAN_2.encode(), {})
+    # e.g. by a refresh of the quarter
+    store.insert_rows(2019, 1, _get_rows(JAN_2))
+    filing_infos = list(DailyIndexIngester(store).feed(forms=['10-Q'], interval=0, polls=1))
+    assert [filing_info.cik for filing_info in filing_infos] == ['1000045']
+
+
+def test_feed_redelivered(daily_server, store):
+    daily_server.routes[path(date.today())] = (200, JAN_2.encode(), {})
+    ingester = DailyIndexIngester(store)
+    feed = ingester.feed(interval=0, polls=1)
+    assert next(feed).cik == '1000045'
+    # the consumer fails before asking for the next one
+    feed.close()
+
+    filing_infos = list(ingester.feed(interval=0, polls=1))
+    assert [filing_info.cik for filing_info in filing_infos] == ['1000045', '1000209']
+    # delivered now
+    assert list(ingester.feed(interval=0, polls=1)) == []
+
+
+############## Negative Testing ##############
+
+def test_get_daily_index_missing(daily_server):
+    assert get_daily_index(date(2019, 1, 1)) is None
+    assert get_daily_index(date(2019, 1, 2)) == JAN_2
+
+
+def test_get_daily_index_error(daily_server):
+    configure(retries=0)
+    try:
+        with pytest.raises(RequestException):
+            get_daily_index(date(2019, 1, 7))
+    finally:
+        configure()
@@ -0,0 +1,36 @@
+import pytest
+from edgar.document import Document
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+FORM_4_XML = '<?xml version="1.0"?>\n<ownershipDocument>\n<issuer>\n<issuerCik>0000910638</issuerCik>\n<issuerName>3D SYSTEMS CORP</issuerName>\n<issuerTradingSymbol>DDD</issuerTradingSymbol>\n</issuer>\n</ownershipDocument>'
+
+
+def get_document(xml):
+    return Document({'<TYPE>': '4', '<SEQUENCE>': '1', '<FILENAME>': 'a4.xml', '<TEXT>': {'<XML>': xml}})
+
+
+def test_get_issuer_trading_symbol():
+    document = get_document(FORM_4_XML)
+    assert document.get_issuer_trading_symbol() == ('910638', 'DDD')
+
+
+def test_get_issuer_trading_symbol_malformed_xml():
+    # falls back on BeautifulSoup
+    document = get_document(FORM_4_XML.replace('</ownershipDocument>', ''))
+    assert document.get_issuer_trading_symbol() == ('910638', 'DDD')
+
+
+def test_xml_is_parsed_once():
+    document = get_document(FORM_4_XML)
+    assert document.doc_text.xml is document.doc_text.xml
+    assert document.doc_text.xml.find('issuertradingsymbol').get_text() == 'DDD'
+
+
+def test_no_xml():
+    document = Document({'<TYPE>': 'EX-24', '<SEQUENCE>': '2', '<FILENAME>': 'ex-24.htm', '<TEXT>': 'html test'})
+    assert document.doc_text.xml is None
+    assert document.get_issuer_trading_symbol() == (None, None)
@@ -1,7 +1,19 @@
 import pytest
+import threading
+import time
 import re
 from datetime import datetime
-from edgar.edgar import get_filing_info, SUPPORTED_FORMS, InvalidInputException
+import asyncio
+import gzip
+import json
+import edgar.edgar
+from tests.stub_server import StubServer
+from edgar.financials import FinancialReportEncoder
+from edgar.edgar import get_filing_info, SUPPORTED_FORMS, InvalidInputException, FilingInfo, ARCHIVES_URL, \
+    async_get_filing_info, async_find_latest_filing_info_going_back_from, get_filing_info_batch, \
+    _parse_filing_info, _parse_filing_info_batch, get_filing_info_range, find_latest_filing_info, \
+    find_latest_filing_info_going_back_from, _get_quarters, iter_filing_info, _iter_lines, get_index_json, \
+    get_latest_quarter_dir, async_get_latest_quarter_dir, clear_index_json_cache, _iter_master_idx_rows
     
 def setup_module(module):
     print('setup_module      module:%s' % module.__name__)
@@ -77,8 +89,250 @@ def test_get_filing_info_cik_filter():
         assert filing_info.cik == cik
 
 
+def test_filing_info():
+    filing_info = FilingInfo('MEDALLION FINANCIAL CORP', '8-K', '1000209', '2019-01-08',
+        'edgar/data/1000209/0001193125-19-004285.txt')
+    assert filing_info.url == ARCHIVES_URL+'edgar/data/1000209/0001193125-19-004285.txt'
+    assert not hasattr(filing_info, '__dict__')
+    assert str(filing_info) == '[MEDALLION FINANCIAL CORP, 8-K, 1000209, 2019-01-08, {}]'.format(filing_info.url)
+    assert json.loads(FinancialReportEncoder().encode(filing_info)) == {'company': 'MEDALLION FINANCIAL CORP',
+        'form': '8-K', 'cik': '1000209', 'date_filed': '2019-01-08', 'url': filing_info.url}
+
+
+MASTER_IDX_HEADER = '''Description:           Master Index of EDGAR Dissemination Feed
+Last Data Received:    December 31, 2018
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+Cloud HTTP:            https://www.sec.gov/Archives/
+
+
+
+ 
+CIK|Company Name|Form Type|Date Filed|Filename
+--------------------------------------------------------------------------------
+'''
+
+MASTER_IDX = {
+    3: MASTER_IDX_HEADER + '''1000209|MEDALLION FINANCIAL CORP|10-Q|2018-08-09|edgar/data/1000209/0001193125-18-243220.txt
+1000228|HENRY SCHEIN INC|10-Q|2018-08-07|edgar/data/1000228/0001000228-18-000047.txt
+''',
+    4: MASTER_IDX_HEADER + '''1000209|MEDALLION FINANCIAL CORP|10-Q|2018-11-09|edgar/data/1000209/0001193125-18-324066.txt
+1000209|MEDALLION FINANCIAL CORP|8-K|2018-11-09|edgar/data/1000209/0001193125-18-324062.txt
+1000228|HENRY SCHEIN INC|4|2018-11-08|edgar/data/1000228/0001209191-18-057123.txt
+1000228|HENRY SCHEIN INC|8-K|2018-11-06|edgar/data/1000228/0001000228-18-000062.txt
+''',
+}
+
+INDEX_JSON_2018 = {'directory': {'item': [{'name': 'QTR{}'.format(quarter), 'type': 'dir', 'href': 'QTR{}/'.format(quarter)}
+    for quarter in [1, 2, 3, 4]], 'name': 'full-index/2018/', 'parent-dir': '../'}}
+
+
+INDEX_JSON_ROOT = {'directory': {'item': [{'name': str(year), 'type': 'dir', 'href': '{}/'.format(year)}
+    for year in [2017, 2018]], 'name': 'full-index/', 'parent-dir': '../'}}
+
+
+@pytest.fixture
+def index_server(monkeypatch):
+    routes = {'/full-index/2018/QTR{}/master.idx'.format(quarter): (200, text.encode(), {})
+        for quarter, text in MASTER_IDX.items()}
+    routes['/full-index/2018/index.json'] = (200, json.dumps(INDEX_JSON_2018).encode(), {})
+    routes['/full-index/2018/QTR4/master.gz'] = (200, gzip.compress(MASTER_IDX[4].encode()), {})
+    routes['/full-index/index.json'] = (200, json.dumps(INDEX_JSON_ROOT).encode(), {})
+    routes['/full-index/{}/index.json'.format(datetime.now().year)] = (200, json.dumps(INDEX_JSON_2018).encode(), {})
+    for quarter in [1, 2]:
+        routes['/full-index/2018/QTR{}/master.idx'.format(quarter)] = (200, MASTER_IDX_HEADER.encode(), {})
+
+    with StubServer(routes) as server:
+        monkeypatch.setattr(edgar.edgar, 'FULL_INDEX_URL', server.url + '/full-index/')
+        yield server
+
+
+def test_get_index_json_memoized(index_server, monkeypatch):
+    # past years are kept for good
+    assert get_latest_quarter_dir(2018) == (4, 'QTR4/')
+    assert get_index_json(year='2018/') is get_index_json(year='2018/')
+    assert asyncio.run(async_get_latest_quarter_dir(2018)) == (4, 'QTR4/')
+    assert index_server.counts['/full-index/2018/index.json'] == 1
+
+    # the current year and the root are kept for INDEX_JSON_TTL
+    current_year = datetime.now().year
+    get_latest_quarter_dir(current_year)
+    get_index_json()
+    get_latest_quarter_dir(current_year)
+    get_index_json()
+    assert index_server.counts['/full-index/{}/index.json'.format(current_year)] == 1
+    assert index_server.counts['/full-index/index.json'] == 1
+    monkeypatch.setattr(edgar.edgar, 'INDEX_JSON_TTL', 0)
+    clear_index_json_cache()
+    get_latest_quarter_dir(current_year)
+    get_latest_quarter_dir(current_year)
+    get_latest_quarter_dir(2018)
+    assert index_server.counts['/full-index/{}/index.json'.format(current_year)] == 3
+    assert index_server.counts['/full-index/2018/index.json'] == 2
+
+
+def test_iter_filing_info(index_server):
+    filing_infos = get_filing_info(year=2018, quarter=4)
+    for compressed in [False, True]:
+        assert [str(filing_info) for filing_info in iter_filing_info(2018, 4, compressed=compressed)] == \
+            [str(filing_info) for filing_info in filing_infos]
+
+    filing_infos = iter_filing_info(2018, 4, forms=['4', '10-Q'], compressed=True)
+    assert [(filing_info.cik, filing_info.form) for filing_info in filing_infos] == [('1000209', '10-Q'), ('1000228', '4')]
+    filing_infos = iter_filing_info(2018, 4, cik='1000228')
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-11-08', '2018-11-06']
+    # latest quarter
+    assert len(list(iter_filing_info(2018, forms=['10-Q']))) == 1
+    assert list(iter_filing_info(2018, 1)) == []
+
+
+def test_iter_master_idx_rows_closes():
+    class StubResponse:
+        closed = False
+
+        def iter_content(self, chunk_size):
+            yield MASTER_IDX[4].encode()
+
+        def close(self):
+            self.closed = True
+
+    response = StubResponse()
+    rows = _iter_master_idx_rows('master.idx', response=response)
+    next(rows)
+    # stopped early
+    rows.close()
+    assert response.closed
+
+    response = StubResponse()
+    assert len(list(_iter_master_idx_rows('master.idx', forms=['4'], response=response))) == 1
+    assert response.closed
+
+
+def test_iter_lines():
+    text = b'CIK|Company Name\n-----\n1000209|MEDALLION\r\n1000228|HENRY SCHEIN'
+    for size in [1, 3, 7, len(text)]:
+        chunks = [text[i:i+size] for i in range(0, len(text), size)]
+        assert list(_iter_lines(chunks)) == [b'CIK|Company Name', b'-----', b'1000209|MEDALLION\r', b'1000228|HENRY SCHEIN']
+        compressed = gzip.compress(text)
+        chunks = [b''] + [compressed[i:i+size] for i in range(0, len(compressed), size)]
+        assert list(_iter_lines(chunks))[-1] == b'1000228|HENRY SCHEIN'
+    assert list(_iter_lines([])) == []
+
+
+def test_async_get_filing_info(index_server):
+    filing_infos = asyncio.run(async_get_filing_info(cik='1000228', year=2018, quarter=4))
+    assert [filing_info.form for filing_info in filing_infos] == ['4', '8-K']
+
+    # latest quarter
+    filing_infos = asyncio.run(async_get_filing_info(forms=['10-Q'], year=2018))
+    assert [filing_info.file for filing_info in filing_infos] == ['edgar/data/1000209/0001193125-18-324066.txt']
+
+    # all quarters are requested at once, and the latest with filings wins
+    filing_infos = asyncio.run(async_find_latest_filing_info_going_back_from('quarterly', '1000228', 2018, 4))
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-08-07']
+    assert all(index_server.counts['/full-index/2018/QTR{}/master.idx'.format(quarter)] for quarter in [1, 2, 3, 4])
+
+
+def test_parse_filing_info():
+    text = MASTER_IDX[4]
+    # first and last rows, where the search used to go out of bounds
+    assert [filing_info.form for filing_info in _parse_filing_info(text, cik='1000209')] == ['10-Q', '8-K']
+    assert [filing_info.form for filing_info in _parse_filing_info(text, cik='1000228')] == ['4', '8-K']
+    assert [filing_info.form for filing_info in _parse_filing_info(text, cik='1000228', forms=['8-K'])] == ['8-K']
+    assert _parse_filing_info(text, cik='1000210') == []
+    assert _parse_filing_info(text, cik='999') == []
+    assert _parse_filing_info(text, cik='2000000') == []
+
+    # only one row
+    text = MASTER_IDX_HEADER + '320193|APPLE INC|10-Q|2016-01-27|edgar/data/320193/0001193125-16-439878.txt\n'
+    assert [filing_info.cik for filing_info in _parse_filing_info(text, cik='320193')] == ['320193']
+    assert _parse_filing_info(text, cik='1000209') == []
+    assert _parse_filing_info(MASTER_IDX_HEADER, cik='320193') == []
+
+
+def test_parse_filing_info_batch():
+    # not in numeric order, as in master.idx
+    text = MASTER_IDX[4] + '320193|APPLE INC|10-Q|2018-11-05|edgar/data/320193/0000320193-18-000145.txt\n'
+    filing_infos = _parse_filing_info_batch(text, ['320193', '1000228', '1000209', '42', '0001000209'])
+    assert list(filing_infos) == ['320193', '1000228', '1000209', '42', '0001000209']
+    assert [filing_info.date_filed for filing_info in filing_infos['320193']] == ['2018-11-05']
+    assert [filing_info.form for filing_info in filing_infos['1000228']] == ['4', '8-K']
+    assert [filing_info.form for filing_info in filing_infos['0001000209']] == ['10-Q', '8-K']
+    assert filing_infos['42'] == []
+
+    filing_infos = _parse_filing_info_batch(text, ['320193', '1000228', '1000209'], forms=['10-Q'])
+    assert [len(filing_infos[cik]) for cik in ['320193', '1000228', '1000209']] == [1, 0, 1]
+    assert _parse_filing_info_batch(text, []) == {}
+
+
+def test_get_filing_info_batch(index_server):
+    filing_infos = get_filing_info_batch(['1000209', '1000228'], forms=['10-Q'], year=2018, quarter=4)
+    assert [filing_info.file for filing_info in filing_infos['1000209']] == ['edgar/data/1000209/0001193125-18-324066.txt']
+    assert filing_infos['1000228'] == []
+    # latest quarter
+    filing_infos = get_filing_info_batch(['1000209', '1000228'], year=2018)
+    assert [len(filing_infos[cik]) for cik in ['1000209', '1000228']] == [2, 2]
+    assert index_server.counts['/full-index/2018/QTR4/master.idx'] == 2
+
+
+def test_get_filing_info_range(index_server):
+    filing_infos = get_filing_info_range('1000209', forms=['10-Q'], start=(2018, 1), end=(2018, 4))
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-08-09', '2018-11-09']
+    filing_infos = get_filing_info_range('1000228', start=(2018, 3), end=(2018, 4), max_workers=1)
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-08-07', '2018-11-06', '2018-11-08']
+    assert get_filing_info_range('1000228', start=(2018, 1), end=(2018, 2)) == []
+
+
+def test_find_latest_filing_info(index_server):
+    filing_infos = find_latest_filing_info('1000228', forms=['10-Q'], start=(2018, 1), end=(2018, 4), max_workers=1)
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-08-07']
+    # stopped at QTR3, so the earlier quarters weren't looked up
+    assert '/full-index/2018/QTR2/master.idx' not in index_server.counts
+    assert find_latest_filing_info('1000228', forms=['10-K'], start=(2018, 1), end=(2018, 4)) == []
+    assert all(index_server.counts['/full-index/2018/QTR{}/master.idx'.format(quarter)] for quarter in [1, 2, 3, 4])
+
+    filing_infos = find_latest_filing_info_going_back_from('quarterly', '1000209', 2018, 4)
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-11-09']
+    assert find_latest_filing_info_going_back_from('quarterly', '1000209', 2018, 0) == []
+
+
+def test_find_latest_filing_info_does_not_wait(index_server):
+    done = threading.Event()
+
+    def slow(handler, count):
+        time.sleep(1)
+        done.set()
+        return 200, MASTER_IDX_HEADER.encode(), {}
+
+    index_server.routes['/full-index/2018/QTR2/master.idx'] = slow
+    start = time.monotonic()
+    filing_infos = find_latest_filing_info('1000209', forms=['10-Q'], start=(2018, 1), end=(2018, 4))
+    assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-11-09']
+    # QTR2 was still being downloaded
+    assert time.monotonic() - start < 1
+    assert not done.is_set()
+    done.wait(5)
+
+
+def test_get_quarters():
+    assert _get_quarters((2017, 3), (2018, 2)) == [(2017, 3), (2017, 4), (2018, 1), (2018, 2)]
+    assert _get_quarters((2018, 4), (2018, 4)) == [(2018, 4)]
+    assert _get_quarters((2018, 4))[0] == (2018, 4)
+
+
 ############## Negative Testing ##############
 
+def test_get_quarters_bad_range():
+    with pytest.raises(InvalidInputException):
+        _get_quarters((2018, 2), (2018, 1))
+    with pytest.raises(InvalidInputException):
+        _get_quarters((2018, 0), (2018, 1))
+    with pytest.raises(InvalidInputException):
+        _get_quarters((1992, 1), (2018, 1))
+    with pytest.raises(InvalidInputException):
+        get_filing_info_range('1000209', start=(2018, 5), end=(2019, 1))
+
+
 def test_get_filing_info_bad_form():
     forms = ['4', '10-Z']
     try:
@@ -0,0 +1,111 @@
+import pytest
+import os
+import requests
+from edgar.fake_edgar import FakeEdgarServer
+from edgar.requests_wrapper import RecordingAdapter, ReplayAdapter, RewriteHostAdapter, RequestException, \
+    Client, configure
+from edgar.stock import Stock
+from tests.test_filing import get_filing_text
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+MASTER_IDX = '''Description:           Master Index of EDGAR Dissemination Feed
+Last Data Received:    March 31, 2016
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+Cloud HTTP:            https://www.sec.gov/Archives/
+
+
+
+
+CIK|Company Name|Form Type|Date Filed|Filename
+--------------------------------------------------------------------------------
+1000209|MEDALLION FINANCIAL CORP|10-K|2016-03-15|edgar/data/1000209/0001193125-16-504815.txt
+320193|APPLE INC|10-Q|2016-01-27|edgar/data/320193/0001193125-16-439878.txt
+320193|APPLE INC|8-K|2016-01-26|edgar/data/320193/0001193125-16-439150.txt
+'''
+
+MASTER_IDX_URL = 'https://www.sec.gov/Archives/edgar/full-index/2016/QTR1/master.idx'
+FILING_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0001193125-16-439878.txt'
+
+
+def write_mirror(directory):
+    '''
+    Writes a mirror of EDGAR with one quarter's index and one AAPL 10-Q
+    '''
+    for url, text in [(MASTER_IDX_URL, MASTER_IDX), (FILING_URL, get_filing_text())]:
+        path = os.path.join(str(directory), *url[len('https://www.sec.gov/'):].split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode='w', encoding='utf-8') as f:
+            f.write(text)
+
+
+@pytest.fixture
+def mirror(tmpdir):
+    write_mirror(tmpdir)
+    return str(tmpdir)
+
+
+def validate_statements(statements):
+    income_statement = statements.income_statements.reports[0]
+    assert income_statement.months == 3
+    assert income_statement.map['us-gaap_SalesRevenueNet'].value == 75872000000.0
+    assert len(statements.balance_sheets.reports) == 2
+    assert statements.cash_flows is None
+
+
+############## Positive Testing ##############
+
+def test_pipeline(mirror):
+    with FakeEdgarServer(mirror) as server:
+        client = configure(transport=RewriteHostAdapter(server.url))
+        try:
+            filing = Stock('AAPL').get_filing(period='quarterly', year=2016, quarter=1)
+            assert filing.url == FILING_URL
+            validate_statements(filing.get_statements())
+            assert client.get(MASTER_IDX_URL).text == MASTER_IDX
+        finally:
+            configure()
+
+
+def test_replay(mirror):
+    client = configure(transport=ReplayAdapter(mirror))
+    try:
+        validate_statements(Stock('AAPL').get_filing(period='quarterly', year=2016, quarter=1).get_statements())
+        # streamed the same as downloaded
+        assert b''.join(client.get(MASTER_IDX_URL, stream=True).iter_content(64)).decode() == MASTER_IDX
+    finally:
+        configure()
+
+
+def test_record(mirror, tmpdir):
+    recorded = os.path.join(str(tmpdir), 'recorded')
+    with FakeEdgarServer(mirror) as server:
+        client = Client(transport=RecordingAdapter(recorded, adapter=RewriteHostAdapter(server.url)))
+        assert client.get(FILING_URL, stream=True).text == get_filing_text()
+        assert client.get(MASTER_IDX_URL).status_code == 200
+        # not found isn't recorded
+        assert client.get('https://www.sec.gov/Archives/edgar/full-index/2016/QTR2/master.idx').status_code == 404
+        client.close()
+
+    assert sorted(os.listdir(os.path.join(recorded, 'Archives', 'edgar', 'full-index', '2016'))) == ['QTR1']
+    client = Client(transport=ReplayAdapter(recorded))
+    assert client.get(MASTER_IDX_URL).text == MASTER_IDX
+    assert client.get(FILING_URL).text == get_filing_text()
+    client.close()
+
+
+############## Negative Testing ##############
+
+def test_replay_missing(mirror):
+    client = Client(transport=ReplayAdapter(mirror), retries=0)
+    assert client.get('https://www.sec.gov/Archives/edgar/full-index/2016/QTR2/master.idx').status_code == 404
+    # outside the mirror
+    assert client.get('https://www.sec.gov/Archives/../../etc/passwd').status_code == 404
+    client.close()
+
+    session = requests.Session()
+    session.mount('https://', ReplayAdapter(mirror))
+    assert session.get('https://www.sec.gov/Archives/edgar/data/320193/missing.txt').status_code == 404
@@ -1,7 +1,13 @@
 import pytest
+import asyncio
 import json
+import os
+import edgar.filing
 from edgar.stock import Stock
 from edgar.financials import FinancialReportEncoder
+from edgar.filing import Filing, FilingException, _get_document_filter, FINANCIAL_DOCUMENTS, XBRL_DOCUMENTS
+from bs4 import BeautifulSoup
+from tests.stub_server import StubServer
 
     
 def setup_module(module):
@@ -61,4 +67,189 @@ def test_get_cash_flows():
     print(FinancialReportEncoder().encode(result)) # for easy QA using JSON
     # ensure certain data points are correct
     profit_loss = result.reports[0].map['us-gaap_ProfitLoss'].value
-    assert profit_loss == -745351000.0
\ No newline at end of file
+    assert profit_loss == -745351000.0
+
+
+
+def test_document_filter():
+    assert _get_document_filter(None) is None
+
+    document_filter = _get_document_filter(FINANCIAL_DOCUMENTS + ['EX-101.INS'])
+    assert document_filter('XML', 'FilingSummary.xml')
+    assert document_filter('XML', 'R2.htm')
+    assert document_filter('EX-101.INS', 'aapl-20151226.xml')
+    assert document_filter('EX-101.INS', None)
+    assert not document_filter('ex-101.ins', None)
+    assert not document_filter('10-Q', 'rmd-20190331x10q.htm')
+    assert not document_filter('EX-99.1', 'RELEASE.htm')
+    assert not document_filter('EX-101.SCH', 'aapl-20151226.xsd')
+    assert not document_filter('GRAPHIC', 'g1.jpg')
+
+
+
+def test_build_report_index():
+    filing_summary = '<?xml version="1.0" encoding="utf-8"?><FilingSummary><MyReports><Report instance="aapl-20151226.xml"><IsDefault>false</IsDefault><HtmlFileName>R2.htm</HtmlFileName><LongName>1002000 - Statement - CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS</LongName><Role>http://www.apple.com/role/CondensedConsolidatedStatementsOfOperations</Role><ShortName>CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS</ShortName><MenuCategory>Statements</MenuCategory></Report><Report instance="aapl-20151226.xml"><HtmlFileName>R4.htm</HtmlFileName><ShortName>CONDENSED CONSOLIDATED BALANCE SHEETS</ShortName><MenuCategory>Statements</MenuCategory></Report></MyReports></FilingSummary>'
+    filing_summary_xml = BeautifulSoup(filing_summary, 'html.parser')
+
+    report_index = Filing.build_report_index(filing_summary_xml)
+    report = report_index['condensed consolidated statements of operations']
+    assert report.html_file_name == 'R2.htm'
+    assert report.menu_category == 'Statements'
+    assert report.role == 'http://www.apple.com/role/CondensedConsolidatedStatementsOfOperations'
+    assert report.long_name == '1002000 - Statement - CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS'
+
+    assert Filing.get_html_file_name(filing_summary_xml, 'condensed consolidated balance sheets') == 'R4.htm'
+    assert Filing.get_html_file_name(filing_summary_xml, 'consolidated balance sheets') is None
+
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+FILING_SUMMARY = '<?xml version="1.0" encoding="utf-8"?><FilingSummary><MyReports><Report instance="aapl-20151226.xml"><HtmlFileName>R2.htm</HtmlFileName><Role>http://www.apple.com/role/CONDENSEDCONSOLIDATEDSTATEMENTSOFOPERATIONS</Role><ShortName>CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS</ShortName><MenuCategory>Statements</MenuCategory></Report><Report instance="aapl-20151226.xml"><HtmlFileName>R4.htm</HtmlFileName><Role>http://www.sunpower.com/role/CONSOLIDATEDBALANCESHEETS</Role><ShortName>CONSOLIDATED BALANCE SHEETS</ShortName><MenuCategory>Statements</MenuCategory></Report></MyReports></FilingSummary>'
+
+
+def get_filing_text():
+    '''
+    Returns the sgml of a filing with the R pages in tests/data
+    '''
+    document = '<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n<FILENAME>{2}\n<TEXT>\n{3}\n</TEXT>\n</DOCUMENT>\n'
+    documents = [('10-Q', 'a10-q.htm', '<html>10-Q</html>'), ('GRAPHIC', 'g1.jpg', 'begin 644 g1.jpg')]
+    for filename in ['R2.htm', 'R4.htm']:
+        with open(os.path.join(DATA_DIR, filename), mode='r', encoding='utf-8') as f:
+            documents.append(('XML', filename, f.read()))
+    documents.append(('XML', 'FilingSummary.xml', '<XML>\n' + FILING_SUMMARY + '\n</XML>'))
+    for doc_type, filename, data_filename in [('EX-101.INS', 'aapl-20151226.xml', 'xbrl_instance.xml'),
+            ('EX-101.PRE', 'aapl-20151226_pre.xml', 'xbrl_pre.xml'), ('EX-101.LAB', 'aapl-20151226_lab.xml', 'xbrl_lab.xml')]:
+        with open(os.path.join(DATA_DIR, data_filename), mode='r', encoding='utf-8') as f:
+            documents.append((doc_type, filename, '<XBRL>\n' + f.read() + '\n</XBRL>'))
+
+    return '<SEC-DOCUMENT>0000320193-16-000017.txt : 20160127\n<SEC-HEADER>0000320193-16-000017.hdr.sgml : 20160127\n<ACCEPTANCE-DATETIME>20160127163541\n</SEC-HEADER>\n' \
+        + ''.join(document.format(doc_type, i + 1, filename, text) for i, (doc_type, filename, text) in enumerate(documents)) \
+        + '</SEC-DOCUMENT>'
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.closed = False
+
+    def iter_content(self, chunk_size, decode_unicode=False):
+        for i in range(0, len(self.text), chunk_size):
+            yield self.text[i:i+chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stub_filing(monkeypatch):
+    class StubGetRequest:
+        def __init__(self, url, stream=False):
+            self.response = StubResponse(get_filing_text())
+
+    monkeypatch.setattr(edgar.filing, 'GetRequest', StubGetRequest)
+
+
+@pytest.mark.parametrize('stream', [False, True])
+@pytest.mark.parametrize('parallel', [False, True])
+def test_get_statements(stub_filing, stream, parallel):
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', company='AAPL', stream=stream)
+    statements = filing.get_statements(parallel=parallel)
+
+    assert statements.income_statements.reports[0].map['us-gaap_SalesRevenueNet'].value == 75872000000.0
+    assert statements.balance_sheets.reports[0].map['us-gaap_Assets'].value == 3126117000.0
+    assert statements.cash_flows is None
+
+    encoder = FinancialReportEncoder()
+    assert encoder.encode(statements.income_statements) == encoder.encode(filing.get_income_statements())
+    assert encoder.encode(statements.balance_sheets) == encoder.encode(filing.get_balance_sheets())
+
+    for stage in ['report_index', 'lookup', 'documents', 'parsing', 'income_statements', 'balance_sheets']:
+        assert statements.timings[stage] >= 0
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_get_statements_missing_r_page(stub_filing, stream):
+    # the balance sheet's R4.htm is left out
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', company='AAPL',
+        stream=stream, include=['FilingSummary.xml', 'R2.htm'])
+    statements = filing.get_statements()
+    assert statements.income_statements.reports[0].map['us-gaap_SalesRevenueNet'].value == 75872000000.0
+    assert statements.balance_sheets is None
+    assert 'balance_sheets' not in statements.timings
+
+
+def test_stream_close(stub_filing):
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', stream=True)
+    response = filing.response
+    filing.get_document('R2.htm')
+    assert not response.closed
+    # read to the end
+    list(filing.iter_documents())
+    assert response.closed and filing.response is None
+
+    with Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', stream=True) as filing:
+        response = filing.response
+        filing.get_document('R2.htm')
+    assert response.closed
+
+
+def test_include(stub_filing):
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', include=FINANCIAL_DOCUMENTS)
+    assert sorted(filing.documents) == ['FilingSummary.xml', 'R2.htm', 'R4.htm']
+    assert filing.get_statements().income_statements is not None
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_get_statements_xbrl(stub_filing, stream):
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', company='AAPL', stream=stream)
+    statements = filing.get_statements(source='xbrl')
+    html_statements = filing.get_statements()
+
+    assert statements.cash_flows is None
+    for attribute in ['income_statements', 'balance_sheets']:
+        financial_report = getattr(statements, attribute)
+        html_report = getattr(html_statements, attribute)
+        assert financial_report.company == 'AAPL'
+        assert financial_report.date_filed == html_report.date_filed
+        assert [(info.date, info.months) for info in financial_report.reports] == \
+            [(info.date, info.months) for info in html_report.reports]
+        for info, html_info in zip(financial_report.reports, html_report.reports):
+            # the R page has a dash where the XBRL has no value
+            html_map = {xbrl_element: (element.label, element.value) for xbrl_element, element in html_info.map.items()
+                if element.value == element.value}
+            assert {xbrl_element: (element.label, element.value) for xbrl_element, element in info.map.items()} == html_map
+        assert statements.timings[attribute] >= 0
+
+    encoder = FinancialReportEncoder()
+    assert encoder.encode(filing.get_income_statements(source='xbrl')) == encoder.encode(statements.income_statements)
+
+
+def test_get_statements_bad_source(stub_filing):
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt')
+    with pytest.raises(FilingException):
+        filing.get_statements(source='pdf')
+
+
+def test_include_xbrl(stub_filing):
+    filing = Filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000017.txt', include=XBRL_DOCUMENTS)
+    assert sorted(filing.documents) == ['FilingSummary.xml', 'aapl-20151226.xml', 'aapl-20151226_lab.xml', 'aapl-20151226_pre.xml']
+    assert filing.get_statements(source='xbrl').balance_sheets.reports[0].map['us-gaap_Assets'].value == 3126117000.0
+
+
+def test_fetch():
+    filing_text = get_filing_text().encode()
+    routes = {'/Archives/edgar/data/320193/{}.txt'.format(i): (200, filing_text, {}) for i in range(3)}
+
+    with StubServer(routes) as server:
+        urls = [server.url + path for path in sorted(routes)]
+
+        async def fetch_all():
+            return await asyncio.gather(*[Filing.fetch(url, company='AAPL', include=FINANCIAL_DOCUMENTS) for url in urls])
+
+        filings = asyncio.run(fetch_all())
+
+    assert [filing.url for filing in filings] == urls
+    for filing in filings:
+        assert sorted(filing.documents) == ['FilingSummary.xml', 'R2.htm', 'R4.htm']
+        assert filing.get_statements().income_statements.reports[0].map['us-gaap_SalesRevenueNet'].value == 75872000000.0
@@ -0,0 +1,136 @@
+import pytest
+import os
+import json
+import numpy as np
+from datetime import datetime
+from edgar.financials import get_financial_report, FinancialReportEncoder, FinancialElement, FinancialInfo, \
+    _get_report_rows, _get_report_rows_soup, _process_report_rows, \
+    _get_unit_scales, _process_financial_values, _process_financial_value
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+
+def read_r_page(filename):
+    with open(os.path.join(DATA_DIR, filename), mode='r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_get_financial_report():
+    result = get_financial_report('AAPL', datetime(2016, 1, 27), read_r_page('R2.htm'))
+
+    assert len(result.reports) == 2
+    assert result.reports[0].date == datetime(2015, 12, 26)
+    assert result.reports[0].months == 3
+    # $ in Millions
+    assert result.reports[0].map['us-gaap_SalesRevenueNet'].value == 75872000000.0
+    assert result.reports[0].map['us-gaap_SalesRevenueNet'].label == 'Net sales'
+    assert result.reports[0].map['us-gaap_OtherNonoperatingIncomeExpense'].value == -402000000.0
+    # shares in Thousands
+    assert result.reports[0].map['us-gaap_WeightedAverageNumberOfSharesOutstandingBasic'].value == 5558930000.0
+    assert result.reports[0].map['us-gaap_EarningsPerShareBasic'].value == 3.30
+    # sparse elements
+    assert 'us-gaap_GainLossOnInvestments' not in result.reports[0].map
+    assert result.reports[1].map['us-gaap_GainLossOnInvestments'].value == 12000000.0
+    assert 'us-gaap_CommonStockDividendsPerShareDeclared' not in result.reports[1].map
+
+
+def test_get_financial_report_snapshot():
+    result = get_financial_report('SPWR', datetime(2019, 2, 14), read_r_page('R4.htm'))
+
+    assert [report.date for report in result.reports] == [datetime(2018, 12, 30), datetime(2017, 12, 31)]
+    assert [report.months for report in result.reports] == [None, None]
+    assert result.reports[0].map['us-gaap_Assets'].value == 3126117000.0
+    assert result.reports[0].map['us-gaap_StockholdersEquity'].value == -12442000.0
+
+
+@pytest.mark.parametrize('filename', ['R2.htm', 'R4.htm'])
+def test_report_rows_match_soup(filename):
+    # the event-based parser must see the same table as BeautifulSoup does
+    financial_html_text = read_r_page(filename)
+    rows = _get_report_rows(financial_html_text)
+    soup_rows = _get_report_rows_soup(financial_html_text)
+
+    def cells(rows):
+        return [[(cell.name, cell.attrs, cell.text, cell.div_strings, cell.anchor_attrs) for cell in row] for row in rows]
+
+    assert cells(rows) == cells(soup_rows)
+
+    encoder = FinancialReportEncoder()
+    assert encoder.encode(_process_report_rows(rows)) == encoder.encode(_process_report_rows(soup_rows))
+
+
+def test_get_unit_scales():
+    assert _get_unit_scales('shares in Thousands, $ in Millions') == {'shares': 1000, 'dollars': 1000000, 'per_share': 1}
+    assert _get_unit_scales('$ in Billions') == {'shares': 1, 'dollars': 1000000000, 'per_share': 1}
+    assert _get_unit_scales('USD ($)') == {'shares': 1, 'dollars': 1, 'per_share': 1}
+    assert _get_unit_scales(None) == {'shares': 1, 'dollars': 1, 'per_share': 1}
+
+
+def test_process_financial_values():
+    unit_text = 'shares in Thousands, $ in Millions'
+    cases = [
+        ('$ 75,872', 'us-gaap_SalesRevenueNet', 75872000000.0),
+        ('$ (402)', 'us-gaap_OtherNonoperatingIncomeExpense', -402000000.0),
+        ('(0)', 'us-gaap_OtherNonoperatingIncomeExpense', -0.0),
+        ('5,558,930', 'us-gaap_WeightedAverageNumberOfSharesOutstandingBasic', 5558930000.0),
+        ('$ (3.30)', 'us-gaap_EarningsPerShareBasic', -3.30),
+        ('$ 0.52', 'us-gaap_CommonStockDividendsPerShareDeclared', 0.52),
+        ('\u2014', 'us-gaap_CommonStockDividendsPerShareDeclared', None),
+        ('', 'us-gaap_SalesRevenueNet', None),
+        ('1.2.3', 'us-gaap_SalesRevenueNet', None),
+    ]
+
+    values = _process_financial_values([case[0] for case in cases], [case[1] for case in cases], _get_unit_scales(unit_text))
+
+    for (text, xbrl_element, expected), value in zip(cases, values):
+        assert value == expected
+        assert _process_financial_value(text, xbrl_element, unit_text) == expected
+        assert type(value) is (float if expected is not None else type(None))
+
+
+def test_columnar_financial_report():
+    result = get_financial_report('AAPL', datetime(2016, 1, 27), read_r_page('R2.htm'))
+    columnar = result.to_columnar()
+
+    assert columnar.values.shape == (2, 9)
+    assert list(columnar.months) == [3, 3]
+    assert columnar.labels[columnar.elements.index('us-gaap_SalesRevenueNet')] == 'Net sales'
+    assert list(columnar.get_values('us-gaap_SalesRevenueNet')) == [75872000000.0, 74599000000.0]
+    assert np.isnan(columnar.get_values('us-gaap_GainLossOnInvestments')[0])
+
+    # same values, though elements that are missing in a period may come back in a different order
+    encoder = FinancialReportEncoder()
+    assert json.loads(encoder.encode(columnar.to_report())) == json.loads(encoder.encode(result))
+
+    frame = result.to_frame()
+    assert frame.shape == (2, 9)
+    assert frame.loc[(np.datetime64('2015-12-26'), 3), 'us-gaap_NetIncomeLoss'] == 18361000000.0
+    # the values aren't copied
+    assert np.shares_memory(columnar.to_frame().values, columnar.values)
+
+
+def test_columnar_financial_report_snapshot():
+    result = get_financial_report('SPWR', datetime(2019, 2, 14), read_r_page('R4.htm'))
+    columnar = result.to_columnar()
+
+    assert all(np.isnan(columnar.months))
+    assert [financial_info.months for financial_info in columnar.to_report().reports] == [None, None]
+    assert [financial_info.date for financial_info in columnar.to_report().reports] == [datetime(2018, 12, 30), datetime(2017, 12, 31)]
+
+
+def test_slotted_financial_info():
+    element = FinancialElement('Revenues', 10.0)
+    info = FinancialInfo(datetime(2019, 3, 31), 3, {'us-gaap_Revenues': element})
+    assert not hasattr(element, '__dict__')
+    assert not hasattr(info, '__dict__')
+    assert repr(element) == "{'label': 'Revenues', 'value': 10.0}"
+    assert json.loads(json.dumps(info, cls=FinancialReportEncoder)) == {
+        'date': '2019-03-31T00:00:00',
+        'months': 3,
+        'map': {'us-gaap_Revenues': {'label': 'Revenues', 'value': 10.0}}
+    }
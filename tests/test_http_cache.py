@@ -0,0 +1,151 @@
+import pytest
+import os
+import requests
+import threading
+from edgar.http_cache import HttpCache
+from edgar.requests_wrapper import Client
+from tests.stub_server import StubServer
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+FILING_PATH = '/Archives/edgar/data/320193/0000320193-16-000017.txt'
+MASTER_IDX_PATH = '/Archives/edgar/full-index/2018/QTR4/master.idx'
+
+
+def master_idx(handler, count):
+    if handler.headers['If-None-Match'] == '"v1"':
+        return 304, b'', {'ETag': '"v1"'}
+    return 200, b'CIK|Company Name|Form Type|Date Filed|Filename', {'ETag': '"v1"'}
+
+
+ROUTES = {
+    FILING_PATH: (200, b'<SEC-DOCUMENT>' * 1000, {}),
+    MASTER_IDX_PATH: master_idx,
+}
+
+
+@pytest.fixture
+def server():
+    with StubServer(ROUTES) as server:
+        yield server
+
+
+def test_immutable(server, tmpdir):
+    cache = HttpCache(str(tmpdir))
+    client = Client(cache=cache)
+
+    for _ in range(3):
+        assert client.get(server.url + FILING_PATH).content == b'<SEC-DOCUMENT>' * 1000
+    assert server.counts[FILING_PATH] == 1
+    assert cache.stats['misses'] == 1 and cache.stats['hits'] == 2
+
+    # kept on disk, compressed
+    client = Client(cache=HttpCache(str(tmpdir)))
+    response = client.get(server.url + FILING_PATH, stream=True)
+    assert b''.join(response.iter_content(1000)) == b'<SEC-DOCUMENT>' * 1000
+    assert server.counts[FILING_PATH] == 1
+    assert cache._get_size() < 1000
+
+
+def test_revalidated(server, tmpdir):
+    cache = HttpCache(str(tmpdir))
+    client = Client(cache=cache)
+
+    for _ in range(2):
+        response = client.get(server.url + MASTER_IDX_PATH)
+        assert response.status_code == 200
+        assert response.text.startswith('CIK|')
+    # asked the server both times, but only downloaded once
+    assert server.counts[MASTER_IDX_PATH] == 2
+    assert cache.stats['misses'] == 1 and cache.stats['revalidated'] == 1
+
+
+def test_stream(server, tmpdir):
+    cache = HttpCache(str(tmpdir))
+    client = Client(cache=cache)
+
+    # closed before the end, so not stored
+    response = client.get(server.url + FILING_PATH, stream=True)
+    next(response.iter_content(100))
+    response.close()
+    assert cache.get_entry(server.url + FILING_PATH) is None
+    assert os.listdir(str(tmpdir.join('tmp'))) == []
+
+    for _ in range(3):
+        response = client.get(server.url + FILING_PATH, stream=True)
+        assert b''.join(response.iter_content(1000)) == b'<SEC-DOCUMENT>' * 1000
+    assert server.counts[FILING_PATH] == 2
+    assert cache.stats['stored'] == 1 and cache.stats['hits'] == 2
+
+    # revalidated, and still streamed
+    for _ in range(2):
+        response = client.get(server.url + MASTER_IDX_PATH, stream=True)
+        assert response.raw is not None and not response._content_consumed
+        assert b''.join(response.iter_content(7)) == b'CIK|Company Name|Form Type|Date Filed|Filename'
+    assert server.counts[MASTER_IDX_PATH] == 2
+    assert cache.stats['revalidated'] == 1
+    assert client.get(server.url + MASTER_IDX_PATH).text.startswith('CIK|')
+
+
+def test_evict(tmpdir):
+    cache = HttpCache(str(tmpdir), max_size=2500)
+
+    bodies = [os.urandom(1000) for _ in range(3)]
+    for i, body in enumerate(bodies):
+        response = requests.Response()
+        response._content = body
+        cache.put('https://www.sec.gov/Archives/edgar/data/{}.txt'.format(i), response)
+        # least recently used first
+        os.utime(cache.get_entry('https://www.sec.gov/Archives/edgar/data/{}.txt'.format(i)).path, (i, i))
+
+    # the same body is only stored once
+    response = requests.Response()
+    response._content = bodies[2]
+    cache.put('https://www.sec.gov/Archives/edgar/data/copy.txt', response)
+
+    cache.evict()
+    assert cache.get_entry('https://www.sec.gov/Archives/edgar/data/0.txt') is None
+    assert cache.stats['evicted'] == 1
+    for url in ['https://www.sec.gov/Archives/edgar/data/1.txt', 'https://www.sec.gov/Archives/edgar/data/copy.txt']:
+        assert cache.get_response(cache.get_entry(url)) is not None
+    assert cache._get_size() <= 2500
+
+
+def test_evict_least_recently_used(tmpdir):
+    cache = HttpCache(str(tmpdir), max_size=2500)
+    urls = ['https://www.sec.gov/Archives/edgar/data/{}.txt'.format(i) for i in range(3)]
+
+    for url in urls[:2]:
+        response = requests.Response()
+        response._content = os.urandom(1000)
+        cache.put(url, response)
+    # used, so 1 is now the least recently used
+    assert cache.get_response(cache.get_entry(urls[0])) is not None
+
+    response = requests.Response()
+    response._content = os.urandom(1000)
+    cache.put(urls[2], response)
+    assert cache.get_entry(urls[1]) is None
+    assert cache.get_entry(urls[0]) is not None and cache.get_entry(urls[2]) is not None
+    assert cache.stats['evicted'] == 1
+
+
+def test_put_concurrently(tmpdir):
+    cache = HttpCache(str(tmpdir))
+    response = requests.Response()
+    response._content = os.urandom(1000)
+
+    threads = [threading.Thread(target=cache.put, args=('https://www.sec.gov/Archives/edgar/data/{}.txt'.format(i), response))
+        for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # the same body, counted once
+    assert cache.stats['stored'] == 8
+    assert cache._get_size() == HttpCache(str(tmpdir))._get_size()
+    assert len(os.listdir(str(tmpdir.join('tmp')))) == 0
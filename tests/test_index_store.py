@@ -0,0 +1,201 @@
+import pytest
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+import edgar.edgar
+import edgar.index_store
+from tests.stub_server import StubServer
+from tests.test_edgar import MASTER_IDX, MASTER_IDX_HEADER, INDEX_JSON_2018
+from edgar.edgar import get_filing_info, get_financial_filing_info, get_filing_info_batch, set_index_provider, \
+    set_index_store, IndexProvider, InvalidInputException, async_get_filing_info
+from edgar.index_store import FilingIndexStore, is_complete
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+NOW = datetime.now()
+CURRENT_QUARTER = (NOW.month - 1) // 3 + 1
+CURRENT_PATH = '/full-index/{}/QTR{}/master.idx'.format(NOW.year, CURRENT_QUARTER)
+NEW_ROW = '1000228|HENRY SCHEIN INC|10-Q|{:%Y-%m-%d}|edgar/data/1000228/0001000228-00-000001.txt\n'.format(NOW)
+
+
+def current_quarter(handler, count):
+    # a new filing comes in after the first download
+    text = MASTER_IDX[3] + (NEW_ROW if count > 1 else '')
+    return 200, text.encode(), {}
+
+
+@pytest.fixture
+def index_server(monkeypatch):
+    routes = {'/full-index/2018/QTR{}/master.idx'.format(quarter): (200, text.encode(), {})
+        for quarter, text in MASTER_IDX.items()}
+    routes['/full-index/2018/index.json'] = (200, json.dumps(INDEX_JSON_2018).encode(), {})
+    routes[CURRENT_PATH] = current_quarter
+    for quarter in [1, 2]:
+        routes['/full-index/2018/QTR{}/master.idx'.format(quarter)] = (200, MASTER_IDX_HEADER.encode(), {})
+
+    with StubServer(routes) as server:
+        monkeypatch.setattr(edgar.edgar, 'FULL_INDEX_URL', server.url + '/full-index/')
+        yield server
+
+
+@pytest.fixture
+def store(tmpdir):
+    store = FilingIndexStore(str(tmpdir.join('index.sqlite')))
+    yield store
+    store.close()
+
+
+############## Positive Testing ##############
+
+def test_store(index_server, store):
+    filing_infos = store.get_filing_info(cik='1000228', year=2018, quarter=4)
+    assert [(filing_info.form, filing_info.cik) for filing_info in filing_infos] == [('4', '1000228'), ('8-K', '1000228')]
+    assert [filing_info.file for filing_info in store.get_filing_info(forms=['10-Q', '8-K'], year=2018, quarter=4)] == [
+        'edgar/data/1000209/0001193125-18-324066.txt', 'edgar/data/1000209/0001193125-18-324062.txt',
+        'edgar/data/1000228/0001000228-18-000062.txt']
+    assert len(store.get_filing_info(year=2018, quarter=4)) == 4
+    assert store.get_filing_info(cik='320193', year=2018, quarter=4) == []
+
+    # downloaded once
+    store.get_filing_info(cik='1000209', year=2018, quarter=4)
+    assert index_server.counts['/full-index/2018/QTR4/master.idx'] == 1
+    assert store.get_quarters() == [(2018, 4)]
+
+
+def test_store_persists(index_server, tmpdir):
+    path = str(tmpdir.join('index.sqlite'))
+    with FilingIndexStore(path) as store:
+        store.get_filing_info(year=2018, quarter=3)
+    with FilingIndexStore(path) as store:
+        assert len(store.get_filing_info(cik='1000209', year=2018, quarter=3)) == 1
+    assert index_server.counts['/full-index/2018/QTR3/master.idx'] == 1
+
+
+def test_store_refresh(index_server, store):
+    assert len(store.get_filing_info(year=NOW.year, quarter=CURRENT_QUARTER)) == 2
+    # not refreshed within refresh_interval
+    assert len(store.get_filing_info(year=NOW.year, quarter=CURRENT_QUARTER)) == 2
+    assert index_server.counts[CURRENT_PATH] == 1
+
+    store.refresh_interval = 0
+    assert store.update(NOW.year, CURRENT_QUARTER) == 1
+    assert store.update(NOW.year, CURRENT_QUARTER) == 0
+    filing_infos = store.get_filing_info(cik='1000228', year=NOW.year, quarter=CURRENT_QUARTER)
+    assert [filing_info.form for filing_info in filing_infos] == ['10-Q', '10-Q']
+
+
+def test_store_refresh_unchanged(index_server, store):
+    downloads = []
+
+    def unchanged(handler, count):
+        if handler.headers['If-None-Match'] == '"v1"':
+            return 304, b'', {}
+        downloads.append(count)
+        return 200, MASTER_IDX[3].encode(), {'ETag': '"v1"'}
+
+    index_server.routes[CURRENT_PATH] = unchanged
+    store.refresh_interval = 0
+    assert store.update(NOW.year, CURRENT_QUARTER) == 2
+    # asked again, but not downloaded again
+    assert store.update(NOW.year, CURRENT_QUARTER) == 0
+    assert index_server.counts[CURRENT_PATH] == 2
+    assert downloads == [1]
+    assert len(store.get_filing_info(year=NOW.year, quarter=CURRENT_QUARTER)) == 2
+
+
+def test_update_concurrently(index_server, store):
+    def slow(handler, count):
+        time.sleep(0.1)
+        return 200, MASTER_IDX[3].encode(), {}
+
+    index_server.routes['/full-index/2018/QTR3/master.idx'] = slow
+    threads = [threading.Thread(target=store.update, args=(2018, 3)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # downloaded once, the others waited for it
+    assert index_server.counts['/full-index/2018/QTR3/master.idx'] == 1
+    assert len(store.get_filing_info(year=2018, quarter=3)) == 2
+
+
+def test_add_rows_in_batches(store, monkeypatch):
+    monkeypatch.setattr(edgar.index_store, 'INSERT_BATCH_SIZE', 2)
+    unlocked = []
+
+    def rows():
+        for i in range(5):
+            # the store can be used from another thread while rows are downloaded
+            thread = threading.Thread(target=lambda: unlocked.append(store.get_quarters()))
+            thread.start()
+            thread.join(1)
+            yield [str(1000 + i), 'COMPANY', '10-Q', '2018-11-01', 'edgar/data/{}.txt'.format(i)]
+
+    assert store.add_rows(2018, 4, rows(), complete=True) == 5
+    assert len(unlocked) == 5
+    assert len(store.get_filing_info(year=2018, quarter=4)) == 5
+
+
+def test_is_complete():
+    assert is_complete(2018, 4)
+    assert not is_complete(2018, 4, datetime(2018, 12, 31).timestamp())
+    assert not is_complete(2018, 4, datetime(2019, 1, 2).timestamp())
+    assert is_complete(2018, 2, datetime(2018, 7, 8).timestamp())
+    assert not is_complete(NOW.year, CURRENT_QUARTER)
+
+
+def test_get_filing_info_from_store(index_server, store):
+    previous = set_index_provider(store)
+    try:
+        filing_infos = get_financial_filing_info(period='quarterly', cik='1000209', year=2018, quarter=3)
+        assert [filing_info.date_filed for filing_info in filing_infos] == ['2018-08-09']
+        # latest quarter
+        filing_infos = get_filing_info(forms=['10-Q'], year=2018)
+        assert [filing_info.file for filing_info in filing_infos] == ['edgar/data/1000209/0001193125-18-324066.txt']
+        get_filing_info(cik='1000228', year=2018, quarter=4)
+        filing_infos = get_filing_info_batch(['1000209', '0001000228', '42'], forms=['10-Q', '4'], year=2018, quarter=4)
+        assert [len(filing_infos[cik]) for cik in ['1000209', '0001000228', '42']] == [1, 1, 0]
+        assert index_server.counts['/full-index/2018/QTR4/master.idx'] == 1
+    finally:
+        set_index_provider(previous)
+
+
+def test_async_get_filing_info_from_store(index_server, store):
+    previous = set_index_provider(store)
+    try:
+        for query in [dict(cik='1000228', year=2018, quarter=4), dict(forms=['10-Q'], year=2018, quarter=3),
+                dict(cik='1000209', year=2018)]:
+            filing_infos = asyncio.run(async_get_filing_info(**query))
+            assert [str(filing_info) for filing_info in filing_infos] == \
+                [str(filing_info) for filing_info in get_filing_info(**query)]
+        # answered from the store, so each quarter was only downloaded once
+        assert index_server.counts['/full-index/2018/QTR4/master.idx'] == 1
+        assert index_server.counts['/full-index/2018/QTR3/master.idx'] == 1
+    finally:
+        set_index_provider(previous)
+
+
+############## Negative Testing ##############
+
+def test_get_filing_info_from_store_bad_form(index_server, store):
+    previous = set_index_provider(store)
+    try:
+        with pytest.raises(InvalidInputException):
+            get_filing_info(forms=['10-Z'], year=2018, quarter=4)
+    finally:
+        set_index_provider(previous)
+
+
+def test_set_index_store_deprecated(store):
+    with pytest.warns(DeprecationWarning):
+        previous = set_index_store(store)
+    assert set_index_provider(previous) is store
+
+
+def test_index_provider_abstract():
+    with pytest.raises(TypeError):
+        IndexProvider()
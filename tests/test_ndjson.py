@@ -0,0 +1,85 @@
+import pytest
+import io
+import os
+import json
+import numpy as np
+from datetime import datetime
+from edgar.financials import get_financial_report, FinancialReportEncoder, FinancialElement
+from edgar.ndjson import dumps_report, dump_reports, load_reports, loads_report, iter_ndjson, \
+    NdjsonException, orjson
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+BACKENDS = ['json'] + (['orjson'] if orjson is not None else [])
+
+
+def get_reports():
+    reports = []
+    for filename in ['R2.htm', 'R4.htm']:
+        with open(os.path.join(DATA_DIR, filename), mode='r', encoding='utf-8') as f:
+            reports.append(get_financial_report('AAPL', datetime(2016, 1, 27, 16, 35, 41), f.read()))
+    return reports
+
+
+def test_dumps_report_matches_encoder():
+    encoder = FinancialReportEncoder(separators=(',', ':'))
+    for financial_report in get_reports():
+        assert dumps_report(financial_report, backend='json') == encoder.encode(financial_report)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_round_trip(backend):
+    financial_reports = get_reports()
+    encoder = FinancialReportEncoder()
+
+    f = io.StringIO()
+    assert dump_reports(iter(financial_reports), f, backend=backend) == 2
+    lines = f.getvalue().split('\n')
+    assert len(lines) == 3 and lines[2] == ''
+
+    loaded = list(load_reports(io.StringIO(f.getvalue())))
+    assert len(loaded) == 2
+    for financial_report, loaded_report in zip(financial_reports, loaded):
+        assert loaded_report.date_filed == datetime(2016, 1, 27, 16, 35, 41)
+        assert isinstance(loaded_report.reports[0].date, datetime)
+        assert json.loads(encoder.encode(loaded_report)) == json.loads(encoder.encode(financial_report))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_binary(backend):
+    financial_report = get_reports()[0]
+    financial_report.reports[0].map['test_Missing'] = FinancialElement('Missing "value"', None)
+
+    f = io.BytesIO()
+    dump_reports([financial_report], f, backend=backend)
+    assert f.getvalue() == b''.join(iter_ndjson([financial_report], backend=backend))
+
+    loaded_report = loads_report(f.getvalue())
+    assert loaded_report.reports[0].map['test_Missing'].label == 'Missing "value"'
+    assert loaded_report.reports[0].map['test_Missing'].value is None
+
+
+def test_backends_match():
+    financial_report = get_reports()[0]
+    financial_report.reports[0].map['test_Nan'] = FinancialElement('Nan', float('nan'))
+    financial_report.reports[0].map['test_Int64'] = FinancialElement('Int64', np.int64(3))
+    financial_report.reports[0].map['test_Float64'] = FinancialElement('Float64', np.float64(1.5))
+
+    lines = {backend: dumps_report(financial_report, backend=backend) for backend in BACKENDS}
+    assert len(set(lines.values())) == 1
+    # valid JSON, without NaN
+    data = json.loads(lines['json'], parse_constant=pytest.fail)
+    values = {xbrl_element: element['value'] for xbrl_element, element in data['reports'][0]['map'].items()}
+    assert values['test_Nan'] is None
+    assert values['test_Int64'] == 3
+    assert values['test_Float64'] == 1.5
+
+
+def test_bad_backend():
+    with pytest.raises(NdjsonException):
+        dumps_report(get_reports()[0], backend='yaml')
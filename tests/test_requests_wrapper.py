@@ -0,0 +1,111 @@
+import pytest
+import gzip
+import asyncio
+import threading
+import time
+from tests.stub_server import StubServer
+from edgar.requests_wrapper import Client, AsyncClient, TokenBucket, GetRequest, RequestException, \
+    configure, get_client, async_get, DEFAULT_USER_AGENT
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+def echo(handler, count):
+    body = '{}|{}|{}'.format(handler.headers['User-Agent'], handler.headers['Accept-Encoding'], handler.client_address[1])
+    return 200, body.encode(), {}
+
+
+def slow(handler, count):
+    time.sleep(0.05)
+    return 200, b'slow', {}
+
+
+ROUTES = {
+    # the request's User-Agent and Accept-Encoding, and the client's port
+    '/ok': echo,
+    '/gzip': (200, gzip.compress(b'<SEC-DOCUMENT>' * 100), {'Content-Encoding': 'gzip'}),
+    # unavailable the first two times
+    '/flaky': lambda handler, count: (503, b'unavailable', {}) if count <= 2 else (200, b'ok', {}),
+    '/throttled': (429, b'slow down', {'Retry-After': '0'}),
+    '/slow': slow,
+}
+
+
+@pytest.fixture(scope='module')
+def server():
+    with StubServer(ROUTES) as server:
+        yield server
+
+
+@pytest.fixture(scope='module')
+def server_url(server):
+    return server.url
+
+
+def test_client(server_url):
+    client = Client(user_agent='Sample Company admin@sample.com')
+    user_agent, accept_encoding, port = client.get(server_url + '/ok').text.split('|')
+    assert user_agent == 'Sample Company admin@sample.com'
+    assert 'gzip' in accept_encoding
+    # the connection is kept alive
+    assert client.get(server_url + '/ok').text.split('|')[2] == port
+
+    assert client.get(server_url + '/gzip').text == '<SEC-DOCUMENT>' * 100
+    assert b''.join(client.get(server_url + '/gzip', stream=True).iter_content(64)) == b'<SEC-DOCUMENT>' * 100
+
+
+def test_client_retries(server):
+    client = Client(backoff=0.01)
+    assert client.get(server.url + '/flaky').text == 'ok'
+    assert server.counts['/flaky'] == 3
+
+    client = Client(retries=2, backoff=0.01)
+    assert client.get(server.url + '/throttled').status_code == 429
+    assert server.counts['/throttled'] == 3
+
+
+def test_token_bucket():
+    limiter = TokenBucket(50, capacity=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # the first is immediate, then one every 1/50 s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_get_request(server_url):
+    client = configure(user_agent='Sample Company admin@sample.com', backoff=0.01)
+    try:
+        assert get_client() is client
+        assert GetRequest(server_url + '/ok').response.text.startswith('Sample Company')
+        with pytest.raises(RequestException):
+            GetRequest(server_url + '/missing')
+    finally:
+        configure()
+
+
+def test_async_client(server):
+    client = AsyncClient(client=Client(max_requests_per_second=1000), max_concurrency=3)
+
+    async def get_all():
+        return await asyncio.gather(*[client.get(server.url + '/slow') for _ in range(9)])
+
+    server.max_in_flight = 0
+    start = time.monotonic()
+    responses = asyncio.run(get_all())
+    assert [response.text for response in responses] == ['slow'] * 9
+    assert server.max_in_flight == 3
+    # 3 at a time
+    assert time.monotonic() - start < 9 * 0.05
+    client.close()
+
+
+def test_async_get(server_url):
+    assert asyncio.run(async_get(server_url + '/ok')).text.startswith(DEFAULT_USER_AGENT)
+    with pytest.raises(RequestException):
+        asyncio.run(async_get(server_url + '/missing'))
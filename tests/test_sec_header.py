@@ -0,0 +1,42 @@
+import pytest
+from datetime import datetime
+from edgar.sec_header import SecHeader
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+HEADER_10Q = '<SEC-HEADER>0000320193-16-000017.hdr.sgml : 20160127\n<ACCEPTANCE-DATETIME>20160127163541\nACCESSION NUMBER:\t\t0000320193-16-000017\nCONFORMED SUBMISSION TYPE:\t10-Q\nPUBLIC DOCUMENT COUNT:\t\t90\nCONFORMED PERIOD OF REPORT:\t20151226\nFILED AS OF DATE:\t\t20160127\nDATE AS OF CHANGE:\t\t20160127\n\nFILER:\n\n\tCOMPANY DATA:\t\n\t\tCOMPANY CONFORMED NAME:\t\t\tAPPLE INC\n\t\tCENTRAL INDEX KEY:\t\t\t0000320193\n\t\tSTANDARD INDUSTRIAL CLASSIFICATION:\tELECTRONIC COMPUTERS [3571]\n\t\tIRS NUMBER:\t\t\t\t942404110\n\t\tSTATE OF INCORPORATION:\t\t\tCA\n\t\tFISCAL YEAR END:\t\t\t0926\n\n\tFILING VALUES:\n\t\tFORM TYPE:\t\t10-Q\n\t\tSEC ACT:\t\t1934 Act\n\t\tSEC FILE NUMBER:\t001-36743\n\t\tFILM NUMBER:\t\t161364456\n\n\tBUSINESS ADDRESS:\t\n\t\tSTREET 1:\t\tONE INFINITE LOOP\n\t\tCITY:\t\t\tCUPERTINO\n\t\tSTATE:\t\t\tCA\n\t\tZIP:\t\t\t95014\n\t\tBUSINESS PHONE:\t\t(408) 996-1010\n\n\tFORMER COMPANY:\t\n\t\tFORMER CONFORMED NAME:\tAPPLE COMPUTER INC\n\t\tDATE OF NAME CHANGE:\t19970808\n</SEC-HEADER>'
+
+HEADER_4 = '<SEC-HEADER>0001209191-18-054365.hdr.sgml : 20181002\n<ACCEPTANCE-DATETIME>20181002160514\nACCESSION NUMBER:\t\t0001209191-18-054365\nCONFORMED SUBMISSION TYPE:\t4\nPUBLIC DOCUMENT COUNT:\t\t1\nCONFORMED PERIOD OF REPORT:\t20180928\nFILED AS OF DATE:\t\t20181002\nDATE AS OF CHANGE:\t\t20181002\n\nREPORTING-OWNER:\t\n\n\tOWNER DATA:\t\n\t\tCOMPANY CONFORMED NAME:\t\t\tSMITH JOHN\n\t\tCENTRAL INDEX KEY:\t\t\t0001234567\n\nISSUER:\t\t\n\n\tCOMPANY DATA:\t\n\t\tCOMPANY CONFORMED NAME:\t\t\t3D SYSTEMS CORP\n\t\tCENTRAL INDEX KEY:\t\t\t0000910638\n\t\tFISCAL YEAR END:\t\t\t1231\n</SEC-HEADER>'
+
+
+def test_sec_header():
+    header = SecHeader(HEADER_10Q)
+
+    assert header.acceptance_datetime == datetime(2016, 1, 27, 16, 35, 41)
+    assert header.accession_number == '0000320193-16-000017'
+    assert header.form_type == '10-Q'
+    assert header.document_count == 90
+    assert header.period_of_report == datetime(2015, 12, 26)
+    assert header.date_filed == datetime(2016, 1, 27)
+    assert header.cik == '320193'
+    assert header.company == 'APPLE INC'
+    assert header.fiscal_year_end == '0926'
+
+    filer = header.filers[0]
+    assert filer['FILING VALUES'][0]['SEC FILE NUMBER'] == '001-36743'
+    assert filer['BUSINESS ADDRESS'][0]['CITY'] == 'CUPERTINO'
+    assert filer['FORMER COMPANY'][0]['FORMER CONFORMED NAME'] == 'APPLE COMPUTER INC'
+
+
+def test_sec_header_issuer():
+    # forms 3, 4, 5 have an ISSUER instead of a FILER
+    header = SecHeader(HEADER_4)
+
+    assert header.form_type == '4'
+    assert header.cik == '910638'
+    assert header.company == '3D SYSTEMS CORP'
+    assert len(header.filers) == 2
+    assert header.filers[1]['OWNER DATA'][0]['COMPANY CONFORMED NAME'] == 'SMITH JOHN'
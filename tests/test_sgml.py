@@ -1,6 +1,6 @@
 import pytest
 import json
-from edgar.sgml import Sgml, SgmlException
+from edgar.sgml import Sgml, SgmlStream, SgmlText, SgmlException
 from edgar.dtd import DTD
     
 def setup_module(module):
@@ -17,12 +17,70 @@ def test_parse_sgml():
 
     assert json_document == '{"<SEC-DOCUMENT>": {"<SEC-HEADER>": {"<ACCEPTANCE-DATETIME>": "20180808170227"}, "<DOCUMENT>": [{"<TYPE>": "4", "<SEQUENCE>": "1", "<FILENAME>": "a4.xml", "<DESCRIPTION>": "4", "<TEXT>": {"<XML>": "xml test"}}, {"<TYPE>": "EX-24", "<SEQUENCE>": "2", "<FILENAME>": "ex-24.htm", "<DESCRIPTION>": "EX-24", "<XML>": "", "<TEXT>": "html test"}]}}'
 
-# TODO
-# def test_sgml_exception():
-# 	try:
-# 		# malformed sgml
-# 		text = '<SEC-DOCUMENT>00011046500110n<DOCUMENT>\n<TYPE>4\n<SEQUENCE>1\n<FILENAME>a4.xml\n<DESCRIPTION>4\n<TEXT>\n<XML>\nxml test\n</XML>\n</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-24\n<SEQUENCE>2\n<FILENAME>ex-24.htm\n<'
-# 		sgml = Sgml(text, DTD())
-# 		assert False
-# 	except SgmlException:
-# 	    assert True
\ No newline at end of file
+def test_parse_sgml_lazy():
+    text = '<SEC-DOCUMENT>0001104659-18-050552.txt : 20180808\n<SEC-HEADER>0001104659-18-050552.hdr.sgml : 20180808\n<ACCEPTANCE-DATETIME>20180808170227\n</SEC-HEADER>\n<DOCUMENT>\n<TYPE>4\n<SEQUENCE>1\n<FILENAME>a4.xml\n<DESCRIPTION>4\n<TEXT>\n<XML>\nxml test\n</XML>\n</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-24\n<SEQUENCE>2\n<FILENAME>ex-24.htm\n<DESCRIPTION>EX-24\n<TEXT>\nhtml test\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>'
+
+    sgml = Sgml(text, DTD(), lazy=True)
+    documents = sgml.map['<SEC-DOCUMENT>']['<DOCUMENT>']
+
+    # enclosed text refers to the sgml until it's needed
+    xml = documents[0]['<TEXT>']['<XML>']
+    assert isinstance(xml, SgmlText)
+    assert xml.source is text
+    assert str(xml) == 'xml test'
+    assert str(documents[1]['<TEXT>']) == 'html test'
+    assert documents[1]['<TYPE>'] == 'EX-24'
+
+def test_parse_sgml_document_filter():
+    text = '<SEC-DOCUMENT>0001104659-18-050552.txt : 20180808\n<SEC-HEADER>0001104659-18-050552.hdr.sgml : 20180808\n<ACCEPTANCE-DATETIME>20180808170227\n</SEC-HEADER>\n<DOCUMENT>\n<TYPE>4\n<SEQUENCE>1\n<FILENAME>a4.xml\n<DESCRIPTION>4\n<TEXT>\n<XML>\nxml test\n</XML>\n</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-24\n<SEQUENCE>2\n<FILENAME>ex-24.htm\n<DESCRIPTION>EX-24\n<TEXT>\nhtml test\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>'
+    seen = []
+
+    def document_filter(doc_type, filename):
+        seen.append((doc_type, filename))
+        return doc_type == 'EX-24'
+
+    sgml = Sgml(text, DTD(), document_filter=document_filter)
+    documents = sgml.map['<SEC-DOCUMENT>']['<DOCUMENT>']
+
+    assert seen == [('4', 'a4.xml'), ('EX-24', 'ex-24.htm')]
+    assert [document['<FILENAME>'] for document in documents] == ['ex-24.htm']
+
+    chunks = (text[i:i+7] for i in range(0, len(text), 7))
+    assert list(SgmlStream(chunks, DTD(), document_filter=document_filter)) == documents
+
+def test_sgml_stream():
+    text = '<SEC-DOCUMENT>0001104659-18-050552.txt : 20180808\n<SEC-HEADER>0001104659-18-050552.hdr.sgml : 20180808\n<ACCEPTANCE-DATETIME>20180808170227\n</SEC-HEADER>\n<DOCUMENT>\n<TYPE>4\n<SEQUENCE>1\n<FILENAME>a4.xml\n<DESCRIPTION>4\n<TEXT>\n<XML>\nxml test\n</XML>\n</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-24\n<SEQUENCE>2\n<FILENAME>ex-24.htm\n<DESCRIPTION>EX-24\n<TEXT>\nhtml test\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>'
+    expected = Sgml(text, DTD()).map['<SEC-DOCUMENT>']
+
+    # small chunks so that tags straddle chunks
+    chunks = (text[i:i+7] for i in range(0, len(text), 7))
+    sgml_stream = SgmlStream(chunks, DTD())
+
+    assert sgml_stream.read_header() == expected['<SEC-HEADER>']
+
+    documents = iter(sgml_stream)
+    assert next(documents) == expected['<DOCUMENT>'][0]
+    # stopping early and resuming picks up where it left off
+    assert list(sgml_stream) == expected['<DOCUMENT>'][1:]
+
+def test_parse_sgml_many_documents():
+    # used to recurse once per element, which hit the recursion limit on large filings
+    document = '<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>{0}\n<FILENAME>ex-{0}.htm\n<TEXT>\nhtml {0}\n</TEXT>\n</DOCUMENT>\n'
+    text = '<SEC-DOCUMENT>\n<SEC-HEADER>\n<ACCEPTANCE-DATETIME>20180808170227\n</SEC-HEADER>\n' \
+        + ''.join(document.format(i) for i in range(5000)) + '</SEC-DOCUMENT>'
+
+    sgml = Sgml(text, DTD())
+    documents = sgml.map['<SEC-DOCUMENT>']['<DOCUMENT>']
+
+    assert len(documents) == 5000
+    assert documents[-1]['<FILENAME>'] == 'ex-4999.htm'
+    assert documents[-1]['<TEXT>'] == 'html 4999'
+
+def test_sgml_exception():
+    try:
+        # malformed sgml
+        text = '<SEC-DOCUMENT>00011046500110n<DOCUMENT>\n<TYPE>4\n<SEQUENCE>1\n<FILENAME>a4.xml\n<DESCRIPTION>4\n<TEXT>\n<XML>\nxml test\n</XML>\n</TEXT>\n</DOCUMENT>\n<DOCUMENT>\n<TYPE>EX-24\n<SEQUENCE>2\n<FILENAME>ex-24.htm\n<'
+        sgml = Sgml(text, DTD())
+        assert False
+    except SgmlException:
+        assert True
@@ -0,0 +1,116 @@
+import pytest
+import json
+import os
+from edgar.edgar import get_financial_filing_info, get_filing_info_batch, set_index_provider, \
+    InvalidInputException
+from edgar.fake_edgar import FakeEdgarServer
+from edgar.requests_wrapper import RewriteHostAdapter, RequestException, configure
+from edgar.stock import Stock
+from edgar.submissions import SubmissionsProvider
+from tests.test_fake_edgar import write_mirror, FILING_URL
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+# newest first, as in the feed
+SUBMISSIONS = {
+    'cik': '320193',
+    'name': 'Apple Inc.',
+    'filings': {
+        'recent': {
+            'accessionNumber': ['0000320193-16-000070', '0001193125-16-439878', '0001193125-16-439150', '0001193125-15-356351'],
+            'filingDate': ['2016-04-27', '2016-01-27', '2016-01-26', '2015-10-28'],
+            'form': ['10-Q', '10-Q', '8-K', '10-K'],
+            'primaryDocument': ['a10-q20163262016.htm', 'd10q.htm', 'd8k.htm', 'd17062d10k.htm'],
+        },
+        'files': [{'name': 'CIK0000320193-submissions-001.json', 'filingCount': 2, 'filingFrom': '1994-01-26', 'filingTo': '2015-07-22'}],
+    },
+}
+
+SUBMISSIONS_001 = {
+    'accessionNumber': ['0001193125-15-259935', '0000320193-94-000016'],
+    'filingDate': ['2015-07-22', '1994-01-26'],
+    'form': ['10-Q', '10-Q'],
+}
+
+
+@pytest.fixture
+def mirror(tmpdir):
+    directory = str(tmpdir.join('mirror'))
+    write_mirror(directory)
+    # only the submissions feed, not the full index
+    os.remove(os.path.join(directory, 'Archives', 'edgar', 'full-index', '2016', 'QTR1', 'master.idx'))
+    os.makedirs(os.path.join(directory, 'submissions'))
+    for name, data in [('CIK0000320193.json', SUBMISSIONS), ('CIK0000320193-submissions-001.json', SUBMISSIONS_001)]:
+        with open(os.path.join(directory, 'submissions', name), mode='w', encoding='utf-8') as f:
+            json.dump(data, f)
+    return directory
+
+
+@pytest.fixture
+def server(mirror):
+    with FakeEdgarServer(mirror) as server:
+        configure(transport=RewriteHostAdapter(server.url))
+        try:
+            yield server
+        finally:
+            configure()
+
+
+############## Positive Testing ##############
+
+def test_submissions(server, tmpdir):
+    provider = SubmissionsProvider(str(tmpdir.join('cache')))
+    filing_infos = provider.get_filing_info(cik='320193', year=2016, quarter=1)
+    assert [(filing_info.form, filing_info.date_filed) for filing_info in filing_infos] == [('8-K', '2016-01-26'), ('10-Q', '2016-01-27')]
+    assert filing_infos[1].url == FILING_URL
+    assert filing_infos[1].company == 'Apple Inc.'
+    assert filing_infos[1].cik == '320193'
+    assert provider.get_filing_info(cik='0000320193', forms=['10-K'], year=2015, quarter=4)[0].date_filed == '2015-10-28'
+    # latest quarter of a past year
+    assert provider.get_filing_info(cik='320193', forms=['10-Q'], year=2016) == []
+
+    # the older file is only loaded when it's needed
+    submissions = provider.get_submissions('320193')
+    assert submissions.pages == {}
+    filing_infos = provider.get_filing_info(cik='320193', forms=['10-Q'], year=2015, quarter=3)
+    assert [filing_info.file for filing_info in filing_infos] == ['edgar/data/320193/0001193125-15-259935.txt']
+    assert list(submissions.pages) == ['CIK0000320193-submissions-001.json']
+
+    # kept on disk
+    assert sorted(os.listdir(str(tmpdir.join('cache')))) == ['CIK0000320193-submissions-001.json', 'CIK0000320193.json']
+    os.remove(os.path.join(server.directory, 'submissions', 'CIK0000320193.json'))
+    provider = SubmissionsProvider(str(tmpdir.join('cache')))
+    assert len(provider.get_filing_info(cik='320193', year=1994, quarter=1)) == 1
+
+
+def test_submissions_max_age(server):
+    provider = SubmissionsProvider(max_age=0)
+    assert len(provider.get_filing_info(cik='320193', year=2016, quarter=2)) == 1
+    os.remove(os.path.join(server.directory, 'submissions', 'CIK0000320193.json'))
+    with pytest.raises(RequestException):
+        provider.get_filing_info(cik='320193', year=2016, quarter=2)
+
+
+def test_get_filing_info_from_submissions(server):
+    previous = set_index_provider(SubmissionsProvider())
+    try:
+        filing_infos = get_financial_filing_info(period='annual', cik='320193', year=2015, quarter=4)
+        assert [filing_info.date_filed for filing_info in filing_infos] == ['2015-10-28']
+        filing_infos = get_filing_info_batch(['320193'], forms=['10-Q'], year=2016, quarter=2)
+        assert [filing_info.date_filed for filing_info in filing_infos['320193']] == ['2016-04-27']
+
+        # without the full index
+        filing = Stock('AAPL').get_filing(period='quarterly', year=2016, quarter=1)
+        assert filing.url == FILING_URL
+        assert filing.get_statements().income_statements is not None
+    finally:
+        set_index_provider(previous)
+
+
+############## Negative Testing ##############
+
+def test_submissions_no_cik():
+    with pytest.raises(InvalidInputException):
+        SubmissionsProvider().get_filing_info(year=2016, quarter=1)
@@ -0,0 +1,40 @@
+import pytest
+import edgar.data.symbols
+from edgar.data.symbols import process_symbol_filing
+from edgar.filing import Filing
+from tests.stub_server import StubServer
+from tests.test_document import FORM_4_XML
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+FILING_PATH = '/Archives/edgar/data/910638/0000910638-19-000010.txt'
+
+DOCUMENT = '<DOCUMENT>\n<TYPE>{0}\n<SEQUENCE>{1}\n<FILENAME>{2}\n<TEXT>\n{3}\n</TEXT>\n</DOCUMENT>\n'
+
+FILING_TEXT = '<SEC-DOCUMENT>0000910638-19-000010.txt : 20190102\n<SEC-HEADER>0000910638-19-000010.hdr.sgml : 20190102\n' \
+    '<ACCEPTANCE-DATETIME>20190102163541\n</SEC-HEADER>\n' \
+    + DOCUMENT.format('4', 1, 'form4.xml', '<XML>\n' + FORM_4_XML + '\n</XML>') \
+    + DOCUMENT.format('EX-24', 2, 'poa.txt', 'power of attorney\n' * 10000) \
+    + '</SEC-DOCUMENT>'
+
+
+def test_process_symbol_filing(monkeypatch):
+    filings = []
+
+    class RecordingFiling(Filing):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            filings.append((self, self.response))
+
+    monkeypatch.setattr(edgar.data.symbols, 'Filing', RecordingFiling)
+
+    with StubServer({FILING_PATH: (200, FILING_TEXT.encode(), {})}) as server:
+        assert process_symbol_filing(server.url + FILING_PATH) == ('910638', 'DDD')
+
+    # closed, without reading the rest of the filing
+    filing, response = filings[0]
+    assert filing.response is None
+    assert response.raw.closed
@@ -0,0 +1,98 @@
+import pytest
+import os
+from datetime import datetime
+from edgar.xbrl import XbrlInstance, parse_presentation, parse_labels, get_xbrl_financial_report
+
+    
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+INCOME_ROLE = 'http://www.apple.com/role/CONDENSEDCONSOLIDATEDSTATEMENTSOFOPERATIONS'
+
+
+INSTANCE = '''<?xml version="1.0" encoding="utf-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2018-01-31">
+<xbrli:context id="Q1"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000320193</xbrli:identifier></xbrli:entity>
+<xbrli:period><xbrli:startDate>2018-10-01</xbrli:startDate><xbrli:endDate>2018-12-29</xbrli:endDate></xbrli:period></xbrli:context>
+<xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>
+<xbrli:unit id="eur"><xbrli:measure>iso4217:EUR</xbrli:measure></xbrli:unit>
+<us-gaap:Revenues contextRef="Q1" decimals="-6" unitRef="usd">84310000000</us-gaap:Revenues>
+<us-gaap:Revenues contextRef="Q1" decimals="0" unitRef="eur">73784000123</us-gaap:Revenues>
+<us-gaap:CostOfRevenue contextRef="Q1" decimals="-6" unitRef="usd">52279000000</us-gaap:CostOfRevenue>
+</xbrli:xbrl>'''
+
+
+def read_data(filename):
+    with open(os.path.join(DATA_DIR, filename), mode='r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_parse_instance():
+    instance = XbrlInstance.parse(read_data('xbrl_instance.xml'))
+
+    context = instance.contexts['FD2016Q1QTD']
+    assert (context.date, context.months, context.dimensional) == (datetime(2015, 12, 26), 3, False)
+    context = instance.contexts['FI2018Q4']
+    assert (context.date, context.months, context.dimensional) == (datetime(2018, 12, 30), None, False)
+    assert instance.contexts['FD2016Q1QTD_srt_AmericasMember'].dimensional
+
+    assert instance.units == {'usd': 'USD', 'shares': 'shares', 'usdPerShare': 'USD/shares'}
+
+    # the more precise of the duplicates is kept
+    fact = instance.facts['us-gaap_SalesRevenueNet']['FD2016Q1QTD']
+    assert (fact.value, fact.unit, fact.decimals) == (75872000000.0, 'usd', -6)
+    assert instance.facts['us-gaap_EarningsPerShareBasic']['FD2016Q1QTD'].unit == 'usdPerShare'
+
+    # only numeric facts, and not nil ones
+    assert 'us-gaap_SignificantAccountingPoliciesTextBlock' not in instance.facts
+    assert 'dei_DocumentType' not in instance.facts
+    assert 'FD2015Q1QTD' not in instance.facts['us-gaap_CommonStockDividendsPerShareDeclared']
+
+
+def test_parse_presentation():
+    presentation = parse_presentation(read_data('xbrl_pre.xml').encode('utf-8'))
+    concepts = presentation[INCOME_ROLE]
+    assert [concept for concept, label_role in concepts[:5]] == ['us-gaap_IncomeStatementAbstract',
+        'us-gaap_SalesRevenueNet', 'us-gaap_CostOfGoodsAndServicesSold', 'us-gaap_OperatingExpensesAbstract',
+        'us-gaap_ResearchAndDevelopmentExpense']
+    assert ('us-gaap_EarningsPerShareBasic', 'http://www.xbrl.org/2003/role/terseLabel') in concepts
+
+
+def test_get_xbrl_financial_report():
+    instance = XbrlInstance.parse(read_data('xbrl_instance.xml'))
+    concepts = parse_presentation(read_data('xbrl_pre.xml'))[INCOME_ROLE]
+    labels = parse_labels(read_data('xbrl_lab.xml'))
+    assert labels['us-gaap_EarningsPerShareBasic']['http://www.xbrl.org/2003/role/label'] == 'Earnings Per Share, Basic'
+
+    financial_report = get_xbrl_financial_report('AAPL', datetime(2016, 1, 27), instance, concepts, labels)
+    assert [(info.date, info.months) for info in financial_report.reports] == \
+        [(datetime(2015, 12, 26), 3), (datetime(2014, 12, 27), 3)]
+    element = financial_report.reports[0].map['us-gaap_EarningsPerShareBasic']
+    assert (element.label, element.value) == ('Basic (in dollars per share)', 3.3)
+    assert financial_report.reports[0].map['us-gaap_OtherNonoperatingIncomeExpense'].value == -402000000.0
+    # abstracts have no values
+    assert 'us-gaap_OperatingExpensesAbstract' not in financial_report.reports[0].map
+
+    # without labels, the concept is used
+    financial_report = get_xbrl_financial_report('AAPL', None, instance, ['us-gaap_SalesRevenueNet'])
+    assert financial_report.reports[0].map['us-gaap_SalesRevenueNet'].label == 'us-gaap_SalesRevenueNet'
+    assert len(financial_report.reports) == 2
+
+
+def test_one_unit_per_period():
+    instance = XbrlInstance.parse(INSTANCE)
+    # the more precise fact is in another unit
+    fact = instance.facts['us-gaap_Revenues']['Q1']
+    assert (fact.value, fact.unit) == (84310000000.0, 'usd')
+
+
+def test_negated_label():
+    instance = XbrlInstance.parse(INSTANCE)
+    concepts = [('us-gaap_Revenues', None),
+        ('us-gaap_CostOfRevenue', 'http://www.xbrl.org/2009/role/negatedLabel')]
+    financial_map = get_xbrl_financial_report('AAPL', None, instance, concepts).reports[0].map
+    assert financial_map['us-gaap_Revenues'].value == 84310000000.0
+    assert financial_map['us-gaap_CostOfRevenue'].value == -52279000000.0